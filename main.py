@@ -7,11 +7,16 @@ Author: Violet DJ Community
 License: GPL-3.0-or-later
 """
 
+# First, so the startup timer covers this module's own imports too
+from src.ui.startup import startup_timer
+
 import sys
 import os
+import argparse
 import logging
 
 # Setup logging
+os.makedirs(os.path.expanduser('~/.violet_dj'), exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -23,17 +28,61 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+def parse_args(argv):
+    """Parse Violet DJ options; unrecognized arguments are left for Qt"""
+    parser = argparse.ArgumentParser(description="Violet DJ Mixer")
+    parser.add_argument('--analyze', metavar='DIR',
+                        help="analyze every track under DIR without starting the UI")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="worker processes for --analyze (default: CPU count)")
+    parser.add_argument('--instrument', action='store_true',
+                        help="record audio/MIDI/UI timing histograms (also VIOLET_DJ_INSTRUMENT=1)")
+    return parser.parse_known_args(argv)
+
+def analyze_library(root, workers=None):
+    """Headless batch analysis of a music library"""
+    from src.audio.batch import BatchAnalyzer
+    
+    if not os.path.isdir(root):
+        logger.error(f"Not a directory: {root}")
+        sys.exit(1)
+    
+    analyzer = BatchAnalyzer(workers=workers)
+    try:
+        analyzer.run(root)
+    except KeyboardInterrupt:
+        # Every finished file is already stored; rerunning resumes from here
+        logger.info("Batch analysis interrupted")
+    finally:
+        analyzer.store.close()
+    print(analyzer.summary())
+
 def main():
     """Main entry point for Violet DJ Mixer"""
+    args, qt_args = parse_args(sys.argv[1:])
+    if args.analyze:
+        analyze_library(args.analyze, args.workers)
+        return
+    
     logger.info("Starting Violet DJ Mixer...")
     
+    from src import instrumentation
+    if args.instrument or instrumentation.enabled_from_env():
+        instrumentation.enable()
+    
     try:
         from src.ui.main_window import VioletDJMixer
         from PyQt6.QtWidgets import QApplication
+        from PyQt6.QtCore import QTimer
+        startup_timer.mark("imports")
         
-        app = QApplication(sys.argv)
+        app = QApplication(sys.argv[:1] + qt_args)
+        startup_timer.mark("QApplication")
         mixer = VioletDJMixer()
         mixer.show()
+        startup_timer.mark("show")
+        # Runs on the first event-loop pass, after the window is painted
+        QTimer.singleShot(0, mixer.finish_startup)
         
         sys.exit(app.exec())
     except ImportError as e:
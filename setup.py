@@ -25,6 +25,7 @@ setup(
     long_description_content_type="text/markdown",
     url="https://github.com/violet-dj/violet-dj-mixer",
     packages=find_packages(),
+    package_data={"src.controllers": ["mappings/*.yaml"]},
     classifiers=[
         "Development Status :: 4 - Beta",
         "Environment :: X11 Applications :: Qt",
@@ -0,0 +1,295 @@
+"""
+Offline track analysis (BPM, beatgrid, downbeats, key) and its persistent store
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from src.audio.cues import CuePoints
+from src.audio.waveform import WAVEFORM_VERSION, WaveformPeaks
+
+logger = logging.getLogger(__name__)
+
+# Bump when analysis output changes so stale rows are recomputed
+ANALYSIS_VERSION = 1
+
+KEY_NAMES = ['C', 'C#', 'D', 'D#', 'E', 'F', 'F#', 'G', 'G#', 'A', 'A#', 'B']
+
+# Krumhansl-Schmuckler key profiles
+MAJOR_PROFILE = np.array([6.35, 2.23, 3.48, 2.33, 4.38, 4.09, 2.52, 5.19, 2.39, 3.66, 2.29, 2.88])
+MINOR_PROFILE = np.array([6.33, 2.68, 3.52, 5.38, 2.60, 3.53, 2.54, 4.75, 3.98, 2.69, 3.34, 3.17])
+
+
+def content_hash(file_path, chunk_size=1 << 20):
+    """BLAKE2b digest of the file contents, stable across renames and moves"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class TrackAnalysis:
+    """Analysis results for one track; beat and downbeat times are in seconds"""
+    
+    def __init__(self, content_hash, duration, bpm, beats, downbeats, key,
+                 analyzed_at=None, version=ANALYSIS_VERSION):
+        self.content_hash = content_hash
+        self.duration = duration
+        self.bpm = bpm
+        self.beats = np.asarray(beats, dtype=np.float64)
+        self.downbeats = np.asarray(downbeats, dtype=np.float64)
+        self.key = key
+        self.analyzed_at = analyzed_at if analyzed_at is not None else time.time()
+        self.version = version
+    
+    @property
+    def beat_ms(self):
+        """Length of one beat in milliseconds"""
+        return 60000.0 / self.bpm if self.bpm else 0.0
+    
+    def __repr__(self):
+        return (f"TrackAnalysis(bpm={self.bpm:.2f}, key={self.key!r}, "
+                f"beats={len(self.beats)}, duration={self.duration:.1f}s)")
+
+
+def estimate_key(chroma):
+    """Best-matching major/minor key for a (12, frames) chromagram"""
+    profile = chroma.mean(axis=1)
+    best, best_score = 'C', -np.inf
+    for tonic in range(12):
+        for mode, template in (('', MAJOR_PROFILE), ('m', MINOR_PROFILE)):
+            score = np.corrcoef(profile, np.roll(template, tonic))[0, 1]
+            if score > best_score:
+                best, best_score = KEY_NAMES[tonic] + mode, score
+    return best
+
+
+def estimate_downbeats(beat_frames, onset_env, beats_per_bar=4):
+    """Pick the bar phase whose beats carry the most onset energy"""
+    if len(beat_frames) < beats_per_bar:
+        return beat_frames
+    strengths = onset_env[np.minimum(beat_frames, len(onset_env) - 1)]
+    phase = int(np.argmax([strengths[p::beats_per_bar].mean() for p in range(beats_per_bar)]))
+    return beat_frames[phase::beats_per_bar]
+
+
+def analyze_track(file_path, digest=None, sample_rate=22050):
+    """Run BPM, beatgrid, downbeat and key detection on a file"""
+    import librosa
+    
+    started = time.perf_counter()
+    y, sr = librosa.load(file_path, sr=sample_rate, mono=True)
+    onset_env = librosa.onset.onset_strength(y=y, sr=sr)
+    tempo, beat_frames = librosa.beat.beat_track(onset_envelope=onset_env, sr=sr)
+    downbeat_frames = estimate_downbeats(beat_frames, onset_env)
+    chroma = librosa.feature.chroma_cqt(y=y, sr=sr)
+    
+    analysis = TrackAnalysis(
+        content_hash=digest or content_hash(file_path),
+        duration=len(y) / sr,
+        bpm=float(np.atleast_1d(tempo)[0]),
+        beats=librosa.frames_to_time(beat_frames, sr=sr),
+        downbeats=librosa.frames_to_time(downbeat_frames, sr=sr),
+        key=estimate_key(chroma),
+    )
+    logger.info(f"Analyzed {file_path} in {time.perf_counter() - started:.2f} s: {analysis}")
+    return analysis
+
+
+class AnalysisStore:
+    """SQLite database of track analyses, waveform peaks and cue points under ~/.violet_dj
+    
+    Rows are keyed by content hash. A second table maps (path, mtime, size)
+    to that hash, so a known file resolves with one indexed lookup and no
+    hashing, while a renamed or moved file is hashed once and then found.
+    """
+    
+    DEFAULT_PATH = os.path.expanduser('~/.violet_dj/analysis.db')
+    
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tracks (
+            content_hash TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            duration REAL,
+            bpm REAL,
+            musical_key TEXT,
+            beats BLOB,
+            downbeats BLOB,
+            analyzed_at REAL
+        );
+        CREATE TABLE IF NOT EXISTS paths (
+            path TEXT PRIMARY KEY,
+            mtime_ns INTEGER NOT NULL,
+            size INTEGER NOT NULL,
+            content_hash TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS paths_by_hash ON paths(content_hash);
+        CREATE TABLE IF NOT EXISTS cues (
+            content_hash TEXT NOT NULL,
+            kind TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            position REAL NOT NULL,
+            PRIMARY KEY (content_hash, kind, slot)
+        );
+        CREATE TABLE IF NOT EXISTS waveforms (
+            content_hash TEXT PRIMARY KEY,
+            version INTEGER NOT NULL,
+            sample_rate INTEGER NOT NULL,
+            base_frames INTEGER NOT NULL,
+            factor INTEGER NOT NULL,
+            bins INTEGER NOT NULL,
+            mins BLOB,
+            maxs BLOB,
+            rms BLOB
+        );
+    """
+    
+    def __init__(self, db_path=DEFAULT_PATH):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = None
+    
+    def _connection(self):
+        if self._conn is None:
+            if self.db_path != ':memory:':
+                os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.executescript(self.SCHEMA)
+        return self._conn
+    
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+    
+    def resolve_hash(self, file_path, compute=True):
+        """Content hash for file_path, hashing only if the path index is stale"""
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT content_hash FROM paths WHERE path = ? AND mtime_ns = ? AND size = ?',
+                (path, st.st_mtime_ns, st.st_size)).fetchone()
+        if row is not None:
+            return row[0]
+        if not compute:
+            return None
+        
+        digest = content_hash(path)
+        self.add_path(path, digest)
+        return digest
+    
+    def add_path(self, file_path, digest):
+        """Record that file_path (at its current mtime and size) has this content hash"""
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        with self._lock:
+            conn = self._connection()
+            conn.execute('INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)',
+                         (path, st.st_mtime_ns, st.st_size, digest))
+            conn.commit()
+    
+    def get(self, digest):
+        """Analysis stored under a content hash, or None"""
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT content_hash, version, duration, bpm, musical_key, beats, downbeats, '
+                'analyzed_at FROM tracks WHERE content_hash = ?', (digest,)).fetchone()
+        if row is None or row[1] != ANALYSIS_VERSION:
+            return None
+        return TrackAnalysis(
+            content_hash=row[0], version=row[1], duration=row[2], bpm=row[3], key=row[4],
+            beats=np.frombuffer(row[5], dtype=np.float64),
+            downbeats=np.frombuffer(row[6], dtype=np.float64),
+            analyzed_at=row[7])
+    
+    def lookup(self, file_path):
+        """Stored analysis for file_path, or None if it has not been analyzed"""
+        try:
+            digest = self.resolve_hash(file_path)
+        except OSError as e:
+            logger.warning(f"Cannot read {file_path}: {e}")
+            return None
+        return self.get(digest)
+    
+    def save(self, analysis, file_path=None):
+        """Store an analysis (and, if given, the path it came from)"""
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO tracks VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (analysis.content_hash, analysis.version, analysis.duration, analysis.bpm,
+                 analysis.key, analysis.beats.tobytes(), analysis.downbeats.tobytes(),
+                 analysis.analyzed_at))
+            if file_path is not None:
+                path = os.path.abspath(file_path)
+                st = os.stat(path)
+                conn.execute('INSERT OR REPLACE INTO paths VALUES (?, ?, ?, ?)',
+                             (path, st.st_mtime_ns, st.st_size, analysis.content_hash))
+            conn.commit()
+    
+    def get_waveform(self, digest):
+        """Waveform peak pyramid stored under a content hash, or None"""
+        with self._lock:
+            row = self._connection().execute(
+                'SELECT version, sample_rate, base_frames, factor, bins, mins, maxs, rms '
+                'FROM waveforms WHERE content_hash = ?', (digest,)).fetchone()
+        if row is None or row[0] != WAVEFORM_VERSION:
+            return None
+        return WaveformPeaks.from_blobs(row[1], row[4], row[5], row[6], row[7],
+                                        base_frames=row[2], factor=row[3])
+    
+    def save_waveform(self, digest, peaks):
+        """Store a waveform peak pyramid under a content hash"""
+        mins, maxs, rms = peaks.to_blobs()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                'INSERT OR REPLACE INTO waveforms VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (digest, WAVEFORM_VERSION, peaks.sample_rate, peaks.base_frames,
+                 peaks.factor, len(peaks.levels[0][0]), mins, maxs, rms))
+            conn.commit()
+    
+    def get_cues(self, digest):
+        """Hot cues and slice points stored under a content hash (empty if none)"""
+        with self._lock:
+            rows = self._connection().execute(
+                'SELECT kind, slot, position FROM cues WHERE content_hash = ? ORDER BY slot',
+                (digest,)).fetchall()
+        cues = CuePoints(digest)
+        for kind, slot, position in rows:
+            if kind == 'hot' and 0 <= slot < len(cues.hot_cues):
+                cues.hot_cues[slot] = position
+            elif kind == 'slice':
+                cues.slices.append(position)
+        return cues
+    
+    def save_cues(self, cues):
+        """Replace every cue stored for cues.content_hash"""
+        rows = [(cues.content_hash, 'hot', slot, p)
+                for slot, p in enumerate(cues.hot_cues) if p is not None]
+        rows += [(cues.content_hash, 'slice', slot, p) for slot, p in enumerate(cues.slices)]
+        with self._lock:
+            conn = self._connection()
+            conn.execute('DELETE FROM cues WHERE content_hash = ?', (cues.content_hash,))
+            conn.executemany('INSERT INTO cues VALUES (?, ?, ?, ?)', rows)
+            conn.commit()
+    
+    def get_or_analyze(self, file_path):
+        """Stored analysis for file_path, analyzing and storing it on a miss"""
+        digest = self.resolve_hash(file_path)
+        analysis = self.get(digest)
+        if analysis is None:
+            analysis = analyze_track(file_path, digest)
+            self.save(analysis, file_path)
+        return analysis
@@ -0,0 +1,150 @@
+"""
+Parallel batch analysis of a music library
+"""
+
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from src.audio.analysis import AnalysisStore, analyze_track, content_hash
+from src.audio.decoder import open_decoder
+from src.audio.waveform import compute_peaks
+
+logger = logging.getLogger(__name__)
+
+
+def scan_library(root, extensions):
+    """Yield audio files under root whose extension is in extensions (without dots)"""
+    suffixes = tuple('.' + ext.lower() for ext in extensions)
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if name.lower().endswith(suffixes) and not name.startswith('.'):
+                yield os.path.join(dirpath, name)
+
+
+def init_worker():
+    """Process pool initializer: a background job yields the CPU to anything interactive"""
+    try:
+        os.nice(10)
+    except OSError:
+        pass
+
+
+def file_peaks(file_path):
+    """Worker: decode a whole file into its waveform peak pyramid"""
+    decoder = open_decoder(file_path)
+    try:
+        return compute_peaks(decoder, decoder.sample_rate)
+    finally:
+        decoder.close()
+
+
+def _analyze_file(file_path, db_path):
+    """Worker: hash one file and compute whatever the store does not have yet"""
+    started = time.perf_counter()
+    try:
+        digest = content_hash(file_path)
+        store = AnalysisStore(db_path)
+        has_analysis = store.get(digest) is not None
+        has_waveform = store.get_waveform(digest) is not None
+        store.close()
+        
+        analysis = None if has_analysis else analyze_track(file_path, digest)
+        waveform = None if has_waveform else file_peaks(file_path)
+        return file_path, digest, analysis, waveform, time.perf_counter() - started, None
+    except Exception as e:
+        return file_path, None, None, None, time.perf_counter() - started, str(e)
+
+
+class BatchAnalyzer:
+    """Analyzes every supported file under a directory with a process pool
+    
+    Files already in the store are skipped without being hashed, so an
+    interrupted run resumes where it stopped. Submission is bounded to a
+    few tasks per worker and each result is written as soon as it arrives.
+    """
+    
+    IN_FLIGHT_PER_WORKER = 2
+    
+    def __init__(self, store=None, workers=None, extensions=None):
+        from src.audio.engine import AudioEngine
+        
+        self.store = store if store is not None else AnalysisStore()
+        self.workers = workers or os.cpu_count() or 1
+        self.extensions = extensions or list(AudioEngine.SUPPORTED_CODECS)
+        self.stats = {'analyzed': 0, 'cached': 0, 'skipped': 0, 'failed': 0, 'seconds': 0.0}
+    
+    def pending_files(self, root):
+        """Files under root with no stored analysis for their current path/mtime/size"""
+        for path in scan_library(root, self.extensions):
+            try:
+                digest = self.store.resolve_hash(path, compute=False)
+            except OSError:
+                continue
+            if (digest is not None and self.store.get(digest) is not None
+                    and self.store.get_waveform(digest) is not None):
+                self.stats['skipped'] += 1
+                continue
+            yield path
+    
+    def run(self, root, progress=None):
+        """Analyze the library; progress(done, file_path, seconds) is called per file"""
+        started = time.perf_counter()
+        files = iter(self.pending_files(root))
+        limit = self.workers * self.IN_FLIGHT_PER_WORKER
+        done = 0
+        logger.info(f"Batch analysis of {root} with {self.workers} workers")
+        
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker) as pool:
+            in_flight = set()
+            exhausted = False
+            while in_flight or not exhausted:
+                while not exhausted and len(in_flight) < limit:
+                    path = next(files, None)
+                    if path is None:
+                        exhausted = True
+                        break
+                    in_flight.add(pool.submit(_analyze_file, path, self.store.db_path))
+                if not in_flight:
+                    break
+                
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    done += 1
+                    file_path, digest, analysis, waveform, seconds, error = future.result()
+                    self._record(done, file_path, digest, analysis, waveform, seconds, error,
+                                 started)
+                    if progress is not None:
+                        progress(done, file_path, seconds)
+        
+        self.stats['seconds'] = time.perf_counter() - started
+        logger.info(self.summary())
+        return self.stats
+    
+    def _record(self, done, file_path, digest, analysis, waveform, seconds, error, started):
+        if error is not None:
+            self.stats['failed'] += 1
+            logger.warning(f"[{done}] {file_path}: analysis failed after {seconds:.2f} s: {error}")
+            return
+        
+        if waveform is not None:
+            self.store.save_waveform(digest, waveform)
+        if analysis is not None:
+            self.store.save(analysis, file_path)
+            self.stats['analyzed'] += 1
+        else:
+            # Known content under a new path: only the path index needs updating
+            self.store.add_path(file_path, digest)
+            self.stats['cached'] += 1
+        rate = done / (time.perf_counter() - started)
+        logger.info(f"[{done}] {file_path}: {seconds:.2f} s ({rate:.2f} files/s overall)")
+    
+    def summary(self):
+        """One-line description of the run"""
+        s = self.stats
+        rate = (s['analyzed'] + s['cached']) / s['seconds'] if s['seconds'] else 0.0
+        return (f"Batch analysis: {s['analyzed']} analyzed, {s['cached']} already known, "
+                f"{s['skipped']} skipped, {s['failed']} failed in {s['seconds']:.1f} s "
+                f"({rate:.2f} files/s)")
@@ -0,0 +1,178 @@
+"""
+On-disk cache of decoded PCM, memory-mapped on reload
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CacheWriter:
+    """Streams decoded chunks into a cache file, committed only if complete"""
+    
+    def __init__(self, cache, key, file_path, sample_rate, channels):
+        self.cache = cache
+        self.key = key
+        self.file_path = file_path
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames = 0
+        self._tmp_path = cache.data_path(key) + '.part'
+        self._file = open(self._tmp_path, 'wb')
+    
+    def write(self, chunk):
+        """Append a (frames, channels) float32 chunk"""
+        self._file.write(memoryview(np.ascontiguousarray(chunk, dtype=np.float32)).cast('B'))
+        self.frames += len(chunk)
+    
+    def commit(self):
+        """Publish the file into the cache"""
+        self._file.close()
+        os.replace(self._tmp_path, self.cache.data_path(self.key))
+        self.cache.add(self.key, self.file_path, self.sample_rate, self.channels, self.frames)
+    
+    def abort(self):
+        """Discard a partial file (track ejected or seeked before fully decoded)"""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+class PCMCache:
+    """Raw float32 PCM files under ~/.violet_dj keyed by path, mtime and size
+    
+    Entries are evicted least-recently-used first once the total size exceeds
+    max_bytes.
+    """
+    
+    DEFAULT_DIR = os.path.expanduser('~/.violet_dj/pcm_cache')
+    DEFAULT_MAX_BYTES = 16 * 1024 ** 3
+    INDEX_NAME = 'index.json'
+    
+    def __init__(self, cache_dir=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._index = None
+    
+    @staticmethod
+    def key_for(file_path):
+        """Cache key for the current contents of file_path"""
+        path = os.path.abspath(file_path)
+        st = os.stat(path)
+        ident = f"{path}\0{st.st_mtime_ns}\0{st.st_size}"
+        return hashlib.sha1(ident.encode('utf-8')).hexdigest()
+    
+    def data_path(self, key):
+        """Path of the raw PCM file for key"""
+        return os.path.join(self.cache_dir, key + '.f32')
+    
+    def total_bytes(self):
+        """Bytes currently held by cached entries"""
+        with self._lock:
+            return sum(e['bytes'] for e in self._load_index().values())
+    
+    def lookup(self, file_path):
+        """Return (memmap of shape (frames, channels), sample_rate) or None"""
+        try:
+            key = self.key_for(file_path)
+        except OSError:
+            return None
+        
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            path = self.data_path(key)
+            if not os.path.exists(path):
+                del index[key]
+                self._save_index()
+                return None
+            entry['last_access'] = time.time()
+            self._save_index()
+        
+        data = np.memmap(path, dtype=np.float32, mode='r',
+                         shape=(entry['frames'], entry['channels']))
+        logger.info(f"PCM cache hit: {file_path}")
+        return data, entry['sample_rate']
+    
+    def writer(self, file_path, sample_rate, channels):
+        """Return a CacheWriter for file_path, or None if it cannot be cached"""
+        try:
+            key = self.key_for(file_path)
+            os.makedirs(self.cache_dir, exist_ok=True)
+            return CacheWriter(self, key, file_path, sample_rate, channels)
+        except OSError as e:
+            logger.warning(f"PCM cache unavailable: {e}")
+            return None
+    
+    def add(self, key, file_path, sample_rate, channels, frames):
+        """Register a completed cache file and evict down to max_bytes"""
+        with self._lock:
+            index = self._load_index()
+            index[key] = {
+                'path': os.path.abspath(file_path),
+                'sample_rate': sample_rate,
+                'channels': channels,
+                'frames': frames,
+                'bytes': frames * channels * 4,
+                'last_access': time.time(),
+            }
+            self._evict(keep=key)
+            self._save_index()
+        logger.info(f"PCM cached: {file_path} ({frames} frames)")
+    
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            index = self._load_index()
+            for key in list(index):
+                self._remove(key)
+            self._save_index()
+    
+    def _evict(self, keep=None):
+        index = self._index
+        total = sum(e['bytes'] for e in index.values())
+        for key in sorted(index, key=lambda k: index[k]['last_access']):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index[key]['bytes']
+            self._remove(key)
+    
+    def _remove(self, key):
+        self._index.pop(key, None)
+        try:
+            os.remove(self.data_path(key))
+        except OSError:
+            pass
+    
+    def _load_index(self):
+        if self._index is None:
+            try:
+                with open(os.path.join(self.cache_dir, self.INDEX_NAME)) as f:
+                    self._index = json.load(f)
+            except (OSError, ValueError):
+                self._index = {}
+        return self._index
+    
+    def _save_index(self):
+        path = os.path.join(self.cache_dir, self.INDEX_NAME)
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(path + '.tmp', 'w') as f:
+                json.dump(self._index, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            logger.warning(f"Failed to save PCM cache index: {e}")
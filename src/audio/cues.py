@@ -0,0 +1,72 @@
+"""
+Hot cues, slice points and the pre-decoded audio windows behind them
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+HOT_CUES = 16
+SLICES = 16
+
+# Colour of each hot cue slot, on screen and on RGB controller pads
+HOT_CUE_COLORS = [
+    "green", "teal", "sky", "blue", "amber", "orange", "rose", "purple",
+    "lime", "mint", "violet", "fuchsia", "yellow", "orange_red", "magenta", "pink",
+]
+
+# Audio kept decoded after every cue; covers the time a fresh decoder needs
+# to open and seek before it takes over
+PREROLL_SECONDS = 1.0
+
+
+class CuePoints:
+    """Per-track hot cues (fixed slots, None when unset) and slice points, in seconds"""
+    
+    def __init__(self, content_hash, hot_cues=None, slices=None):
+        self.content_hash = content_hash
+        self.hot_cues = list(hot_cues or [None] * HOT_CUES)
+        self.slices = list(slices or [])
+    
+    def positions(self):
+        """Every distinct cue and slice position"""
+        return sorted({p for p in self.hot_cues + self.slices if p is not None})
+    
+    def __repr__(self):
+        count = sum(p is not None for p in self.hot_cues)
+        return f"CuePoints({count} hot cues, {len(self.slices)} slices)"
+
+
+def beat_slices(beats, position, count=SLICES):
+    """count slice points on consecutive beats, starting at the beat nearest position"""
+    beats = np.asarray(beats, dtype=np.float64)
+    if not len(beats):
+        return []
+    first = int(np.clip(np.searchsorted(beats, position), 0, len(beats) - 1))
+    if first > 0 and position - beats[first - 1] < beats[first] - position:
+        first -= 1
+    return [float(b) for b in beats[first:first + count]]
+
+
+def read_windows(source, frames, length, channels=2):
+    """{frame: read-only (<=length, channels) array} decoded at each start frame
+    
+    Start frames are visited in order so a forward-only stream decoder is
+    never rewound between windows.
+    """
+    windows = {}
+    for frame in sorted(set(frames)):
+        data = np.zeros((length, channels), dtype=np.float32)
+        source.seek(frame)
+        count = 0
+        while count < length and not source.at_end:
+            got = source.read_into(data[count:])
+            if got == 0:
+                break
+            count += got
+        data = data[:count]
+        data.flags.writeable = False
+        windows[frame] = data
+    return windows
@@ -0,0 +1,28 @@
+"""Beat effects: block-processing units with preallocated delay lines"""
+
+from src.audio.effects.base import MAX_BLOCK, AudioEffect, DelayLine, EffectChain
+from src.audio.effects.delay import DelayEffect, EchoEffect
+from src.audio.effects.distortion import DistortionEffect
+from src.audio.effects.modulation import ChorusEffect, FlangerEffect, PhaserEffect
+from src.audio.effects.reverb import ReverbEffect
+
+# In Effects-tab order
+AVAILABLE_EFFECTS = {
+    'echo': EchoEffect,
+    'reverb': ReverbEffect,
+    'chorus': ChorusEffect,
+    'flanger': FlangerEffect,
+    'phaser': PhaserEffect,
+    'distortion': DistortionEffect,
+    'delay': DelayEffect,
+}
+
+
+def create_beat_fx_chain(sample_rate=48000, channels=2):
+    """Chain holding one (disabled) instance of every available effect
+    
+    Everything is allocated up front, so enabling effects mid-set only
+    flips a flag.
+    """
+    return EffectChain(cls(sample_rate=sample_rate, channels=channels)
+                       for cls in AVAILABLE_EFFECTS.values())
@@ -0,0 +1,190 @@
+"""
+Effect base class, circular delay lines and effect chains
+"""
+
+import numpy as np
+
+# Largest block the engine renders (AudioEngine.MAX_BLOCK_SIZE); scratch
+# buffers are sized for it once so processing never allocates
+MAX_BLOCK = 4096
+
+
+class DelayLine:
+    """Preallocated circular multichannel delay line
+    
+    Positions are absolute frame counts; the buffer keeps max_delay frames of
+    history plus one full block so a block can be read back after writing it.
+    """
+    
+    def __init__(self, max_delay, channels=2, modulated=False):
+        self.channels = channels
+        self.size = int(max_delay) + MAX_BLOCK + 2
+        self.buffer = np.zeros((self.size, channels), dtype=np.float32)
+        self.write_pos = 0
+        if modulated:
+            self._flat = self.buffer.reshape(-1)
+            self._pos = np.zeros((MAX_BLOCK, channels))
+            self._floor = np.zeros((MAX_BLOCK, channels))
+            self._index = np.zeros((MAX_BLOCK, channels), dtype=np.intp)
+            self._next = np.zeros((MAX_BLOCK, channels), dtype=np.float32)
+            self._lanes = np.arange(channels, dtype=np.intp)
+            self._ramp = np.arange(MAX_BLOCK, dtype=np.float64)[:, None]
+    
+    def clear(self):
+        """Silence the line"""
+        self.buffer.fill(0.0)
+    
+    def write(self, frames):
+        """Append frames at the write head"""
+        n = len(frames)
+        start = self.write_pos % self.size
+        first = min(n, self.size - start)
+        self.buffer[start:start + first] = frames[:first]
+        if first < n:
+            self.buffer[:n - first] = frames[first:]
+        self.write_pos += n
+    
+    def read(self, delay, out):
+        """Copy len(out) frames starting delay frames behind the write head"""
+        n = len(out)
+        start = (self.write_pos - delay) % self.size
+        first = min(n, self.size - start)
+        out[:first] = self.buffer[start:start + first]
+        if first < n:
+            out[first:] = self.buffer[:n - first]
+    
+    def read_modulated(self, delays, out):
+        """Linearly interpolated read of the block just written
+        
+        delays is a (frames, channels) float64 array of per-sample delays in
+        frames (each >= 1) measured from that sample's own write position.
+        """
+        n = len(out)
+        pos, floor, index, nxt = self._pos[:n], self._floor[:n], self._index[:n], self._next[:n]
+        np.subtract(self._ramp[:n], delays, out=pos)
+        pos += (self.write_pos - n) % self.size
+        np.floor(pos, out=floor)
+        np.subtract(pos, floor, out=pos)
+        
+        # Gather from the flattened buffer: frame * channels + lane
+        np.copyto(index, floor, casting='unsafe')
+        index %= self.size
+        index *= self.channels
+        index += self._lanes
+        np.take(self._flat, index, out=out, mode='wrap')
+        index += self.channels
+        np.take(self._flat, index, out=nxt, mode='wrap')
+        
+        nxt -= out
+        nxt *= pos
+        out += nxt
+
+
+class AudioEffect:
+    """Base class for block-processing effects
+    
+    Subclasses allocate their delay lines and scratch in prepare() and fill
+    the preallocated wet buffer in render(); process() then blends dry and
+    wet in place.
+    """
+    
+    # Beat fractions selectable with the Time slider when a BPM is set
+    BEAT_FRACTIONS = (1 / 16, 1 / 8, 1 / 4, 1 / 2, 3 / 4, 1.0, 2.0, 4.0)
+    
+    def __init__(self, name, sample_rate=48000, channels=2):
+        self.name = name
+        self.channels = channels
+        self.enabled = False
+        self.bpm = None
+        self.parameters = {}
+        self.wet = np.zeros((MAX_BLOCK, channels), dtype=np.float32)
+        self.add_parameter("mix", min=0, max=100, default=50)
+        self.add_parameter("time", min=0, max=100, default=30)
+        self.prepare(sample_rate)
+    
+    def add_parameter(self, name, min=0, max=100, default=50):
+        """Declare a parameter with its range and default"""
+        self.parameters[name] = {'min': min, 'max': max, 'value': default}
+    
+    def set_parameter(self, name, value):
+        """Set a parameter, clamped to its range"""
+        param = self.parameters[name]
+        param['value'] = max(param['min'], min(param['max'], value))
+    
+    def get_parameter(self, name):
+        """Current value of a parameter"""
+        return self.parameters[name]['value']
+    
+    def time_seconds(self, lo, hi):
+        """Map the Time slider to seconds: beat fractions when a BPM is set, else lo..hi"""
+        t = self.get_parameter("time") / 100.0
+        if self.bpm:
+            fraction = self.BEAT_FRACTIONS[int(round(t * (len(self.BEAT_FRACTIONS) - 1)))]
+            return min(hi, max(lo, 60.0 / self.bpm * fraction))
+        return lo * (hi / lo) ** t
+    
+    def prepare(self, sample_rate):
+        """Allocate state for sample_rate (never called per block)"""
+        self.sample_rate = sample_rate
+    
+    def process(self, audio_data, sample_rate):
+        """Process a (frames, channels) block in place and return it"""
+        if sample_rate != self.sample_rate:
+            self.prepare(sample_rate)
+        wet = self.wet[:len(audio_data)]
+        self.render(audio_data, wet)
+        
+        wet -= audio_data
+        wet *= self.get_parameter("mix") / 100.0
+        audio_data += wet
+        return audio_data
+    
+    def render(self, dry, wet):
+        """Write the fully wet signal for dry into wet"""
+        raise NotImplementedError
+    
+    def reset(self):
+        """Reset effect state (called on new track)"""
+
+
+class EffectChain:
+    """Ordered effects applied in place to one channel or the master bus"""
+    
+    def __init__(self, effects=()):
+        self.effects = list(effects)
+    
+    def add(self, effect):
+        """Append an effect to the chain"""
+        self.effects.append(effect)
+    
+    def get(self, name):
+        """Effect with the given name, or None"""
+        for effect in self.effects:
+            if effect.name == name:
+                return effect
+        return None
+    
+    def set_bpm(self, bpm):
+        """Tempo used for beat-synced effect times (None for free-running ms)"""
+        for effect in self.effects:
+            effect.bpm = bpm
+    
+    @property
+    def active(self):
+        """True when any effect is enabled"""
+        return any(effect.enabled for effect in self.effects)
+    
+    def process(self, block, sample_rate):
+        """Run every enabled effect over block in place"""
+        for effect in self.effects:
+            if effect.enabled:
+                out = effect.process(block, sample_rate)
+                if out is not block:
+                    # Third-party effects may return a new array instead
+                    block[:] = out
+        return block
+    
+    def reset(self):
+        """Clear every effect's tails"""
+        for effect in self.effects:
+            effect.reset()
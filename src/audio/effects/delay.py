@@ -0,0 +1,71 @@
+"""
+Echo and multi-tap delay
+"""
+
+import numpy as np
+
+from src.audio.effects.base import MAX_BLOCK, AudioEffect, DelayLine
+
+
+class EchoEffect(AudioEffect):
+    """Feedback echo (delay/repeat)"""
+    
+    MAX_SECONDS = 2.0
+    
+    def __init__(self, name="Echo", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+        self.add_parameter("feedback", min=0, max=100, default=50)
+    
+    def prepare(self, sample_rate):
+        super().prepare(sample_rate)
+        self.line = DelayLine(int(self.MAX_SECONDS * sample_rate), self.channels)
+        self._feed = np.zeros((MAX_BLOCK, self.channels), dtype=np.float32)
+    
+    def render(self, dry, wet):
+        delay = max(1, int(self.time_seconds(0.01, self.MAX_SECONDS) * self.sample_rate))
+        feedback = self.get_parameter("feedback") / 100.0 * 0.9
+        
+        # Reading `delay` behind the head is exact as long as a chunk never
+        # extends past the delay, so long blocks are split at the delay length
+        for start in range(0, len(dry), delay):
+            stop = min(start + delay, len(dry))
+            echo = wet[start:stop]
+            feed = self._feed[:stop - start]
+            self.line.read(delay, echo)
+            np.multiply(echo, feedback, out=feed)
+            feed += dry[start:stop]
+            self.line.write(feed)
+            echo += dry[start:stop]
+    
+    def reset(self):
+        self.line.clear()
+
+
+class DelayEffect(AudioEffect):
+    """Multi-tap delay: four taps spread across the delay time"""
+    
+    MAX_SECONDS = 2.0
+    TAPS = ((0.25, 0.7), (0.5, 0.5), (0.75, 0.35), (1.0, 0.25))
+    
+    def __init__(self, name="Delay", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+    
+    def prepare(self, sample_rate):
+        super().prepare(sample_rate)
+        self.line = DelayLine(int(self.MAX_SECONDS * sample_rate), self.channels)
+        self._tap = np.zeros((MAX_BLOCK, self.channels), dtype=np.float32)
+    
+    def render(self, dry, wet):
+        n = len(dry)
+        delay = self.time_seconds(0.02, self.MAX_SECONDS) * self.sample_rate
+        self.line.write(dry)
+        wet[:] = dry
+        tap = self._tap[:n]
+        for position, gain in self.TAPS:
+            # The block is already written, so look back an extra n frames
+            self.line.read(n + max(1, int(delay * position)), tap)
+            tap *= gain
+            wet += tap
+    
+    def reset(self):
+        self.line.clear()
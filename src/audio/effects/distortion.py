@@ -0,0 +1,26 @@
+"""
+Soft-clipping distortion
+"""
+
+import math
+
+import numpy as np
+
+from src.audio.effects.base import AudioEffect
+
+
+class DistortionEffect(AudioEffect):
+    """tanh overdrive (overdrive/clip); the Time slider sets the drive"""
+    
+    DRIVE = (1.0, 30.0)
+    
+    def __init__(self, name="Distortion", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+    
+    def render(self, dry, wet):
+        lo, hi = self.DRIVE
+        drive = lo * (hi / lo) ** (self.get_parameter("time") / 100.0)
+        np.multiply(dry, drive, out=wet)
+        np.tanh(wet, out=wet)
+        # Normalise so a full-scale input stays at full scale
+        wet *= 1.0 / math.tanh(drive)
@@ -0,0 +1,119 @@
+"""
+Chorus, flanger and phaser
+"""
+
+import math
+
+import numpy as np
+
+from src.audio.eq import sosfilt_inplace
+from src.audio.effects.base import MAX_BLOCK, AudioEffect, DelayLine
+
+
+class ChorusEffect(AudioEffect):
+    """LFO-modulated delay voice mixed with the dry signal (shimmer/width)
+    
+    Left and right LFOs run a quarter cycle apart for stereo width.
+    """
+    
+    CENTER_MS = 15.0
+    DEPTH_MS = 5.0
+    RATE_HZ = (0.1, 3.0)
+    
+    def __init__(self, name="Chorus", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+        self.add_parameter("depth", min=0, max=100, default=70)
+    
+    def prepare(self, sample_rate):
+        super().prepare(sample_rate)
+        max_delay = (self.CENTER_MS + self.DEPTH_MS) * sample_rate / 1000.0
+        self.line = DelayLine(int(max_delay) + 2, self.channels, modulated=True)
+        self.phase = 0.0
+        self._delays = np.zeros((MAX_BLOCK, self.channels))
+        self._offsets = np.arange(self.channels) * (math.pi / 2)
+        self._steps = np.arange(MAX_BLOCK, dtype=np.float64)[:, None]
+    
+    def render(self, dry, wet):
+        n = len(dry)
+        rate = self.RATE_HZ[0] * (self.RATE_HZ[1] / self.RATE_HZ[0]) ** (self.get_parameter("time") / 100.0)
+        increment = 2.0 * math.pi * rate / self.sample_rate
+        ms = self.sample_rate / 1000.0
+        depth = self.DEPTH_MS * ms * self.get_parameter("depth") / 100.0
+        
+        delays = self._delays[:n]
+        np.multiply(self._steps[:n], increment, out=delays)
+        delays += self._offsets
+        delays += self.phase
+        np.sin(delays, out=delays)
+        delays *= depth
+        delays += self.CENTER_MS * ms
+        self.phase = (self.phase + n * increment) % (2.0 * math.pi)
+        
+        self.line.write(dry)
+        self.line.read_modulated(delays, wet)
+        wet += dry
+    
+    def reset(self):
+        self.line.clear()
+
+
+class FlangerEffect(ChorusEffect):
+    """Short modulated comb (sweep/comb)
+    
+    Runs without feedback: with sub-millisecond delays a feedback path would
+    need per-sample recursion, which cannot be vectorized per block.
+    """
+    
+    CENTER_MS = 2.5
+    DEPTH_MS = 2.0
+    RATE_HZ = (0.05, 2.0)
+    
+    def __init__(self, name="Flanger", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+
+
+class PhaserEffect(AudioEffect):
+    """Four first-order all-pass stages swept by an LFO (phase shift)
+    
+    The all-pass coefficient is updated once per block, which is far faster
+    than the sweep itself.
+    """
+    
+    STAGES = 4
+    SWEEP_HZ = (200.0, 2000.0)
+    RATE_HZ = (0.05, 2.0)
+    
+    def __init__(self, name="Phaser", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+    
+    def prepare(self, sample_rate):
+        super().prepare(sample_rate)
+        self.phase = 0.0
+        # First-order all-pass (a + z^-1) / (1 + a z^-1) as SOS rows
+        self.sos = np.zeros((self.STAGES, 6))
+        self.sos[:, 1] = 1.0
+        self.sos[:, 3] = 1.0
+        self.zi = np.zeros((self.channels, self.STAGES, 2))
+        self._work = np.zeros(self.channels * MAX_BLOCK)
+    
+    def render(self, dry, wet):
+        n = len(dry)
+        rate = self.RATE_HZ[0] * (self.RATE_HZ[1] / self.RATE_HZ[0]) ** (self.get_parameter("time") / 100.0)
+        lo, hi = self.SWEEP_HZ
+        sweep = 0.5 + 0.5 * math.sin(self.phase)
+        self.phase = (self.phase + 2.0 * math.pi * rate * n / self.sample_rate) % (2.0 * math.pi)
+        
+        t = math.tan(math.pi * lo * (hi / lo) ** sweep / self.sample_rate)
+        a = (t - 1.0) / (t + 1.0)
+        self.sos[:, 0] = a
+        self.sos[:, 4] = a
+        
+        # The in-place kernel needs a C-contiguous (channels, frames) array
+        work = self._work[:self.channels * n].reshape(self.channels, n)
+        work[:] = dry.T
+        sosfilt_inplace(self.sos, work, self.zi)
+        wet[:] = work.T
+        wet += dry
+    
+    def reset(self):
+        self.zi.fill(0.0)
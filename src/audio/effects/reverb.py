@@ -0,0 +1,92 @@
+"""
+Schroeder/Freeverb-style reverb
+"""
+
+import numpy as np
+
+from src.audio.eq import one_pole_lowpass, sosfilt_inplace
+from src.audio.effects.base import MAX_BLOCK, AudioEffect, DelayLine
+
+
+class ReverbEffect(AudioEffect):
+    """Four parallel feedback combs into two series all-pass diffusers (room/space)
+    
+    Every comb and all-pass delay is longer than a typical block, and longer
+    blocks are split at the delay length, so each stage processes whole
+    chunks with vectorized reads and writes. A fixed low-pass on the tail
+    stands in for per-comb damping.
+    """
+    
+    # Freeverb tunings at 44.1 kHz, rescaled to the running sample rate
+    COMB_TUNING = (1116, 1188, 1277, 1356)
+    ALLPASS_TUNING = (556, 441)
+    ALLPASS_GAIN = 0.5
+    DAMP_HZ = 6000.0
+    
+    def __init__(self, name="Reverb", sample_rate=48000, channels=2):
+        super().__init__(name, sample_rate, channels)
+    
+    def prepare(self, sample_rate):
+        super().prepare(sample_rate)
+        scale = sample_rate / 44100.0
+        self.comb_delays = [int(d * scale) for d in self.COMB_TUNING]
+        self.allpass_delays = [int(d * scale) for d in self.ALLPASS_TUNING]
+        self.combs = [DelayLine(d, self.channels) for d in self.comb_delays]
+        self.allpasses = [DelayLine(d, self.channels) for d in self.allpass_delays]
+        
+        self.damp_sos = np.array([one_pole_lowpass(self.DAMP_HZ, sample_rate)])
+        self.damp_zi = np.zeros((self.channels, 1, 2))
+        self._work = np.zeros(self.channels * MAX_BLOCK)
+        self._a = np.zeros((MAX_BLOCK, self.channels), dtype=np.float32)
+        self._b = np.zeros((MAX_BLOCK, self.channels), dtype=np.float32)
+        self._c = np.zeros((MAX_BLOCK, self.channels), dtype=np.float32)
+    
+    def render(self, dry, wet):
+        n = len(dry)
+        feedback = 0.7 + 0.28 * self.get_parameter("time") / 100.0
+        tail = self._a[:n]
+        tail.fill(0.0)
+        for line, delay in zip(self.combs, self.comb_delays):
+            self._comb(line, delay, feedback, dry, tail)
+        tail *= 1.0 / len(self.combs)
+        
+        for line, delay in zip(self.allpasses, self.allpass_delays):
+            self._allpass(line, delay, tail)
+        
+        work = self._work[:self.channels * n].reshape(self.channels, n)
+        work[:] = tail.T
+        sosfilt_inplace(self.damp_sos, work, self.damp_zi)
+        wet[:] = work.T
+        wet += dry
+    
+    def _comb(self, line, delay, feedback, x, out):
+        """out += comb(x) where v[n] = x[n] + g * v[n - D]"""
+        for start in range(0, len(x), delay):
+            stop = min(start + delay, len(x))
+            delayed = self._b[:stop - start]
+            line.read(delay, delayed)
+            out[start:stop] += delayed
+            delayed *= feedback
+            delayed += x[start:stop]
+            line.write(delayed)
+    
+    def _allpass(self, line, delay, x):
+        """In place: v[n] = x[n] + g * v[n - D]; y[n] = v[n - D] - g * v[n]"""
+        g = self.ALLPASS_GAIN
+        for start in range(0, len(x), delay):
+            stop = min(start + delay, len(x))
+            seg = x[start:stop]
+            delayed = self._b[:stop - start]
+            v = self._c[:stop - start]
+            line.read(delay, delayed)
+            np.multiply(delayed, g, out=v)
+            v += seg
+            line.write(v)
+            v *= -g
+            v += delayed
+            seg[:] = v
+    
+    def reset(self):
+        for line in self.combs + self.allpasses:
+            line.clear()
+        self.damp_zi.fill(0.0)
@@ -3,9 +3,304 @@ Audio processing, codec support, and playback
 """
 
 import logging
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from src import instrumentation
+from src.audio.analysis import AnalysisStore, analyze_track
+from src.audio.batch import file_peaks, init_worker
+from src.audio.cache import PCMCache
+from src.audio.cues import PREROLL_SECONDS, beat_slices, read_windows
+from src.audio.decoder import open_decoder
+from src.audio.effects import create_beat_fx_chain
+from src.audio.eq import ChannelEQ, preload as preload_filters
+from src.audio.jog import JogIntegrator
+from src.audio.loop import LOOP_BEATS, LoopPlayer, LoopRegion, quantize
+from src.audio.mixer import MixerBus
+from src.audio.output import open_backend
+from src.audio.ringbuffer import RingBuffer
+from src.audio.sampler import SampleBank, Sampler
+from src.audio.seektable import load_seek_table
+from src.audio.sync import SyncEngine
+from src.audio.timestretch import TimeStretcher, preload as preload_stretch
+from src.audio.waveform import compute_peaks
 
 logger = logging.getLogger(__name__)
 
+
+class RenderStats:
+    """Timing of the render callback measured against its per-block deadline"""
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Clear all counters"""
+        self.blocks = 0
+        self.late_blocks = 0
+        self.deadline_ms = 0.0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.total_ms = 0.0
+    
+    def record(self, elapsed, deadline):
+        """Record one rendered block (both arguments in seconds)"""
+        elapsed_ms = elapsed * 1000.0
+        self.blocks += 1
+        self.deadline_ms = deadline * 1000.0
+        self.last_ms = elapsed_ms
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.max_ms:
+            self.max_ms = elapsed_ms
+        if elapsed > deadline:
+            self.late_blocks += 1
+    
+    def as_dict(self):
+        """Return a snapshot suitable for display or logging"""
+        mean_ms = self.total_ms / self.blocks if self.blocks else 0.0
+        return {
+            'blocks': self.blocks,
+            'late_blocks': self.late_blocks,
+            'deadline_ms': self.deadline_ms,
+            'last_ms': self.last_ms,
+            'mean_ms': mean_ms,
+            'max_ms': self.max_ms,
+            'load': mean_ms / self.deadline_ms if self.deadline_ms else 0.0,
+        }
+
+
+class ArraySource:
+    """Serves frames from an in-memory (frames, channels) array"""
+    
+    def __init__(self, data):
+        self.data = data
+        self.position = 0
+    
+    def read_into(self, out):
+        """Copy up to len(out) frames into out and return the count written"""
+        frames = min(len(out), len(self.data) - self.position)
+        if frames > 0:
+            out[:frames] = self.data[self.position:self.position + frames]
+            self.position += frames
+        return max(frames, 0)
+    
+    @property
+    def at_end(self):
+        """True once every frame has been read"""
+        return self.position >= len(self.data)
+    
+    def seek(self, frame):
+        """Move the read position to frame"""
+        self.position = max(0, min(frame, len(self.data)))
+    
+    def close(self):
+        """Nothing to release for in-memory data"""
+
+
+class TrackFeeder:
+    """Producer thread keeping a deck's ring buffer filled ahead of the playhead
+    
+    An optional sink (a PCM CacheWriter) receives every decoded chunk and is
+    committed once the source has been read to the end. Given an opener
+    instead of a source, the decoder is opened and seeked to start_frame
+    on the feeder thread, so a cue jump never waits on it.
+    """
+    
+    CHUNK_FRAMES = 4096
+    POLL_INTERVAL = 0.002
+    
+    def __init__(self, source, ring, sink=None, name="violet-track-feeder",
+                 opener=None, start_frame=0):
+        self.source = source
+        self.opener = opener
+        self.start_frame = start_frame
+        self.ring = ring
+        self.sink = sink
+        self.scratch = np.zeros((self.CHUNK_FRAMES, ring.channels), dtype=ring.buffer.dtype)
+        self._running = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+    
+    def prime(self, frames):
+        """Decode up to frames synchronously so the deck can start immediately"""
+        self._open()
+        while self.ring.available() < frames and self._fill_chunk():
+            pass
+    
+    def start(self):
+        """Start filling the ring"""
+        self._running = True
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the producer thread and close the source"""
+        self._running = False
+        if self._thread.is_alive():
+            self._thread.join()
+        if self.source is not None:
+            self.source.close()
+        if self.sink is not None:
+            self.sink.abort()
+            self.sink = None
+    
+    def _open(self):
+        if self.source is None:
+            self.source = self.opener()
+            if self.start_frame:
+                self.source.seek(self.start_frame)
+    
+    def _fill_chunk(self):
+        """Decode one bounded chunk into the ring; False once the source is done"""
+        ring = self.ring
+        if ring.closed:
+            return False
+        space = min(ring.free(), self.CHUNK_FRAMES)
+        if space <= 0:
+            return True
+        
+        chunk = self.scratch[:space]
+        frames = self.source.read_into(chunk)
+        if frames > 0:
+            ring.write(chunk[:frames])
+            if self.sink is not None:
+                self.sink.write(chunk[:frames])
+        if self.source.at_end:
+            ring.close()
+            if self.sink is not None:
+                self.sink.commit()
+                self.sink = None
+            return False
+        return True
+    
+    def _run(self):
+        ring = self.ring
+        try:
+            self._open()
+        except Exception as e:
+            logger.error(f"Could not reopen track for a jump: {e}")
+            ring.close()
+            return
+        while self._running:
+            if ring.free() < self.CHUNK_FRAMES:
+                time.sleep(self.POLL_INTERVAL)
+                continue
+            if not self._fill_chunk():
+                break
+
+
+class Deck:
+    """A single playback deck rendering fixed-size blocks
+    
+    The block is a view into the mixer's input array, so decks render in
+    place with no copy into the mix. Cue jumps hand over a new source and
+    position that the render thread swaps in at the start of a block.
+    Reads go through the deck's LoopPlayer, which passes the source through
+    until a loop is engaged.
+    """
+    
+    def __init__(self, index, block, sample_rate=48000):
+        self.index = index
+        self.track = None
+        self.source = None
+        self.feeder = None
+        self.analysis = None
+        self.waveform = None
+        self.cues = None
+        self.windows = {}
+        self.pcm = None
+        self.is_playing = False
+        self.position = 0
+        self._jump = None
+        self.block = block
+        self.stretch = TimeStretcher(block.shape[1])
+        self.jog = JogIntegrator(sample_rate)
+        self.loop = LoopPlayer(sample_rate, block.shape[1])
+    
+    def attach(self, track, source, feeder=None):
+        """Replace the deck's source, stopping any previous producer"""
+        self.detach()
+        self.feeder = feeder
+        self.analysis = None
+        self.waveform = None
+        self.cues = None
+        self.windows = {}
+        self.pcm = None
+        self.position = 0
+        self._jump = None
+        self.stretch.reset()
+        self.track = track
+        self.source = source
+        self.loop.region = None
+        self.loop.reset(source, 0)
+        if feeder is not None:
+            feeder.start()
+    
+    def detach(self):
+        """Stop playback and release the current source"""
+        self.is_playing = False
+        self.source = None
+        self.track = None
+        self.position = 0
+        if self.feeder is not None:
+            self.feeder.stop()
+            self.feeder = None
+    
+    def cut(self, source, feeder, position, loop=None):
+        """Switch to a new source at position from the next block (cue jumps)
+        
+        A loop region given here is engaged in the same block (reloop).
+        """
+        old = self.feeder
+        self.feeder = feeder
+        feeder.start()
+        self._jump = (source, position, loop)
+        if old is not None:
+            # The old decoder may be mid-seek; don't hold up the caller
+            threading.Thread(target=old.stop, name=f"violet-deck{self.index + 1}-retire",
+                             daemon=True).start()
+    
+    def bind(self, block):
+        """Render into a new block (never called from the render thread)"""
+        self.block = block
+    
+    def render(self):
+        """Fill the preallocated block with the next frames, padding with silence"""
+        block = self.block
+        jump = self._jump
+        if jump is not None:
+            self._jump = None
+            self.source, self.position, region = jump
+            self.loop.reset(self.source, self.position, region)
+            self.stretch.reset()
+        if not self.is_playing or self.source is None:
+            block.fill(0.0)
+            return block
+        
+        stretch = self.stretch
+        loop = self.loop
+        self.jog.apply(stretch, len(block))
+        if stretch.engaged:
+            frames = stretch.read_into(loop, block)
+            ended = stretch.at_end(loop)
+            advance = stretch.advance
+        else:
+            frames = loop.read_into(block)
+            stretch.observe(block[:frames])
+            ended = loop.at_end
+            advance = frames
+        if frames < len(block):
+            block[frames:].fill(0.0)
+            if ended:
+                self.is_playing = False
+        # Track position in source frames, whatever the playback speed
+        self.position += advance + loop.take_offset()
+        return block
+
+
 class AudioEngine:
     """Main audio processing engine"""
     
@@ -25,45 +320,657 @@ class AudioEngine:
         'pulseaudio': 'PulseAudio (Recommended)',
         'alsa': 'ALSA (Advanced Linux Sound Architecture)',
         'jack': 'JACK (Jack Audio Connection Kit)',
+        'null': 'Null (no output)',
+        'file': 'WAV File',
     }
+    # Tried in order when no backend has been chosen
+    DEFAULT_BACKENDS = ('pulseaudio', 'alsa', 'null')
     
-    def __init__(self):
+    DECK_COUNT = 4
+    CHANNELS = 2
+    DEFAULT_SAMPLE_RATE = 48000
+    DEFAULT_BLOCK_SIZE = 256
+    MIN_BLOCK_SIZE = 64
+    MAX_BLOCK_SIZE = 4096
+    RING_SECONDS = 2.0
+    FX_MASTER = 'master'
+    
+    def __init__(self, sample_rate=DEFAULT_SAMPLE_RATE, block_size=DEFAULT_BLOCK_SIZE,
+                 pcm_cache=None, analysis_store=None):
         logger.info("Initializing Audio Engine")
+        self.pcm_cache = pcm_cache if pcm_cache is not None else PCMCache()
+        self.analysis_store = analysis_store if analysis_store is not None else AnalysisStore()
         self.backend = None
-        self.is_playing = False
-        self.current_track = None
+        self.output = None
         self.devices = []
+        self.sample_rate = sample_rate
+        self.block_size = self._check_block_size(block_size)
+        self.mixer = MixerBus(self.DECK_COUNT, self.block_size, self.CHANNELS)
+        self.decks = [Deck(i, self.mixer.inputs[i], sample_rate) for i in range(self.DECK_COUNT)]
+        self.channel_eqs = [ChannelEQ(sample_rate, self.CHANNELS) for _ in range(self.DECK_COUNT)]
+        self.beat_fx = create_beat_fx_chain(sample_rate, self.CHANNELS)
+        self.sync = SyncEngine(self.decks, sample_rate)
+        self.sampler = Sampler(sample_rate, self.CHANNELS)
+        self.fx_target = self.FX_MASTER
+        self.stats = RenderStats()
+        self.output_callback = None
+        self.output_blocking = False
+        # Set by controller input (perf_counter_ns of the oldest unrendered
+        # change); the next block records how long it waited
+        self.control_stamp = None
+        self.control_latency = None
+        self.instruments = instrumentation.active()
+        self._render_thread = None
+        self._running = False
+        # Cue saves and jump priming run here, in order, so a controller
+        # callback never waits on SQLite or a decoder
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='violet-engine-worker')
+        self._analysis_pool = None
+        self._cuts = [0] * self.DECK_COUNT
+    
+    @property
+    def is_playing(self):
+        """True while any deck is playing"""
+        return any(deck.is_playing for deck in self.decks)
+    
+    @property
+    def current_track(self):
+        """Track loaded on the first deck"""
+        return self.decks[0].track
+    
+    def _check_block_size(self, frames):
+        frames = int(frames)
+        if not self.MIN_BLOCK_SIZE <= frames <= self.MAX_BLOCK_SIZE:
+            raise ValueError(
+                f"Block size must be {self.MIN_BLOCK_SIZE}-{self.MAX_BLOCK_SIZE} frames, got {frames}")
+        return frames
     
-    def init_backend(self, backend_name):
-        """Initialize audio backend"""
+    def preload(self):
+        """Load deferred DSP libraries on a background thread
+        
+        scipy.signal is only needed once an EQ or filter effect is engaged,
+        scipy.fft once a deck is key-locked off its original tempo; loading
+        them here after startup keeps them off both the startup path and the
+        render thread.
+        """
+        def run():
+            preload_filters()
+            preload_stretch()
+        
+        threading.Thread(target=run, name='dsp-preload', daemon=True).start()
+    
+    def init_backend(self, backend_name, **options):
+        """Open an output backend and send every rendered block to it
+        
+        options (device, sample_format) go to the backend. The previous
+        output is closed first, as devices may only be opened once; if the
+        new one fails (OSError, or ImportError for a missing binding) the
+        engine is left without output.
+        """
         if backend_name not in self.AUDIO_BACKENDS:
             raise ValueError(f"Unknown backend: {backend_name}")
         
-        self.backend = backend_name
-        logger.info(f"Audio backend initialized: {backend_name}")
+        was_running = self._running
+        if was_running:
+            self.stop_render()
+        self._close_output()
+        try:
+            output = open_backend(backend_name, self.sample_rate, self.CHANNELS,
+                                  self.block_size, **options)
+            self.output = output
+            self.backend = backend_name
+            self.set_output(output.write, output.blocking)
+        finally:
+            if was_running:
+                self.start_render()
+        logger.info(f"Audio backend initialized: {output}")
+    
+    def init_default_backend(self):
+        """Open the first of DEFAULT_BACKENDS that works, returning its name"""
+        for name in self.DEFAULT_BACKENDS:
+            try:
+                self.init_backend(name)
+                return name
+            except (ImportError, OSError) as e:
+                logger.info(f"{self.AUDIO_BACKENDS[name]} output unavailable: {e}")
+        return None
+    
+    def _close_output(self):
+        output, self.output = self.output, None
+        self.backend = None
+        self.set_output(None)
+        if output is not None:
+            output.close()
     
-    def load_track(self, file_path):
-        """Load an audio track"""
+    def set_output(self, callback, blocking=False):
+        """Set the callable that receives each rendered master block
+        
+        A blocking callback paces the render thread itself (e.g. a device
+        write); otherwise the engine sleeps until each block's deadline.
+        """
+        self.output_callback = callback
+        self.output_blocking = blocking
+    
+    def set_block_size(self, frames):
+        """Change the render block size (e.g. from the Settings tab)"""
+        frames = self._check_block_size(frames)
+        if frames == self.block_size:
+            return
+        
+        was_running = self._running
+        if was_running:
+            self.stop_render()
+        self.block_size = frames
+        self.mixer = self._resize_mixer(self.mixer, frames)
+        for deck in self.decks:
+            deck.bind(self.mixer.inputs[deck.index])
+        if self.output is not None:
+            try:
+                self.output.reopen(frames)
+            except OSError as e:
+                logger.error(f"Could not reopen {self.backend} output: {e}")
+                self._close_output()
+        if was_running:
+            self.start_render()
+        logger.info(f"Audio block size set to {frames} frames")
+    
+    def set_tempo(self, deck, percent):
+        """Tempo fader: play a deck percent faster (negative for slower)"""
+        self.decks[deck].stretch.set_ratio(1.0 + percent / 100.0)
+    
+    def set_key_lock(self, deck, enabled):
+        """Master tempo: keep a deck's pitch when its tempo changes"""
+        self.decks[deck].stretch.set_key_lock(enabled)
+    
+    def set_sync(self, deck, enabled):
+        """SYNC: lock a deck's tempo and beat phase to the tempo master"""
+        self.sync.set_sync(deck, enabled)
+    
+    def set_tempo_master(self, deck):
+        """MASTER: make a deck the tempo master (None to release)"""
+        self.sync.set_master(deck)
+    
+    def set_fx_target(self, target):
+        """Insert the beat FX chain on a channel (0-3) or on the master (FX_MASTER)"""
+        if target != self.FX_MASTER and not 0 <= target < self.DECK_COUNT:
+            raise ValueError(f"Unknown FX target: {target}")
+        if target != self.fx_target:
+            self.beat_fx.reset()
+            self.fx_target = target
+            logger.info(f"Beat FX assigned to {target}")
+    
+    def _resize_mixer(self, old, frames):
+        mixer = MixerBus(self.DECK_COUNT, frames, self.CHANNELS)
+        for name in ('trim', 'fader', 'cue_on', 'assign', 'crossfader_gains'):
+            getattr(mixer, name)[:] = getattr(old, name)
+        for name in ('crossfader', 'crossfader_curve', 'master_level',
+                     'headphone_mix', 'headphone_level'):
+            setattr(mixer, name, getattr(old, name))
+        return mixer
+    
+    def load_track(self, file_path, deck=0):
+        """Load an audio track
+        
+        Previously decoded tracks are memory-mapped from the PCM cache.
+        Otherwise only the header is parsed here; a feeder thread decodes the
+        rest in bounded chunks ahead of the playhead and writes it through to
+        the cache. Tracks are resampled to the engine rate as they are
+        decoded, so the cache, cue windows and playhead all count engine
+        frames.
+        """
         logger.info(f"Loading track: {file_path}")
-        self.current_track = file_path
+        sink = None
+        cached = self.pcm_cache.lookup(file_path) if self.pcm_cache else None
+        if cached is not None and cached[1] != self.sample_rate:
+            # Decoded for another engine rate; replaced by this decode
+            cached = None
+        if cached is not None:
+            data = cached[0]
+            source = ArraySource(data)
+        else:
+            data = None
+            source = open_decoder(file_path, self.sample_rate)
+            if self.pcm_cache:
+                sink = self.pcm_cache.writer(file_path, self.sample_rate, self.CHANNELS)
+        
+        # Even memory-mapped data goes through the feeder so page faults land
+        # on the feeder thread rather than the render callback
+        ring = RingBuffer(int(self.sample_rate * self.RING_SECONDS), self.CHANNELS)
+        feeder = TrackFeeder(source, ring, sink, name=f"violet-deck{deck + 1}-feeder")
+        feeder.prime(self.block_size * 4)
+        target = self.decks[deck]
+        target.attach(file_path, ring, feeder)
+        target.pcm = data
+        if data is None:
+            # Scan compressed files for their seek table before the first cue jump needs it
+            threading.Thread(target=load_seek_table, args=(file_path,),
+                             name=f"violet-deck{deck + 1}-seek-table", daemon=True).start()
+        self._load_analysis(target, file_path)
+    
+    def load_sample_bank(self, source):
+        """Decode a directory (or list) of pad samples and hand them to the sampler
+        
+        Runs on the caller's thread; the render thread only ever sees the
+        finished bank.
+        """
+        if isinstance(source, str):
+            bank = SampleBank.from_directory(source, self.sample_rate, self.CHANNELS)
+        else:
+            bank = SampleBank.from_files(list(source), self.sample_rate, self.CHANNELS)
+        self.sampler.load_bank(bank)
+        return bank
+    
+    def _load_analysis(self, deck, file_path):
+        """Attach stored analysis and waveform, computing missing ones in the background
+        
+        The decode and librosa work runs in a worker process, so it never
+        holds the GIL against the render thread; a thread here only waits
+        for each result and stores it.
+        """
+        store = self.analysis_store
+        try:
+            digest = store.resolve_hash(file_path, compute=False)
+        except OSError:
+            return
+        if digest is not None:
+            self._load_cues(deck, file_path, digest)
+            deck.analysis = store.get(digest)
+            deck.waveform = store.get_waveform(digest)
+            if deck.analysis is not None and deck.waveform is not None:
+                return
+        
+        if self._analysis_pool is None:
+            # Spawned, not forked: this process runs the render, MIDI and UI threads
+            self._analysis_pool = ProcessPoolExecutor(
+                max_workers=1, mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker)
+        pool = self._analysis_pool
+        
+        def run():
+            try:
+                digest = store.resolve_hash(file_path)
+                if deck.track == file_path and deck.cues is None:
+                    self._load_cues(deck, file_path, digest)
+                # Peaks first: one decode pass, while analysis takes much longer
+                waveform = store.get_waveform(digest)
+                if waveform is None:
+                    waveform = pool.submit(file_peaks, file_path).result()
+                    store.save_waveform(digest, waveform)
+                if deck.track == file_path:
+                    deck.waveform = waveform
+                analysis = store.get(digest)
+                if analysis is None:
+                    analysis = pool.submit(analyze_track, file_path, digest).result()
+                    store.save(analysis, file_path)
+            except BrokenProcessPool as e:
+                logger.warning(f"Analysis worker died on {file_path}: {e}")
+                if self._analysis_pool is pool:
+                    self._analysis_pool = None
+                return
+            except Exception as e:
+                logger.warning(f"Track analysis failed for {file_path}: {e}")
+                return
+            if deck.track == file_path:
+                deck.analysis = analysis
+        
+        threading.Thread(target=run, name=f"violet-deck{deck.index + 1}-analysis",
+                         daemon=True).start()
+    
+    # ── Hot cues and slices ─────────────────────────────────────────────────
+    def _load_cues(self, deck, file_path, digest):
+        deck.cues = self.analysis_store.get_cues(digest)
+        self._preroll(deck, file_path, deck.cues.positions())
+    
+    def _preroll(self, deck, file_path, positions):
+        """Decode PREROLL_SECONDS after each position in the background"""
+        frames = [int(round(p * self.sample_rate)) for p in positions]
+        frames = [f for f in frames if f not in deck.windows]
+        if not frames:
+            return
+        length = int(self.sample_rate * PREROLL_SECONDS)
+        pcm = deck.pcm
+        
+        def run():
+            source = None
+            try:
+                if pcm is not None:
+                    source = ArraySource(pcm)
+                else:
+                    source = open_decoder(file_path, self.sample_rate)
+                windows = read_windows(source, frames, length, self.CHANNELS)
+            except Exception as e:
+                logger.warning(f"Cue pre-roll failed for {file_path}: {e}")
+                return
+            finally:
+                if source is not None:
+                    source.close()
+            if deck.track == file_path:
+                # Copy-on-write so the UI thread never sees a dict mid-update
+                deck.windows = {**deck.windows, **windows}
+        
+        threading.Thread(target=run, name=f"violet-deck{deck.index + 1}-preroll",
+                         daemon=True).start()
+    
+    def _save_cues(self, deck):
+        self._worker.submit(self._write_cues, deck.cues)
+    
+    def _write_cues(self, cues):
+        try:
+            self.analysis_store.save_cues(cues)
+        except Exception as e:
+            logger.warning(f"Could not save cue points: {e}")
+    
+    def set_hot_cue(self, deck=0, slot=0, seconds=None):
+        """Store a hot cue (at the playhead unless seconds is given); False if not ready"""
+        target = self.decks[deck]
+        if target.cues is None:
+            return False
+        if seconds is None:
+            seconds = target.position / self.sample_rate
+        target.cues.hot_cues[slot] = seconds
+        self._save_cues(target)
+        self._preroll(target, target.track, [seconds])
+        return True
+    
+    def clear_hot_cue(self, deck=0, slot=0):
+        """Delete a hot cue"""
+        target = self.decks[deck]
+        if target.cues is not None and target.cues.hot_cues[slot] is not None:
+            target.cues.hot_cues[slot] = None
+            self._save_cues(target)
+    
+    def jump_to_cue(self, deck=0, slot=0):
+        """Jump to a hot cue; False if the slot is empty"""
+        target = self.decks[deck]
+        if target.cues is None or target.cues.hot_cues[slot] is None:
+            return False
+        self.seek(deck, target.cues.hot_cues[slot])
+        return True
     
-    def play(self):
+    def set_slices(self, deck=0, positions=None):
+        """Store slice points; by default one per beat from the beat nearest the playhead"""
+        target = self.decks[deck]
+        if target.cues is None:
+            return False
+        if positions is None:
+            if target.analysis is None:
+                return False
+            positions = beat_slices(target.analysis.beats, target.position / self.sample_rate)
+        target.cues.slices = list(positions)
+        self._save_cues(target)
+        self._preroll(target, target.track, target.cues.slices)
+        return True
+    
+    def jump_to_slice(self, deck=0, slot=0):
+        """Jump to a slice point, slicing from the playhead first if none are stored"""
+        target = self.decks[deck]
+        if target.cues is not None and not target.cues.slices:
+            self.set_slices(deck)
+        if target.cues is None or not 0 <= slot < len(target.cues.slices):
+            return False
+        self.seek(deck, target.cues.slices[slot])
+        return True
+    
+    def seek(self, deck=0, seconds=0.0):
+        """Move a deck's playhead
+        
+        Positions with a pre-decoded window start playing from it at the
+        next block while a fresh decoder opens and seeks behind it on the
+        feeder thread. Anywhere else the first frames are decoded on the
+        engine's worker and the deck keeps playing until they are ready, so
+        a controller callback returns at once.
+        """
+        self._cut(deck, max(0, int(round(seconds * self.sample_rate))))
+    
+    def _cut(self, deck, frame, loop=None):
+        target = self.decks[deck]
+        file_path = target.track
+        if file_path is None:
+            return
+        self._cuts[deck] += 1
+        ring = RingBuffer(int(self.sample_rate * self.RING_SECONDS), self.CHANNELS)
+        window = target.windows.get(frame)
+        start = frame + (ring.write(window) if window is not None else 0)
+        name = f"violet-deck{deck + 1}-feeder"
+        if target.pcm is not None:
+            source = ArraySource(target.pcm)
+            source.seek(start)
+            feeder = TrackFeeder(source, ring, name=name)
+        else:
+            feeder = TrackFeeder(None, ring, name=name, start_frame=start,
+                                 opener=lambda: open_decoder(file_path, self.sample_rate))
+        if window is None and (loop is None or not loop.complete):
+            # A complete reloop plays from memory; the source is only needed on
+            # exit. Anything else decodes its first frames on the worker while
+            # the deck plays on, then cuts.
+            self._worker.submit(self._primed_cut, target, self._cuts[deck], file_path,
+                                ring, feeder, frame, loop)
+            return
+        target.cut(ring, feeder, frame, loop)
+    
+    def _primed_cut(self, target, serial, file_path, ring, feeder, frame, loop):
+        try:
+            feeder.prime(self.block_size * 4)
+        except Exception as e:
+            logger.error(f"Could not reopen track for a jump: {e}")
+            feeder.stop()
+            return
+        if self._cuts[target.index] != serial or target.track != file_path:
+            # Superseded by a later jump or another track
+            feeder.stop()
+            return
+        target.cut(ring, feeder, frame, loop)
+    
+    # ── Loops ───────────────────────────────────────────────────────────────
+    def set_loop(self, deck=0, beats=None, roll=False):
+        """Engage a beat loop (or, held, a loop roll) quantized to the beat grid
+        
+        Loops of a beat or more start on the nearest beat, shorter ones on
+        the nearest step of their own length. Resizing an engaged loop keeps
+        its start. False without a beatgrid.
+        """
+        target = self.decks[deck]
+        loop = target.loop
+        analysis = target.analysis
+        if target.source is None or analysis is None or not analysis.bpm or not len(analysis.beats):
+            return False
+        beats = loop.beats if beats is None else beats
+        current = loop.region if loop.active else None
+        resize = current is not None and not roll and not current.roll
+        if resize:
+            start = current.start
+        else:
+            seconds = quantize(analysis.beats, target.position / self.sample_rate,
+                               min(beats, 1.0), 60.0 / analysis.bpm)
+            start = max(0, int(round(seconds * self.sample_rate)))
+        length = max(1, int(round(beats * 60.0 / analysis.bpm * self.sample_rate)))
+        region = LoopRegion(start, length, beats, roll, self.CHANNELS)
+        region.prefill(target.pcm, current)
+        if not roll:
+            loop.beats = beats
+        if resize and region.end < current.end and region.complete:
+            # Shrunk inside the played part: park the source at the new end
+            # so leaving the loop still carries on seamlessly
+            self._cut(deck, region.end, region)
+        else:
+            loop.engage(region)
+        return True
+    
+    def set_loop_beats(self, deck=0, beats=4):
+        """Choose the loop length, resizing an engaged loop"""
+        target = self.decks[deck]
+        target.loop.beats = beats
+        region = target.loop.region
+        if target.loop.active and region is not None and not region.roll:
+            self.set_loop(deck, beats)
+    
+    def resize_loop(self, deck=0, factor=2.0):
+        """Double (2.0) or halve (0.5) the loop length within LOOP_BEATS"""
+        beats = self.decks[deck].loop.beats * factor
+        if LOOP_BEATS[0] <= beats <= LOOP_BEATS[-1]:
+            self.set_loop_beats(deck, beats)
+    
+    def exit_loop(self, deck=0):
+        """Leave a loop or release a roll"""
+        self.decks[deck].loop.exit()
+    
+    def toggle_loop(self, deck=0):
+        """LOOP button: engage a loop of the chosen length, or exit the current one"""
+        if self.decks[deck].loop.active:
+            self.exit_loop(deck)
+            return True
+        return self.set_loop(deck)
+    
+    def reloop(self, deck=0):
+        """RELOOP/EXIT: exit an engaged loop, or jump back into the last one
+        
+        A loop that was played through is served from memory right away
+        while the source is reopened at its end for a seamless exit; one
+        left during its first pass is jumped to and recorded again.
+        """
+        target = self.decks[deck]
+        loop = target.loop
+        if loop.active:
+            self.exit_loop(deck)
+            return True
+        last = loop.region
+        if last is None or target.track is None:
+            return False
+        region = LoopRegion(last.start, last.length, last.beats, False, self.CHANNELS)
+        region.prefill(target.pcm, last)
+        frame = region.end if region.complete else region.start - region.xfade
+        self._cut(deck, frame, region)
+        return True
+    
+    def build_waveform(self, file_path):
+        """Waveform peak pyramid for a file, read from the PCM cache when possible"""
+        cached = self.pcm_cache.lookup(file_path) if self.pcm_cache else None
+        if cached is not None:
+            data, rate = cached
+            source = ArraySource(data)
+        else:
+            source = open_decoder(file_path)
+            rate = source.sample_rate
+        try:
+            return compute_peaks(source, rate, self.CHANNELS)
+        finally:
+            source.close()
+    
+    def play(self, deck=0):
         """Start playback"""
-        if self.current_track:
-            self.is_playing = True
-            logger.info(f"Playing: {self.current_track}")
+        target = self.decks[deck]
+        if target.track:
+            target.is_playing = True
+            self.start_render()
+            logger.info(f"Playing: {target.track}")
     
-    def pause(self):
+    def pause(self, deck=0):
         """Pause playback"""
-        self.is_playing = False
+        self.decks[deck].is_playing = False
         logger.info("Playback paused")
     
-    def stop(self):
+    def stop(self, deck=0):
         """Stop playback"""
-        self.is_playing = False
-        self.current_track = None
+        self.decks[deck].detach()
         logger.info("Playback stopped")
     
+    @property
+    def master(self):
+        """Most recently rendered master block"""
+        return self.mixer.master
+    
+    def render_block(self):
+        """Render every deck into the mixer and return the master block"""
+        stamp = self.control_stamp
+        if stamp is not None:
+            self.control_stamp = None
+            waited = time.perf_counter_ns() - stamp
+            if self.control_latency is not None:
+                self.control_latency.record(waited)
+            if self.instruments is not None:
+                self.instruments.midi_apply.record(waited / 1000.0)
+        fx, target = self.beat_fx, self.fx_target
+        self.sync.update(self.block_size)
+        for deck, eq in zip(self.decks, self.channel_eqs):
+            block = eq.process(deck.render())
+            if target == deck.index:
+                fx.process(block, self.sample_rate)
+        master, _ = self.mixer.process()
+        self.sampler.render(master)
+        if target == self.FX_MASTER:
+            fx.process(master, self.sample_rate)
+        self.mixer.meter_master(master)
+        return master
+    
+    def start_render(self):
+        """Start the real-time render thread if it is not already running"""
+        if self._running:
+            return
+        self.stats.reset()
+        self._running = True
+        self._render_thread = threading.Thread(
+            target=self._render_loop, name="violet-audio-render", daemon=True)
+        self._render_thread.start()
+        logger.info(f"Render thread started: {self.block_size} frames @ {self.sample_rate} Hz")
+    
+    def stop_render(self):
+        """Stop the render thread and report its timing"""
+        if not self._running:
+            return
+        self._running = False
+        if self._render_thread is not None:
+            self._render_thread.join()
+            self._render_thread = None
+        
+        stats = self.stats.as_dict()
+        logger.info(f"Render thread stopped: {stats['blocks']} blocks, "
+                    f"{stats['late_blocks']} late, max {stats['max_ms']:.2f} ms "
+                    f"of {stats['deadline_ms']:.2f} ms deadline")
+    
+    def shutdown(self):
+        """Stop all decks and the render thread, finishing queued cue saves"""
+        for deck in self.decks:
+            deck.detach()
+        self.stop_render()
+        self._close_output()
+        self._worker.shutdown(wait=True)
+        if self._analysis_pool is not None:
+            self._analysis_pool.shutdown(wait=False, cancel_futures=True)
+            self._analysis_pool = None
+    
+    def get_render_stats(self):
+        """Return render-callback timing for the current session"""
+        return self.stats.as_dict()
+    
+    def get_buffer_stats(self):
+        """Return ring-buffer fill level and xrun counters for each loaded deck"""
+        return {deck.index: deck.source.stats() for deck in self.decks
+                if isinstance(deck.source, RingBuffer)}
+    
+    def _render_loop(self):
+        period = self.block_size / self.sample_rate
+        next_deadline = time.perf_counter() + period
+        instruments = self.instruments
+        while self._running:
+            start = time.perf_counter()
+            block = self.render_block()
+            elapsed = time.perf_counter() - start
+            self.stats.record(elapsed, period)
+            if instruments is not None:
+                instruments.record_block(self, elapsed, period)
+            
+            callback = self.output_callback
+            if callback is not None:
+                callback(block)
+            if callback is None or not self.output_blocking:
+                delay = next_deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                elif delay < -period:
+                    # Fell more than a block behind; don't burst to catch up
+                    next_deadline = time.perf_counter()
+                next_deadline += period
+    
     def get_supported_formats(self):
         """Return list of supported audio formats"""
         return list(self.SUPPORTED_CODECS.keys())
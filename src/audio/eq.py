@@ -0,0 +1,193 @@
+"""
+Per-channel 3-band EQ and COLOR filter built from cached second-order sections
+"""
+
+import math
+from functools import lru_cache
+
+import numpy as np
+
+# (in-place kernel or None, sosfilt) once scipy.signal is loaded. Importing it
+# takes over a second cold, so it happens on first use or in preload(), not
+# when the engine is imported
+_kernels = None
+
+# DJM-800 style EQ range: -26 dB to +6 dB, with the bottom of the knob a full kill
+EQ_RANGE_DB = (-26.0, 6.0)
+KILL_DB = -80.0
+
+IDENTITY_SECTION = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+
+
+def _load_kernels():
+    global _kernels
+    from scipy.signal import sosfilt
+    try:
+        # The Cython kernel behind sosfilt filters in place; the public wrapper's
+        # argument validation costs ~10x the actual filtering at 128-frame blocks
+        from scipy.signal._sosfilt import _sosfilt as inplace
+    except ImportError:
+        inplace = None
+    _kernels = (inplace, sosfilt)
+    return _kernels
+
+
+def preload():
+    """Import scipy.signal now (from a background thread) so the first filtered block doesn't"""
+    if _kernels is None:
+        _load_kernels()
+
+
+def sosfilt_inplace(sos, work, zi):
+    """Filter float64 (signals, frames) work in place, carrying zi (signals, sections, 2)"""
+    inplace, sosfilt = _kernels or _load_kernels()
+    if inplace is not None:
+        inplace(sos, work, zi)
+    else:
+        work[:], zf = sosfilt(sos, work, axis=-1, zi=zi.transpose(1, 0, 2))
+        zi[:] = zf.transpose(1, 0, 2)
+
+
+def knob_to_db(position):
+    """Map a 0-100 EQ knob (50 = flat) to a gain in dB"""
+    lo, hi = EQ_RANGE_DB
+    if position <= 0:
+        return KILL_DB
+    if position < 50:
+        return lo * (50 - position) / 50.0
+    return hi * (position - 50) / 50.0
+
+
+@lru_cache(maxsize=None)
+def band_section(kind, position, sample_rate, freq, q=0.707):
+    """One biquad (b0, b1, b2, 1, a1, a2) for a shelf or peak band at a knob position
+    
+    RBJ audio-EQ-cookbook shelving/peaking forms, which are what a DJ mixer
+    EQ needs and which scipy.signal has no designer for.
+    """
+    gain_db = knob_to_db(position)
+    if gain_db == 0.0:
+        return IDENTITY_SECTION
+    
+    a = 10.0 ** (gain_db / 40.0)
+    w0 = 2.0 * math.pi * freq / sample_rate
+    cos_w0 = math.cos(w0)
+    alpha = math.sin(w0) / (2.0 * q)
+    
+    if kind == 'peak':
+        b = (1 + alpha * a, -2 * cos_w0, 1 - alpha * a)
+        den = (1 + alpha / a, -2 * cos_w0, 1 - alpha / a)
+    else:
+        sq = 2.0 * math.sqrt(a) * alpha
+        if kind == 'low':
+            b = (a * ((a + 1) - (a - 1) * cos_w0 + sq),
+                 2 * a * ((a - 1) - (a + 1) * cos_w0),
+                 a * ((a + 1) - (a - 1) * cos_w0 - sq))
+            den = ((a + 1) + (a - 1) * cos_w0 + sq,
+                   -2 * ((a - 1) + (a + 1) * cos_w0),
+                   (a + 1) + (a - 1) * cos_w0 - sq)
+        else:
+            b = (a * ((a + 1) + (a - 1) * cos_w0 + sq),
+                 -2 * a * ((a - 1) + (a + 1) * cos_w0),
+                 a * ((a + 1) + (a - 1) * cos_w0 - sq))
+            den = ((a + 1) - (a - 1) * cos_w0 + sq,
+                   2 * ((a - 1) - (a + 1) * cos_w0),
+                   (a + 1) - (a - 1) * cos_w0 - sq)
+    
+    a0 = den[0]
+    return (b[0] / a0, b[1] / a0, b[2] / a0, 1.0, den[1] / a0, den[2] / a0)
+
+
+def one_pole_lowpass(cutoff, sample_rate):
+    """First-order Butterworth low-pass as one section (bilinear, prewarped)"""
+    k = math.tan(math.pi * cutoff / sample_rate)
+    return (k / (1 + k), k / (1 + k), 0.0, 1.0, (k - 1) / (k + 1), 0.0)
+
+
+@lru_cache(maxsize=None)
+def color_section(position, sample_rate):
+    """COLOR (FILTER) knob: low-pass left of centre, high-pass right, off at centre"""
+    if ChannelEQ.COLOR_DEAD_ZONE[0] <= position <= ChannelEQ.COLOR_DEAD_ZONE[1]:
+        return IDENTITY_SECTION
+    
+    nyquist = sample_rate / 2.0
+    if position < 50:
+        # 20 kHz down to 100 Hz, exponential across the knob travel
+        depth = (50 - position) / 50.0
+        cutoff, btype = 20000.0 * (100.0 / 20000.0) ** depth, 'lowpass'
+    else:
+        depth = (position - 50) / 50.0
+        cutoff, btype = 20.0 * (8000.0 / 20.0) ** depth, 'highpass'
+    cutoff = min(cutoff, nyquist * 0.95)
+    from scipy.signal import butter
+    sos = butter(2, cutoff / nyquist, btype=btype, output='sos')
+    return tuple(float(c) for c in sos[0])
+
+
+class ChannelEQ:
+    """HI/MID/LOW EQ plus COLOR filter for one mixer channel
+    
+    The four bands always form a fixed four-section cascade, so moving a
+    knob only swaps in a cached coefficient row and the filter state carries
+    across blocks unchanged.
+    """
+    
+    LOW_FREQ = 70.0
+    MID_FREQ = 1000.0
+    HIGH_FREQ = 13000.0
+    MID_Q = 0.7
+    COLOR_DEAD_ZONE = (48, 52)
+    
+    def __init__(self, sample_rate, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.positions = {'low': 50, 'mid': 50, 'high': 50, 'color': 50}
+        self.sos = np.array([IDENTITY_SECTION] * 4)
+        self.zi = np.zeros((channels, 4, 2))
+        self.active = False
+        self._work = np.zeros((channels, 0))
+    
+    def set_low(self, position):
+        """LOW knob (0-100, 50 flat, 0 kill)"""
+        self._set('low', position)
+    
+    def set_mid(self, position):
+        """MID knob (0-100, 50 flat, 0 kill)"""
+        self._set('mid', position)
+    
+    def set_high(self, position):
+        """HI knob (0-100, 50 flat, 0 kill)"""
+        self._set('high', position)
+    
+    def set_color(self, position):
+        """COLOR knob (0-100, 50 off)"""
+        self._set('color', position)
+    
+    def _set(self, band, position):
+        self.positions[band] = int(position)
+        p, rate = self.positions, self.sample_rate
+        sos = np.array([
+            band_section('low', p['low'], rate, self.LOW_FREQ),
+            band_section('peak', p['mid'], rate, self.MID_FREQ, self.MID_Q),
+            band_section('high', p['high'], rate, self.HIGH_FREQ),
+            color_section(p['color'], rate),
+        ])
+        active = bool((sos != IDENTITY_SECTION).any())
+        if active and not self.active:
+            self.zi[:] = 0.0
+        # Single reference swaps; the render thread sees old or new, never a mix
+        self.sos = sos
+        self.active = active
+    
+    def process(self, block):
+        """Filter a (frames, channels) block in place"""
+        if not self.active:
+            return block
+        work = self._work
+        if work.shape[1] != len(block):
+            # Only reallocated when the engine block size changes
+            work = self._work = np.zeros((self.channels, len(block)))
+        work[:] = block.T
+        sosfilt_inplace(self.sos, work, self.zi)
+        block[:] = work.T
+        return block
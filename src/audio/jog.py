@@ -0,0 +1,66 @@
+"""
+Jog wheel integrator: coalesces controller jog ticks into one speed per block
+"""
+
+import math
+
+
+class JogIntegrator:
+    """Turns bursts of jog ticks into a smoothed platter speed, once per block
+    
+    The MIDI thread only ever adds to received and the render thread only
+    ever advances consumed, so neither needs a lock and no tick is lost
+    however many messages arrive between blocks. Speed is 1.0 when the
+    platter turns at normal playing speed (33 1/3 rpm).
+    """
+    
+    TICKS_PER_REV = 720
+    REV_SECONDS = 1.8
+    SMOOTHING_SECONDS = 0.02
+    NUDGE_GAIN = 0.25
+    MAX_BEND = 0.5
+    
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        self.received = 0
+        self.consumed = 0
+        self.touched = False
+        self.speed = 0.0
+        self.active = False
+    
+    def add(self, ticks):
+        """Controller thread: accumulate signed jog ticks"""
+        self.received += ticks
+        self.active = True
+    
+    def touch(self, touched):
+        """Controller thread: platter top touched (scratch) or released (nudge)"""
+        self.touched = touched
+        self.active = True
+    
+    def update(self, frames):
+        """Render thread: smoothed platter speed for the next block of frames"""
+        received = self.received
+        ticks = received - self.consumed
+        self.consumed = received
+        seconds = frames / self.sample_rate
+        instant = ticks / self.TICKS_PER_REV * self.REV_SECONDS / seconds
+        alpha = 1.0 - math.exp(-seconds / self.SMOOTHING_SECONDS)
+        self.speed += alpha * (instant - self.speed)
+        return self.speed
+    
+    def apply(self, stretch, frames):
+        """Drive a deck's TimeStretcher: scratch while touched, pitch-bend otherwise"""
+        if not self.active and self.received == self.consumed:
+            return
+        speed = self.update(frames)
+        if self.touched:
+            # Decks stream forward only, so backward scratches hold the platter
+            stretch.set_jog(scratch=max(0.0, speed))
+            return
+        if abs(speed) < 1e-4:
+            speed = 0.0
+            self.speed = 0.0
+            self.active = False
+        bend = 1.0 + max(-self.MAX_BEND, min(self.MAX_BEND, speed * self.NUDGE_GAIN))
+        stretch.set_jog(bend=bend)
@@ -0,0 +1,336 @@
+"""
+Beat loops and loop rolls served from an in-memory copy of the loop audio
+"""
+
+import collections
+
+import numpy as np
+
+from src.audio.effects.base import MAX_BLOCK
+
+# Loop lengths offered by the UI and controllers, in beats
+LOOP_BEATS = [1 / 32, 1 / 16, 1 / 8, 1 / 4, 1 / 2, 1, 2, 4, 8, 16, 32]
+
+
+def beats_label(beats):
+    """'1/4', '8', ... for a loop length"""
+    return f"1/{round(1 / beats)}" if beats < 1 else f"{beats:g}"
+
+
+def quantize(beats, position, step, beat_period):
+    """Grid point nearest position, on the beat grid subdivided into step-beat steps"""
+    beats = np.asarray(beats, dtype=np.float64)
+    i = int(np.clip(np.searchsorted(beats, position, side='right') - 1, 0, len(beats) - 1))
+    if i + 1 < len(beats):
+        beat_period = beats[i + 1] - beats[i]
+    grid = beat_period * step
+    return beats[i] + round((position - beats[i]) / grid) * grid
+
+
+def equal_gain_fades(frames):
+    """(fade out, fade in) raised-cosine ramps of frames samples, shaped (frames, 1)
+    
+    The pair sums to 1: both sides of a loop seam are the same track a few
+    ms apart and strongly correlated, so an equal-power fade would bump the
+    level by up to 3 dB at every wrap.
+    """
+    t = (np.arange(frames, dtype=np.float64) + 0.5) / max(frames, 1) * np.pi
+    fade_in = 0.5 - 0.5 * np.cos(t)
+    return ((1.0 - fade_in).astype(np.float32)[:, None], fade_in.astype(np.float32)[:, None])
+
+
+class LoopRegion:
+    """One loop: source frames [start, end) plus the xfade frames before start
+    
+    window holds those frames in order; the first filled of them are valid.
+    The last xfade frames of the loop are crossfaded into the frames before
+    start as they are played, so the wrap back to start is continuous.
+    """
+    
+    XFADE_FRAMES = 128
+    
+    def __init__(self, start, length, beats, roll=False, channels=2):
+        self.start = start
+        self.end = start + length
+        self.length = length
+        self.beats = beats
+        self.roll = roll
+        self.xfade = min(self.XFADE_FRAMES, length // 2, start)
+        self.window = np.zeros((self.xfade + length, channels), dtype=np.float32)
+        self.filled = 0
+        self.fade_out, self.fade_in = equal_gain_fades(self.xfade)
+        # Faded-in frames of the wrap, so the render thread never allocates
+        self.blend = np.zeros((self.xfade, channels), dtype=np.float32)
+    
+    @property
+    def complete(self):
+        """True once every frame of the loop is in memory"""
+        return self.filled == len(self.window)
+    
+    def prefill(self, pcm=None, previous=None):
+        """Copy in what is already known, off the render thread
+        
+        From the track's PCM cache the whole loop is available at once;
+        otherwise a resized loop keeps what its predecessor recorded.
+        """
+        first = self.start - self.xfade
+        if pcm is not None and self.end <= len(pcm):
+            self.window[:] = pcm[first:self.end]
+            self.filled = len(self.window)
+        elif previous is not None and previous.start == self.start \
+                and previous.xfade == self.xfade:
+            count = min(previous.filled, len(self.window))
+            self.window[:count] = previous.window[:count]
+            self.filled = count
+
+
+class LoopPlayer:
+    """Sits between a deck and its source, looping from memory when engaged
+    
+    Every frame read from the source also goes into a short history ring, so
+    a loop quantized to a beat just behind the playhead can be filled in
+    instantly. On the first pass the loop plays live and is recorded into
+    its window; after that it is served from the window and the source is
+    left parked at the loop end, ready for a seamless exit. A roll keeps
+    reading (and discarding) the source underneath, and on release
+    crossfades back to where the track would have been.
+    
+    Commands from other threads are queued and applied by the render thread
+    at its next read; nothing on the render path allocates.
+    """
+    
+    HISTORY_SECONDS = 2.0
+    
+    def __init__(self, sample_rate, channels=2):
+        self.sample_rate = sample_rate
+        self.source = None
+        self.region = None
+        self.active = False
+        self.beats = 4
+        self.pos = 0
+        self.source_pos = 0
+        self.offset = 0
+        self.history = np.zeros((int(sample_rate * self.HISTORY_SECONDS), channels),
+                                dtype=np.float32)
+        self._scratch = np.zeros((MAX_BLOCK, channels), dtype=np.float32)
+        self._commands = collections.deque()
+        # Remaining frames (and loop-space position) of a crossfade back to live
+        self._tail_left = 0
+        self._tail_pos = 0
+        self._tail_region = None
+    
+    @property
+    def at_end(self):
+        """True once the source has ended and nothing is being looped"""
+        return (not self.active and self.pos == self.source_pos
+                and self.source is not None and self.source.at_end)
+    
+    def reset(self, source, position, region=None):
+        """Render thread (or with the deck stopped): new source at position
+        
+        Pending commands are kept; region is engaged right away (reloop, or
+        a resized loop, after a jump). A complete region with the source
+        parked at its end is served from memory, carrying on from the
+        current loop position if one was playing.
+        """
+        previous = self.pos if self.active else None
+        self.source = source
+        self.pos = self.source_pos = position
+        self.active = False
+        self._tail_left = 0
+        if region is not None:
+            self.region = region
+            self.active = True
+            if region.complete and position == region.end:
+                pos = region.start if previous is None else previous
+                if pos >= region.end:
+                    pos = region.start + (pos - region.start) % region.length
+                if pos < region.start - region.xfade:
+                    pos = region.start
+                self.offset += pos - position
+                self.pos = pos
+    
+    def take_offset(self):
+        """Frames the playhead jumped by (wraps, roll releases) since the last call"""
+        offset, self.offset = self.offset, 0
+        return offset
+    
+    # ── Commands (any thread) ───────────────────────────────────────────────
+    def engage(self, region):
+        """Start looping region"""
+        self._commands.append(region)
+    
+    def exit(self):
+        """Leave the loop (a roll returns to where the track would be)"""
+        self._commands.append(None)
+    
+    def _apply(self, region):
+        if region is None:
+            self._exit()
+            return
+        first = region.start - region.xfade
+        known = first + region.filled
+        # Frames already read but not prefilled come from the history ring;
+        # any older than it holds stay silent
+        lo = max(known, self.source_pos - len(self.history))
+        hi = min(self.source_pos, region.end)
+        if hi > known:
+            if hi > lo:
+                self._copy_history(region.window[lo - first:hi - first], lo)
+            region.filled = hi - first
+        self.region = region
+        self.active = True
+        if self.pos >= region.end and region.complete:
+            wrapped = region.start + (self.pos - region.start) % region.length
+            self.offset += wrapped - self.pos
+            self.pos = wrapped
+    
+    def _exit(self):
+        region = self.region
+        self.active = False
+        if region is None or self.pos == self.source_pos:
+            return
+        if not region.roll and self.source_pos == region.end:
+            # Parked at the loop end: play out the loop and carry on seamlessly
+            return
+        self._tail_left = region.xfade
+        self._tail_pos = self.pos
+        self._tail_region = region
+        self.offset += self.source_pos - self.pos
+        self.pos = self.source_pos
+    
+    # ── Render thread ────────────────────────────────────────────────────────
+    def read_into(self, out):
+        """Source interface: fill out with looped or live frames, returning the count"""
+        commands = self._commands
+        while commands:
+            self._apply(commands.popleft())
+        wanted = len(out)
+        done = 0
+        while done < wanted:
+            region = self.region if self.active else None
+            if region is not None and self.pos >= region.end:
+                # Engaged behind the playhead with its start already out of
+                # history: nothing to wrap back to, so play on
+                region = None
+            live = self.pos == self.source_pos
+            count = wanted - done
+            if region is not None and self.pos < region.end:
+                count = min(count, region.end - self.pos)
+            if live:
+                chunk = out[done:done + count]
+                got = self._read_source(chunk)
+                if self._tail_left:
+                    self._crossfade_tail(chunk[:got])
+                self.pos += got
+            else:
+                got = self._serve(out[done:done + count])
+            if region is not None:
+                self._wrap_fade(out[done:done + got], self.pos - got, region)
+                if self.pos == region.end:
+                    self.offset -= region.length
+                    self.pos = region.start
+            done += got
+            if got < count:
+                break
+        return done
+    
+    def _read_source(self, chunk):
+        """Read live frames, recording them into history and the loop window"""
+        if self.source is None:
+            return 0
+        got = self.source.read_into(chunk)
+        if got:
+            self._record(chunk[:got], self.source_pos)
+            self.source_pos += got
+        return got
+    
+    def _serve(self, chunk):
+        """Copy frames at pos from the loop window"""
+        region = self.region
+        first = region.start - region.xfade
+        count = min(len(chunk), region.end - self.pos)
+        index = self.pos - first
+        valid = max(0, min(count, region.filled - index))
+        chunk[:valid] = region.window[index:index + valid]
+        chunk[valid:count] = 0.0
+        self.pos += count
+        if self.active and region.roll and self.source is not None:
+            # Keep the track moving underneath the roll
+            scratch = self._scratch
+            left = count
+            while left > 0:
+                step = min(left, len(scratch))
+                if self._read_source(scratch[:step]) < step:
+                    break
+                left -= step
+        return count
+    
+    def _record(self, frames, position):
+        history = self.history
+        size = len(history)
+        count = len(frames)
+        start = position % size
+        first = min(count, size - start)
+        history[start:start + first] = frames[:first]
+        if first < count:
+            history[:count - first] = frames[first:]
+        
+        region = self.region
+        if region is None or region.complete:
+            return
+        lo = region.start - region.xfade + region.filled
+        if not position <= lo < position + count:
+            return
+        hi = min(position + count, region.end)
+        base = region.start - region.xfade
+        region.window[lo - base:hi - base] = frames[lo - position:hi - position]
+        region.filled = hi - base
+    
+    def _copy_history(self, out, position):
+        size = len(self.history)
+        count = len(out)
+        start = position % size
+        first = min(count, size - start)
+        out[:first] = self.history[start:start + first]
+        if first < count:
+            out[first:] = self.history[:count - first]
+    
+    def _wrap_fade(self, chunk, position, region):
+        """Crossfade the last xfade frames of the loop into the frames before its start"""
+        x = region.xfade
+        fade_start = region.end - x
+        lo = max(position, fade_start)
+        hi = position + len(chunk)
+        if hi <= lo or not x:
+            return
+        i, j = lo - fade_start, hi - fade_start
+        part = chunk[lo - position:hi - position]
+        part *= region.fade_out[i:j]
+        blend = np.multiply(region.window[i:j], region.fade_in[i:j], out=region.blend[:j - i])
+        part += blend
+    
+    def _crossfade_tail(self, chunk):
+        """Fade the abandoned loop out over the first live frames after a roll"""
+        region = self._tail_region
+        count = min(len(chunk), self._tail_left)
+        i = region.xfade - self._tail_left
+        first = region.start - region.xfade
+        tail = self._scratch[:count]
+        pos = self._tail_pos
+        # The abandoned loop carries on cyclically from where it was left
+        done = 0
+        while done < count:
+            step = min(count - done, region.end - pos)
+            index = pos - first
+            tail[done:done + step] = region.window[index:index + step]
+            done += step
+            pos += step
+            if pos == region.end:
+                pos = region.start
+        part = chunk[:count]
+        part *= region.fade_in[i:i + count]
+        tail *= region.fade_out[i:i + count]
+        part += tail
+        self._tail_pos = pos
+        self._tail_left -= count
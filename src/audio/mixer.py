@@ -0,0 +1,168 @@
+"""
+Four-channel mixer bus modelled on the DJM-800 channel strips
+"""
+
+import numpy as np
+
+
+def db_to_gain(db):
+    """Convert decibels to a linear gain factor"""
+    return 10.0 ** (db / 20.0)
+
+
+class MixerBus:
+    """Sums every channel into master and cue buses in one batched operation
+    
+    Decks render directly into ``inputs`` (channels x frames x 2). Each
+    process() call ramps every channel's gain linearly from its previous
+    value to the current target across the block, so control moves are
+    click-free, and the cost is the same whether one deck or all four are
+    active.
+    """
+    
+    TRIM_RANGE_DB = (-24.0, 9.0)
+    CROSSFADER_CURVES = ('smooth', 'linear', 'sharp')
+    ASSIGN_A, ASSIGN_THRU, ASSIGN_B = 0, 1, 2
+    ASSIGNMENTS = {'A': ASSIGN_A, 'THRU': ASSIGN_THRU, 'B': ASSIGN_B}
+    
+    def __init__(self, channels, block_size, stereo=2):
+        self.channels = channels
+        self.block_size = block_size
+        self.inputs = np.zeros((channels, block_size, stereo), dtype=np.float32)
+        self.master = np.zeros((block_size, stereo), dtype=np.float32)
+        self.cue = np.zeros((block_size, stereo), dtype=np.float32)
+        self.phones = np.zeros((block_size, stereo), dtype=np.float32)
+        
+        self.trim = np.ones(channels, dtype=np.float32)
+        self.fader = np.ones(channels, dtype=np.float32)
+        self.cue_on = np.zeros(channels, dtype=np.float32)
+        self.assign = np.full(channels, self.ASSIGN_THRU, dtype=np.intp)
+        self.crossfader_gains = np.ones(3, dtype=np.float32)
+        self.crossfader = 0.5
+        self.crossfader_curve = 'smooth'
+        self.master_level = 1.0
+        self.headphone_mix = 0.5
+        self.headphone_level = 1.0
+        # Peak levels since the last take_peaks(): post-trim per channel, then
+        # master (metered by the engine once the sampler and master FX are in)
+        self.peaks = np.zeros(channels + 1, dtype=np.float32)
+        
+        # Preallocated scratch for the per-block gain computation
+        self._target = np.zeros(channels, dtype=np.float32)
+        self._xf = np.zeros(channels, dtype=np.float32)
+        self._gain = np.zeros(channels, dtype=np.float32)
+        self._cue_target = np.zeros(channels, dtype=np.float32)
+        self._cue_gain = np.zeros(channels, dtype=np.float32)
+        self._ramp = np.zeros((channels, block_size), dtype=np.float32)
+        self._steps = np.arange(1, block_size + 1, dtype=np.float32) / block_size
+        self._scratch = np.zeros((block_size, stereo), dtype=np.float32)
+        self._peak_hi = np.zeros(channels, dtype=np.float32)
+        self._peak_lo = np.zeros(channels, dtype=np.float32)
+        self._flat = self.inputs.reshape(channels, -1)
+        self.set_crossfader(50)
+    
+    # ── Controls (0-100 knob/fader values as used by the UI) ────────────────
+    def set_trim(self, channel, value):
+        """TRIM knob; 0-100 maps across TRIM_RANGE_DB, 0 mutes"""
+        lo, hi = self.TRIM_RANGE_DB
+        self.trim[channel] = db_to_gain(lo + (hi - lo) * value / 100.0) if value > 0 else 0.0
+    
+    def set_fader(self, channel, value):
+        """Channel fader with a square-law taper"""
+        self.fader[channel] = (value / 100.0) ** 2
+    
+    def set_cue(self, channel, enabled):
+        """Route the channel (pre-fader) to the cue bus"""
+        self.cue_on[channel] = 1.0 if enabled else 0.0
+    
+    def set_crossfader_assign(self, channel, side):
+        """Assign channel to crossfader side 'A', 'B' or 'THRU'"""
+        self.assign[channel] = self.ASSIGNMENTS[side]
+    
+    def set_crossfader(self, value):
+        """Crossfader position, 0 (full A) to 100 (full B)"""
+        self.crossfader = min(max(value / 100.0, 0.0), 1.0)
+        self._update_crossfader()
+    
+    def set_crossfader_curve(self, curve):
+        """Crossfader curve: 'smooth' (constant power), 'linear' or 'sharp' (scratch cut)"""
+        if curve not in self.CROSSFADER_CURVES:
+            raise ValueError(f"Unknown crossfader curve: {curve}")
+        self.crossfader_curve = curve
+        self._update_crossfader()
+    
+    def set_master_level(self, value):
+        """Master fader with a square-law taper"""
+        self.master_level = (value / 100.0) ** 2
+    
+    def set_headphone_mix(self, value):
+        """Headphone CUE ◂▸ MSTR blend, 0 (cue only) to 100 (master only)"""
+        self.headphone_mix = value / 100.0
+    
+    def set_headphone_level(self, value):
+        """Headphone level"""
+        self.headphone_level = (value / 100.0) ** 2
+    
+    def _update_crossfader(self):
+        x = self.crossfader
+        if self.crossfader_curve == 'smooth':
+            a, b = np.cos(x * np.pi / 2), np.sin(x * np.pi / 2)
+        elif self.crossfader_curve == 'linear':
+            a, b = 1.0 - x, x
+        else:
+            # Scratch curve: both sides open except within 5% of either end
+            a, b = min(1.0, (1.0 - x) * 20.0), min(1.0, x * 20.0)
+        self.crossfader_gains[self.ASSIGN_A] = a
+        self.crossfader_gains[self.ASSIGN_B] = b
+    
+    # ── Processing ──────────────────────────────────────────────────────────
+    def process(self):
+        """Mix inputs into master, cue and phones; returns (master, phones)"""
+        np.multiply(self.trim, self.fader, out=self._target)
+        np.take(self.crossfader_gains, self.assign, out=self._xf)
+        np.multiply(self._target, self._xf, out=self._target)
+        self._target *= self.master_level
+        self._mix(self._gain, self._target, self.master)
+        self._meter()
+        
+        np.multiply(self.trim, self.cue_on, out=self._cue_target)
+        self._mix(self._cue_gain, self._cue_target, self.cue)
+        
+        phones = self.phones
+        np.multiply(self.cue, 1.0 - self.headphone_mix, out=phones)
+        np.multiply(self.master, self.headphone_mix, out=self._scratch)
+        phones += self._scratch
+        phones *= self.headphone_level
+        return self.master, phones
+    
+    def take_peaks(self, out):
+        """Copy peak levels into out and start a new metering period"""
+        out[:] = self.peaks
+        self.peaks[:] = 0.0
+    
+    def meter_master(self, block):
+        """Fold the finished master block (what reaches the output) into the master peak"""
+        peak = max(block.max(), -block.min())
+        if peak > self.peaks[self.channels]:
+            self.peaks[self.channels] = peak
+    
+    def _meter(self):
+        """Fold this block's channel peaks into peaks (pre-fader, like the DJM)"""
+        n = self.channels
+        hi, lo = self._peak_hi, self._peak_lo
+        self._flat.max(axis=1, out=hi)
+        self._flat.min(axis=1, out=lo)
+        np.negative(lo, out=lo)
+        np.maximum(hi, lo, out=hi)
+        hi *= self.trim
+        np.maximum(self.peaks[:n], hi, out=self.peaks[:n])
+    
+    def _mix(self, current, target, out):
+        """Ramp per-channel gains current -> target and sum all channels into out"""
+        ramp = self._ramp
+        np.subtract(target, current, out=current)
+        np.multiply(current[:, None], self._steps[None, :], out=ramp)
+        np.subtract(target, current, out=current)
+        ramp += current[:, None]
+        np.einsum('cf,cfs->fs', ramp, self.inputs, out=out)
+        current[:] = target
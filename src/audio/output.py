@@ -0,0 +1,399 @@
+"""
+Audio output backends: rendered master blocks to PulseAudio, ALSA, JACK or a file
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.audio.effects.base import MAX_BLOCK
+from src.audio.ringbuffer import RingBuffer
+
+logger = logging.getLogger(__name__)
+
+# Device sample formats: numpy dtype and the full-scale multiplier for floats
+SAMPLE_FORMATS = {
+    'float32': (np.float32, None),
+    'int32': (np.int32, 2147483647.0),
+    'int16': (np.int16, 32767.0),
+}
+
+# Blocks queued ahead of the device (PulseAudio target length, JACK ring)
+LATENCY_BLOCKS = 2
+
+
+class SampleConverter:
+    """Float32 (frames, channels) blocks to a device sample format, without allocating
+    
+    The engine's blocks are already interleaved, so float32 output is the
+    block itself. Integer formats are scaled, rounded and clipped in a
+    preallocated float32 work buffer and cast into a preallocated output
+    buffer; what comes back is a view of it.
+    """
+    
+    def __init__(self, sample_format='float32', channels=2):
+        if sample_format not in SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format: {sample_format}")
+        dtype, scale = SAMPLE_FORMATS[sample_format]
+        self.format = sample_format
+        self.dtype = np.dtype(dtype)
+        self.frame_bytes = self.dtype.itemsize * channels
+        self.scale = scale
+        self._out = np.zeros((MAX_BLOCK, channels), dtype=self.dtype)
+        self._work = np.zeros((MAX_BLOCK, channels), dtype=np.float32)
+        if scale is not None:
+            info = np.iinfo(self.dtype)
+            # float32 can't hold 2**31 - 1; clip to the largest value below it
+            high = np.float32(info.max)
+            if int(high) > info.max:
+                high = np.nextafter(high, np.float32(0.0))
+            self.limits = (np.float32(info.min), high)
+    
+    def convert(self, block):
+        """Render thread: block in the device format, as a C-contiguous array"""
+        n = len(block)
+        if self.scale is None:
+            if block.flags.c_contiguous:
+                return block
+            out = self._out[:n]
+            out[:] = block
+            return out
+        work = self._work[:n]
+        np.multiply(block, self.scale, out=work)
+        np.rint(work, out=work)
+        np.clip(work, self.limits[0], self.limits[1], out=work)
+        out = self._out[:n]
+        np.copyto(out, work, casting='unsafe')
+        return out
+
+
+class OutputBackend:
+    """Receives each rendered master block from the render thread
+    
+    Subclasses open the device in open() and implement _write(), which gets
+    the block already converted to the device format. A blocking backend's
+    writes pace the render thread; otherwise the engine sleeps to each
+    block's deadline.
+    """
+    
+    NAME = ''
+    DEFAULT_FORMAT = 'float32'
+    blocking = True
+    
+    def __init__(self, sample_rate, channels=2, block_size=256, sample_format=None, device=None):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.block_size = block_size
+        self.device = device
+        self.converter = SampleConverter(sample_format or self.DEFAULT_FORMAT, channels)
+        self.blocks = 0
+        self.errors = 0
+    
+    def open(self):
+        """Open the device (raises OSError, or ImportError for a missing binding)"""
+    
+    def close(self):
+        """Release the device"""
+    
+    def reopen(self, block_size):
+        """Reopen with a new block size (render thread stopped)"""
+        self.close()
+        self.block_size = block_size
+        self.open()
+    
+    def write(self, block):
+        """Render thread: convert and write one float32 (frames, channels) block"""
+        data = self.converter.convert(block)
+        try:
+            self._write(data)
+        except OSError as e:
+            self.errors += 1
+            if self.errors == 1:
+                logger.warning(f"{self.NAME} output failed: {e}")
+            # Keep the render thread paced while the device is gone
+            time.sleep(len(block) / self.sample_rate)
+            return
+        self.blocks += 1
+    
+    def _write(self, data):
+        raise NotImplementedError
+    
+    def __repr__(self):
+        return (f"{type(self).__name__}({self.device or 'default'}, {self.sample_rate} Hz, "
+                f"{self.converter.format}, {self.block_size} frames)")
+
+
+class _PaSampleSpec(ctypes.Structure):
+    _fields_ = [('format', ctypes.c_int), ('rate', ctypes.c_uint32), ('channels', ctypes.c_uint8)]
+
+
+class _PaBufferAttr(ctypes.Structure):
+    _fields_ = [(name, ctypes.c_uint32)
+                for name in ('maxlength', 'tlength', 'prebuf', 'minreq', 'fragsize')]
+
+
+class PulseBackend(OutputBackend):
+    """PulseAudio (or PipeWire-Pulse) playback stream through libpulse-simple
+    
+    Blocks are handed to pa_simple_write() as a pointer into the converted
+    array, so nothing is copied on the Python side.
+    """
+    
+    NAME = 'pulseaudio'
+    # Little-endian pa_sample_format_t values
+    PA_FORMATS = {'int16': 3, 'float32': 5, 'int32': 7}
+    PA_STREAM_PLAYBACK = 1
+    
+    _lib = None
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stream = None
+        self._error = ctypes.c_int(0)
+        self._error_ref = ctypes.byref(self._error)
+    
+    @classmethod
+    def _library(cls):
+        if cls._lib is None:
+            name = ctypes.util.find_library('pulse-simple') or 'libpulse-simple.so.0'
+            lib = ctypes.CDLL(name)
+            lib.pa_simple_new.restype = ctypes.c_void_p
+            lib.pa_simple_new.argtypes = [
+                ctypes.c_char_p, ctypes.c_char_p, ctypes.c_int, ctypes.c_char_p, ctypes.c_char_p,
+                ctypes.POINTER(_PaSampleSpec), ctypes.c_void_p, ctypes.POINTER(_PaBufferAttr),
+                ctypes.POINTER(ctypes.c_int)]
+            lib.pa_simple_write.restype = ctypes.c_int
+            lib.pa_simple_write.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t,
+                                            ctypes.POINTER(ctypes.c_int)]
+            lib.pa_simple_get_latency.restype = ctypes.c_uint64
+            lib.pa_simple_get_latency.argtypes = [ctypes.c_void_p, ctypes.POINTER(ctypes.c_int)]
+            lib.pa_simple_free.argtypes = [ctypes.c_void_p]
+            lib.pa_strerror.restype = ctypes.c_char_p
+            lib.pa_strerror.argtypes = [ctypes.c_int]
+            cls._lib = lib
+        return cls._lib
+    
+    def _message(self):
+        return self._library().pa_strerror(self._error.value).decode('utf-8', 'replace')
+    
+    def open(self):
+        lib = self._library()
+        spec = _PaSampleSpec(self.PA_FORMATS[self.converter.format], self.sample_rate, self.channels)
+        unset = 0xFFFFFFFF
+        target = LATENCY_BLOCKS * self.block_size * self.converter.frame_bytes
+        attr = _PaBufferAttr(unset, target, unset, unset, unset)
+        device = self.device.encode('utf-8') if self.device else None
+        self._stream = lib.pa_simple_new(None, b'Violet DJ', self.PA_STREAM_PLAYBACK, device,
+                                         b'Master', ctypes.byref(spec), None,
+                                         ctypes.byref(attr), self._error_ref)
+        if not self._stream:
+            raise OSError(f"Could not connect to PulseAudio: {self._message()}")
+    
+    def close(self):
+        if self._stream:
+            self._library().pa_simple_free(self._stream)
+            self._stream = None
+    
+    def latency(self):
+        """Seconds of audio between the last write and the speakers"""
+        if not self._stream:
+            return 0.0
+        return self._library().pa_simple_get_latency(self._stream, self._error_ref) / 1e6
+    
+    def _write(self, data):
+        if self._lib.pa_simple_write(self._stream, data.ctypes.data, data.nbytes,
+                                     self._error_ref) < 0:
+            raise OSError(self._message())
+
+
+class AlsaBackend(OutputBackend):
+    """ALSA playback through pyalsaaudio, one period per block
+    
+    The converted array's memoryview is passed to PCM.write(), which takes
+    any buffer, so no bytes object is built per block.
+    """
+    
+    NAME = 'alsa'
+    DEFAULT_FORMAT = 'int16'
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pcm = None
+        self._alsa = None
+    
+    def open(self):
+        import alsaaudio
+        formats = {
+            'int16': alsaaudio.PCM_FORMAT_S16_LE,
+            'int32': alsaaudio.PCM_FORMAT_S32_LE,
+            'float32': alsaaudio.PCM_FORMAT_FLOAT_LE,
+        }
+        try:
+            self._pcm = alsaaudio.PCM(type=alsaaudio.PCM_PLAYBACK, mode=alsaaudio.PCM_NORMAL,
+                                      rate=self.sample_rate, channels=self.channels,
+                                      format=formats[self.converter.format],
+                                      periodsize=self.block_size,
+                                      device=self.device or 'default')
+        except alsaaudio.ALSAAudioError as e:
+            raise OSError(f"Could not open ALSA device {self.device or 'default'}: {e}") from e
+        self._alsa = alsaaudio
+    
+    def close(self):
+        if self._pcm is not None:
+            self._pcm.close()
+            self._pcm = None
+    
+    def _write(self, data):
+        try:
+            self._pcm.write(data.data)
+        except self._alsa.ALSAAudioError as e:
+            raise OSError(str(e)) from e
+
+
+class JackBackend(OutputBackend):
+    """JACK client with one output port per channel
+    
+    JACK pulls audio from its own thread, so blocks go through a small
+    frame ring: write() waits for room (pacing the render thread to the
+    JACK clock) and the process callback de-interleaves the ring into the
+    port buffers. JACK ports are always float32 at the server's rate.
+    """
+    
+    NAME = 'jack'
+    CLIENT_NAME = 'Violet DJ'
+    TIMEOUT = 1.0
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.converter.format != 'float32':
+            raise ValueError("JACK output is float32 only")
+        self._client = None
+        self._ports = []
+        self._ring = None
+        self._scratch = None
+        self._space = threading.Event()
+    
+    def open(self):
+        import jack
+        try:
+            client = jack.Client(self.CLIENT_NAME, no_start_server=True)
+        except jack.JackError as e:
+            raise OSError(f"Could not connect to JACK: {e}") from e
+        if client.samplerate != self.sample_rate:
+            client.close()
+            raise OSError(f"JACK runs at {client.samplerate} Hz, "
+                          f"the engine at {self.sample_rate} Hz")
+        period = max(client.blocksize, self.block_size)
+        self._ring = RingBuffer(period * LATENCY_BLOCKS + self.block_size, self.channels)
+        self._scratch = np.zeros((max(client.blocksize, MAX_BLOCK), self.channels),
+                                 dtype=np.float32)
+        self._ports = [client.outports.register(f'out_{c + 1}') for c in range(self.channels)]
+        client.set_process_callback(self._process)
+        client.activate()
+        playback = client.get_ports(is_physical=True, is_input=True, is_audio=True)
+        for port, target in zip(self._ports, playback):
+            client.connect(port, target)
+        self._client = client
+    
+    def close(self):
+        if self._client is not None:
+            self._client.deactivate()
+            self._client.close()
+            self._client = None
+            self._ports = []
+    
+    def _process(self, frames):
+        scratch = self._scratch[:frames]
+        got = self._ring.read_into(scratch)
+        scratch[got:] = 0.0
+        for c, port in enumerate(self._ports):
+            port.get_array()[:] = scratch[:, c]
+        self._space.set()
+    
+    def _write(self, data):
+        ring, space = self._ring, self._space
+        while ring.free() < len(data):
+            space.clear()
+            if ring.free() >= len(data):
+                break
+            if not space.wait(self.TIMEOUT):
+                raise OSError("JACK stopped processing")
+        ring.write(data)
+
+
+class NullBackend(OutputBackend):
+    """Discards blocks (headless runs and tests); the engine paces itself"""
+    
+    NAME = 'null'
+    blocking = False
+    
+    def reopen(self, block_size):
+        self.block_size = block_size
+    
+    def _write(self, data):
+        pass
+
+
+class FileBackend(OutputBackend):
+    """Writes the master output to a WAV file in the chosen sample format
+    
+    The converted array goes to libsndfile through the buffer protocol, so
+    the file holds exactly what a device would have been sent.
+    """
+    
+    NAME = 'file'
+    DEFAULT_FORMAT = 'int16'
+    DEFAULT_PATH = os.path.expanduser('~/.violet_dj/output.wav')
+    SUBTYPES = {'int16': 'PCM_16', 'int32': 'PCM_32', 'float32': 'FLOAT'}
+    blocking = False
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.device = self.device or self.DEFAULT_PATH
+        self._file = None
+    
+    def open(self):
+        import soundfile as sf
+        directory = os.path.dirname(self.device)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        try:
+            self._file = sf.SoundFile(self.device, 'w', self.sample_rate, self.channels,
+                                      self.SUBTYPES[self.converter.format], format='WAV')
+        except sf.LibsndfileError as e:
+            raise OSError(f"Could not open {self.device}: {e}") from e
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+    
+    def reopen(self, block_size):
+        # Keep appending to the same file
+        self.block_size = block_size
+    
+    def _write(self, data):
+        self._file.buffer_write(data, dtype=self.converter.format)
+
+
+BACKENDS = {
+    'pulseaudio': PulseBackend,
+    'alsa': AlsaBackend,
+    'jack': JackBackend,
+    'null': NullBackend,
+    'file': FileBackend,
+}
+
+
+def open_backend(name, sample_rate, channels=2, block_size=256, **options):
+    """Open an output backend by name; options are device and sample_format"""
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}")
+    backend = BACKENDS[name](sample_rate, channels, block_size, **options)
+    backend.open()
+    return backend
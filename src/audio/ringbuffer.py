@@ -0,0 +1,99 @@
+"""
+Lock-free single-producer/single-consumer ring buffer for audio frames
+"""
+
+import numpy as np
+
+
+class RingBuffer:
+    """Preallocated SPSC frame ring shared by one decoder thread and the audio callback
+    
+    The producer only ever advances the write index and the consumer only
+    ever advances the read index. Both are monotonically increasing integers
+    whose assignment is atomic under the GIL, so neither side takes a lock
+    and the fill level is simply their difference.
+    """
+    
+    def __init__(self, capacity, channels=2, dtype=np.float32):
+        if capacity <= 0:
+            raise ValueError(f"Ring buffer capacity must be positive, got {capacity}")
+        self.capacity = int(capacity)
+        self.channels = channels
+        self.buffer = np.zeros((self.capacity, channels), dtype=dtype)
+        self.read_index = 0
+        self.write_index = 0
+        self.underruns = 0
+        self.overruns = 0
+        self.closed = False
+    
+    def available(self):
+        """Frames ready to be read"""
+        return self.write_index - self.read_index
+    
+    def free(self):
+        """Frames that can be written without overwriting unread data"""
+        return self.capacity - (self.write_index - self.read_index)
+    
+    def fill_level(self):
+        """Fraction of the ring currently holding unread frames"""
+        return self.available() / self.capacity
+    
+    @property
+    def at_end(self):
+        """True once the producer has closed the stream and it is drained"""
+        return self.closed and self.write_index == self.read_index
+    
+    def write(self, frames):
+        """Producer: append frames, returning how many fit
+        
+        Frames that do not fit are dropped and counted as an overrun; callers
+        should check free() first and only write what fits.
+        """
+        count = min(len(frames), self.free())
+        if count < len(frames):
+            self.overruns += 1
+        if count <= 0:
+            return 0
+        
+        start = self.write_index % self.capacity
+        first = min(count, self.capacity - start)
+        self.buffer[start:start + first] = frames[:first]
+        if first < count:
+            self.buffer[:count - first] = frames[first:count]
+        self.write_index += count
+        return count
+    
+    def read_into(self, out):
+        """Consumer: copy up to len(out) frames into out, returning the count
+        
+        Never blocks. A short read before the producer has closed the stream
+        is counted as an underrun; the caller pads the remainder.
+        """
+        wanted = len(out)
+        count = min(wanted, self.write_index - self.read_index)
+        if count < wanted and not self.closed:
+            self.underruns += 1
+        if count <= 0:
+            return 0
+        
+        start = self.read_index % self.capacity
+        first = min(count, self.capacity - start)
+        out[:first] = self.buffer[start:start + first]
+        if first < count:
+            out[first:count] = self.buffer[:count - first]
+        self.read_index += count
+        return count
+    
+    def close(self):
+        """Producer: mark the end of the stream"""
+        self.closed = True
+    
+    def stats(self):
+        """Return fill level and xrun counters"""
+        return {
+            'capacity': self.capacity,
+            'available': self.available(),
+            'fill_level': self.fill_level(),
+            'underruns': self.underruns,
+            'overruns': self.overruns,
+        }
@@ -0,0 +1,275 @@
+"""
+Sampler pads: preloaded one-shot samples played through a fixed voice pool
+"""
+
+import collections
+import ctypes
+import ctypes.util
+import logging
+import os
+import time
+
+import numpy as np
+
+from src.audio.decoder import open_decoder
+from src.audio.effects.base import MAX_BLOCK
+
+logger = logging.getLogger(__name__)
+
+_libc = None
+
+
+def _memory_lock(array, lock=True):
+    """mlock/munlock an array's pages; best effort (RLIMIT_MEMLOCK may forbid it)"""
+    global _libc
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        call = _libc.mlock if lock else _libc.munlock
+        return call(ctypes.c_void_p(array.ctypes.data), ctypes.c_size_t(array.nbytes)) == 0
+    except (OSError, AttributeError):
+        return False
+
+
+def load_sample(file_path, sample_rate, channels=2):
+    """Decode a whole file to a read-only float32 (frames, channels) array at sample_rate"""
+    decoder = open_decoder(file_path)
+    try:
+        data = np.zeros((max(decoder.frames, 1), channels), dtype=np.float32)
+        count = 0
+        while True:
+            if count == len(data):
+                # Frame count was an estimate (compressed formats); grow
+                data = np.concatenate([data, np.zeros_like(data)])
+            got = decoder.read_into(data[count:])
+            count += got
+            if got == 0 or decoder.at_end:
+                break
+        data = data[:count]
+        rate = decoder.sample_rate
+    finally:
+        decoder.close()
+    
+    if rate != sample_rate and count > 1:
+        # Load-time linear resampling; pads are short, so this stays cheap
+        frames = int(round(count * sample_rate / rate))
+        src = np.arange(count, dtype=np.float64)
+        dst = np.linspace(0.0, count - 1, frames)
+        data = np.stack([np.interp(dst, src, data[:, c]) for c in range(channels)], axis=1)
+    data = np.ascontiguousarray(data, dtype=np.float32)
+    data.flags.writeable = False
+    return data
+
+
+class SampleBank:
+    """Up to Sampler.PADS decoded, memory-locked pad samples
+    
+    Everything is decoded and resampled when the bank is built, off the
+    render thread; the arrays are then locked in RAM where the system
+    allows, so a pad hit never page-faults on audio that was swapped out.
+    """
+    
+    def __init__(self, samples, names=None):
+        self.samples = list(samples)
+        self.names = list(names or [''] * len(self.samples))
+        self.pinned = all(_memory_lock(s) for s in self.samples if s is not None)
+    
+    @classmethod
+    def from_files(cls, paths, sample_rate, channels=2):
+        """Bank from a list of file paths (None leaves a pad empty)"""
+        samples, names = [], []
+        for path in paths[:Sampler.PADS]:
+            if path is None:
+                samples.append(None)
+                names.append('')
+                continue
+            try:
+                samples.append(load_sample(path, sample_rate, channels))
+                names.append(os.path.splitext(os.path.basename(path))[0])
+            except Exception as e:
+                logger.warning(f"Could not load pad sample {path}: {e}")
+                samples.append(None)
+                names.append('')
+        return cls(samples, names)
+    
+    @classmethod
+    def from_directory(cls, directory, sample_rate, channels=2, extensions=None):
+        """Bank from the first Sampler.PADS audio files in a directory, by name"""
+        extensions = extensions or ('.wav', '.flac', '.ogg', '.aiff', '.aif', '.mp3')
+        files = sorted(f for f in os.listdir(directory) if f.lower().endswith(extensions))
+        return cls.from_files([os.path.join(directory, f) for f in files], sample_rate, channels)
+    
+    def release(self):
+        """Unlock the sample memory (the arrays stay valid while voices hold them)"""
+        if self.pinned:
+            for sample in self.samples:
+                if sample is not None:
+                    _memory_lock(sample, lock=False)
+            self.pinned = False
+
+
+class _Voice:
+    """One playing sample, plus an optional fading tail of the voice it stole"""
+    
+    __slots__ = ('pad', 'sample', 'pos', 'gain', 'delay', 'serial',
+                 'tail', 'tail_pos', 'tail_gain', 'tail_left')
+    
+    def __init__(self):
+        self.pad = -1
+        self.sample = None
+        self.pos = 0
+        self.gain = 0.0
+        self.delay = 0
+        self.serial = 0
+        self.tail = None
+        self.tail_pos = 0
+        self.tail_gain = 0.0
+        self.tail_left = 0
+
+
+class Sampler:
+    """Polyphonic one-shot pad player mixed into the master bus
+    
+    Triggers from any thread go through a deque and are applied by the
+    render thread at the start of the next block, each offset into it by
+    the time it arrived after the previous block was rendered, so hits keep
+    their relative timing to the sample at the cost of one block of
+    latency. Voices are preallocated; when all are busy the oldest is
+    stolen and faded out over FADE_FRAMES so the steal never clicks.
+    Nothing on the render path allocates.
+    """
+    
+    PADS = 16
+    VOICES = 32
+    FADE_FRAMES = 64
+    
+    def __init__(self, sample_rate, channels=2):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bank = SampleBank([None] * self.PADS)
+        self.volume = 1.0
+        self.voices = [_Voice() for _ in range(self.VOICES)]
+        self.active = 0
+        self.steals = 0
+        self._commands = collections.deque()
+        self._serial = 0
+        self._last_render_ns = None
+        self._scratch = np.zeros((MAX_BLOCK, channels), dtype=np.float32)
+        self._fade = np.linspace(1.0, 0.0, self.FADE_FRAMES, dtype=np.float32)[:, None]
+    
+    def load_bank(self, bank):
+        """Swap in a new bank; playing voices finish on the old samples"""
+        old, self.bank = self.bank, bank
+        old.release()
+        logger.info(f"Sample bank loaded: {sum(s is not None for s in bank.samples)} pads"
+                    f"{' (memory locked)' if bank.pinned else ''}")
+    
+    def set_volume(self, value):
+        """Sampler level (0-100, square-law like the faders)"""
+        self.volume = (value / 100.0) ** 2
+    
+    def trigger(self, pad, velocity=127):
+        """Any thread: play a pad at the next block (velocity 1-127)"""
+        self._commands.append((pad, velocity / 127.0, time.perf_counter_ns()))
+    
+    def stop(self, pad):
+        """Any thread: fade out every voice playing a pad (MUTE mode)"""
+        self._commands.append((pad, 0.0, time.perf_counter_ns()))
+    
+    def render(self, out):
+        """Render thread: add this block of pad audio into out (frames, channels)"""
+        n = len(out)
+        now = time.perf_counter_ns()
+        last, self._last_render_ns = self._last_render_ns, now
+        commands = self._commands
+        while commands:
+            pad, gain, stamp = commands.popleft()
+            if gain == 0.0:
+                self._release(pad)
+                continue
+            offset = 0
+            if last is not None and stamp > last:
+                offset = min(n - 1, (stamp - last) * self.sample_rate // 1_000_000_000)
+            self._start(pad, gain, int(offset))
+        
+        if not self.active:
+            return out
+        scratch, volume = self._scratch, self.volume
+        active = 0
+        for voice in self.voices:
+            if voice.tail is not None:
+                self._render_tail(voice, out, scratch, volume)
+            sample = voice.sample
+            if sample is None:
+                continue
+            start, pos = voice.delay, voice.pos
+            count = min(n - start, len(sample) - pos)
+            if count > 0:
+                work = scratch[:count]
+                np.multiply(sample[pos:pos + count], voice.gain * volume, out=work)
+                out[start:start + count] += work
+                voice.pos = pos + count
+            voice.delay = 0
+            if voice.pos >= len(sample):
+                voice.sample = None
+                voice.pad = -1
+            else:
+                active += 1
+        self.active = active + sum(1 for v in self.voices if v.tail is not None)
+        return out
+    
+    def _start(self, pad, gain, offset):
+        if not 0 <= pad < len(self.bank.samples):
+            return
+        sample = self.bank.samples[pad]
+        if sample is None:
+            return
+        voice = None
+        oldest = None
+        for candidate in self.voices:
+            if candidate.sample is None:
+                voice = candidate
+                break
+            if oldest is None or candidate.serial < oldest.serial:
+                oldest = candidate
+        if voice is None:
+            voice = oldest
+            self.steals += 1
+            self._fade_out(voice)
+        self._serial += 1
+        voice.pad = pad
+        voice.sample = sample
+        voice.pos = 0
+        voice.gain = gain
+        voice.delay = offset
+        voice.serial = self._serial
+        self.active += 1
+    
+    def _release(self, pad):
+        for voice in self.voices:
+            if voice.sample is not None and voice.pad == pad:
+                self._fade_out(voice)
+                voice.sample = None
+                voice.pad = -1
+        self.active = max(self.active, 1)
+    
+    def _fade_out(self, voice):
+        """Move a voice's sound into its tail, replacing any older tail"""
+        voice.tail = voice.sample
+        voice.tail_pos = voice.pos
+        voice.tail_gain = voice.gain
+        voice.tail_left = self.FADE_FRAMES
+    
+    def _render_tail(self, voice, out, scratch, volume):
+        tail, pos, left = voice.tail, voice.tail_pos, voice.tail_left
+        count = min(len(out), left, len(tail) - pos)
+        if count > 0:
+            done = self.FADE_FRAMES - left
+            work = scratch[:count]
+            np.multiply(tail[pos:pos + count], voice.tail_gain * volume, out=work)
+            work *= self._fade[done:done + count]
+            out[:count] += work
+        voice.tail_pos = pos + count
+        voice.tail_left = left - count
+        if count <= 0 or voice.tail_left <= 0 or voice.tail_pos >= len(tail):
+            voice.tail = None
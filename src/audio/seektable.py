@@ -0,0 +1,267 @@
+"""
+Seek tables for compressed streams: byte offset and sample position of every frame
+"""
+
+import hashlib
+import logging
+import os
+import threading
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Bump when table layout or positions change so stale files are rebuilt
+SEEK_TABLE_VERSION = 1
+DEFAULT_DIR = os.path.expanduser('~/.violet_dj/seek_tables')
+
+# Frames decoded and discarded before the target: one for the overlap-add
+# with the previous frame, plus however many hold the up to 511 bytes a
+# layer III frame may borrow from the main data of earlier frames (its bit
+# reservoir), which excludes their header and side information
+OVERLAP_FRAMES = 1
+RESERVOIR_BYTES = {'mp3': 511}
+FRAME_OVERHEAD_BYTES = {'mp3': 38}
+
+# Decoder delay FFmpeg adds to the encoder delay of a LAME/Info header
+MP3_DECODER_DELAY = 529
+
+# Tables kept in memory (most recently loaded tracks)
+MEMORY_TABLES = 16
+
+MP3_BITRATES = {
+    # (MPEG-1?, layer): kbit/s by index 1-14
+    (True, 1): [32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+ADTS_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050,
+                     16000, 12000, 11025, 8000, 7350]
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+class SeekTable:
+    """Start offset and first sample of each frame, for one compressed file
+    
+    samples count decoded output frames from the start of the stream as a
+    full decode would return them, so the encoder delay that decode trims
+    is already subtracted (early frames can be negative).
+    """
+    
+    def __init__(self, format, sample_rate, offsets, samples, total):
+        self.format = format
+        self.sample_rate = sample_rate
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.samples = np.asarray(samples, dtype=np.int64)
+        self.total = int(total)
+    
+    def lookup(self, frame):
+        """(byte offset, sample position) to start decoding from to reach frame
+        
+        None when the target is within the first frames, where the stream
+        should simply be decoded from the start.
+        """
+        i = int(np.searchsorted(self.samples, frame, side='right')) - 1 - OVERLAP_FRAMES
+        reservoir = RESERVOIR_BYTES.get(self.format, 0)
+        if reservoir:
+            overhead = FRAME_OVERHEAD_BYTES[self.format]
+            first, start = i, self.offsets[i]
+            while i > 0 and start - self.offsets[i] - overhead * (first - i) < reservoir:
+                i -= 1
+        if i <= 0 or self.samples[i] < 0:
+            return None
+        return int(self.offsets[i]), int(self.samples[i])
+    
+    def save(self, path):
+        """Write the table as .npz (atomically)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp.npz"
+        np.savez(tmp, offsets=self.offsets, samples=self.samples,
+                 meta=np.array([SEEK_TABLE_VERSION, self.sample_rate, self.total]),
+                 format=np.array(self.format))
+        os.replace(tmp, path)
+    
+    @classmethod
+    def load(cls, path):
+        """Table saved by save(), or None if missing or from another version"""
+        try:
+            with np.load(path, allow_pickle=False) as f:
+                version, sample_rate, total = (int(v) for v in f['meta'])
+                if version != SEEK_TABLE_VERSION:
+                    return None
+                return cls(str(f['format']), sample_rate, f['offsets'], f['samples'], total)
+        except (OSError, KeyError, ValueError):
+            return None
+    
+    def __repr__(self):
+        return (f"SeekTable({self.format}, {len(self.offsets)} frames, "
+                f"{self.total / self.sample_rate:.1f} s)")
+
+
+def _skip_id3(data):
+    """Length of a leading ID3v2 tag"""
+    if len(data) < 10 or data[:3] != b'ID3':
+        return 0
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+def _mp3_header(data, pos):
+    """(frame bytes, samples, sample rate, version, layer, mono) of a frame header, or None"""
+    b1, b2, b3 = data[pos + 1], data[pos + 2], data[pos + 3]
+    if data[pos] != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version, layer_bits = (b1 >> 3) & 3, (b1 >> 1) & 3
+    bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 3
+    if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    layer = 4 - layer_bits
+    mpeg1 = version == 3
+    bitrate = MP3_BITRATES[(mpeg1, layer)][bitrate_index - 1] * 1000
+    rate = MP3_SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        return (12 * bitrate // rate + padding) * 4, 384, rate, version, layer, b3 >> 6 == 3
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // rate + padding, 576, rate, version, layer, b3 >> 6 == 3
+    return 144 * bitrate // rate + padding, 1152, rate, version, layer, b3 >> 6 == 3
+
+
+def _mp3_info_skip(data, pos, version, mono):
+    """(is a Xing/Info frame, samples a full decode trims at the start and end)"""
+    side = (17 if mono else 32) if version == 3 else (9 if mono else 17)
+    tag = pos + 4 + side
+    if data[tag:tag + 4] not in (b'Xing', b'Info'):
+        return data[pos + 36:pos + 40] == b'VBRI', 0, 0
+    flags = int.from_bytes(data[tag + 4:tag + 8], 'big')
+    lame = tag + 8 + 4 * bool(flags & 1) + 4 * bool(flags & 2) + 100 * bool(flags & 4) \
+        + 4 * bool(flags & 8)
+    if len(data) < lame + 24 or data[lame:lame + 4] not in (b'LAME', b'Lavf', b'Lavc'):
+        return True, 0, 0
+    delay = (data[lame + 21] << 4) | (data[lame + 22] >> 4)
+    padding = ((data[lame + 22] & 0xF) << 8) | data[lame + 23]
+    return True, delay + MP3_DECODER_DELAY, max(0, padding - MP3_DECODER_DELAY)
+
+
+def scan_mp3(data):
+    """SeekTable for MPEG audio bytes, or None if no consistent frame stream is found"""
+    pos = _skip_id3(data)
+    end = len(data) - 4
+    offsets, samples = [], []
+    lock = None
+    skip = padding = 0
+    count = 0
+    while pos < end:
+        header = _mp3_header(data, pos)
+        if header is None or (lock is not None and header[2:5] != lock):
+            # Lost sync (junk, a trailing tag or a false sync); search forward
+            pos += 1
+            continue
+        size, frame_samples, rate = header[0], header[1], header[2]
+        if lock is None:
+            # A first match only counts if the next frame follows it directly
+            following = pos + size
+            if following < end and _mp3_header(data, following) is None:
+                pos += 1
+                continue
+            lock = header[2:5]
+            info, skip, padding = _mp3_info_skip(data, pos, header[3], header[5])
+            if info:
+                pos += size
+                continue
+        offsets.append(pos)
+        samples.append(count - skip)
+        count += frame_samples
+        pos += size
+    if not offsets:
+        return None
+    return SeekTable('mp3', lock[0], offsets, samples, count - skip - padding)
+
+
+def scan_adts(data):
+    """SeekTable for an ADTS AAC stream, or None"""
+    pos = _skip_id3(data)
+    end = len(data) - 7
+    offsets, samples = [], []
+    rate = None
+    count = 0
+    while pos < end:
+        if data[pos] != 0xFF or data[pos + 1] & 0xF6 != 0xF0:
+            pos += 1
+            continue
+        size = ((data[pos + 3] & 3) << 11) | (data[pos + 4] << 3) | (data[pos + 5] >> 5)
+        rate_index = (data[pos + 2] >> 2) & 0xF
+        if size < 7 or rate_index >= len(ADTS_SAMPLE_RATES):
+            pos += 1
+            continue
+        if rate is None:
+            rate = ADTS_SAMPLE_RATES[rate_index]
+        offsets.append(pos)
+        samples.append(count)
+        count += 1024 * ((data[pos + 6] & 3) + 1)
+        pos += size
+    if not offsets:
+        return None
+    return SeekTable('aac', rate, offsets, samples, count)
+
+
+SCANNERS = {'.mp3': scan_mp3, '.aac': scan_adts}
+
+
+def build_seek_table(file_path):
+    """Scan a file's frame headers (no decoding); None for unsupported formats"""
+    scanner = SCANNERS.get(os.path.splitext(file_path)[1].lower())
+    if scanner is None:
+        return None
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    return scanner(data)
+
+
+def _table_path(file_path, cache_dir):
+    path = os.path.abspath(file_path)
+    st = os.stat(path)
+    ident = f"{path}\0{st.st_mtime_ns}\0{st.st_size}"
+    return os.path.join(cache_dir, hashlib.sha1(ident.encode('utf-8')).hexdigest() + '.npz')
+
+
+def load_seek_table(file_path, cache_dir=DEFAULT_DIR):
+    """Seek table for file_path: from memory, then disk, else scanned and saved
+    
+    Tables are keyed by path, mtime and size like the PCM cache, and kept
+    in memory because every cue jump opens a fresh decoder.
+    """
+    if os.path.splitext(file_path)[1].lower() not in SCANNERS:
+        return None
+    try:
+        path = _table_path(file_path, cache_dir)
+    except OSError:
+        return None
+    with _tables_lock:
+        if path in _tables:
+            _tables[path] = _tables.pop(path)
+            return _tables[path]
+    table = SeekTable.load(path)
+    if table is None:
+        try:
+            table = build_seek_table(file_path)
+        except OSError as e:
+            logger.warning(f"Could not scan {file_path} for seeking: {e}")
+            return None
+        if table is not None:
+            try:
+                table.save(path)
+            except OSError as e:
+                logger.warning(f"Could not save seek table: {e}")
+            logger.info(f"Built seek table for {file_path}: {table}")
+    with _tables_lock:
+        _tables[path] = table
+        while len(_tables) > MEMORY_TABLES:
+            del _tables[next(iter(_tables))]
+    return table
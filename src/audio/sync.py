@@ -0,0 +1,143 @@
+"""
+Beat sync: tempo-master clock and per-block phase alignment of decks
+"""
+
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class BeatGrid:
+    """Constant-tempo grid fitted to a track's detected beats
+    
+    A least-squares line through the beat times gives a period far more
+    precise than the tempo estimate alone and irons out per-beat detection
+    jitter, so phase is a closed-form function of position.
+    """
+    
+    def __init__(self, anchor, period):
+        self.anchor = anchor
+        self.period = period
+    
+    @property
+    def bpm(self):
+        """Tempo of the grid at the original speed"""
+        return 60.0 / self.period
+    
+    @classmethod
+    def from_analysis(cls, analysis):
+        """Grid for a TrackAnalysis, or None when it has no usable tempo"""
+        beats = analysis.downbeats if len(analysis.beats) < 2 else analysis.beats
+        if len(beats) >= 8:
+            period, anchor = np.polyfit(np.arange(len(beats)), beats, 1)
+            if period > 0:
+                return cls(float(anchor), float(period))
+        if analysis.bpm:
+            return cls(float(beats[0]) if len(beats) else 0.0, 60.0 / analysis.bpm)
+        return None
+    
+    def beat_at(self, seconds):
+        """Beat number (fractional) at a track time"""
+        return (seconds - self.anchor) / self.period
+
+
+class MasterClock:
+    """Tempo and beat phase every synced deck follows
+    
+    Slaved to the master deck while it plays; otherwise free-runs at the
+    last tempo so synced decks keep time when the master stops.
+    """
+    
+    def __init__(self, bpm=120.0):
+        self.bpm = bpm
+        self.beat = 0.0
+    
+    def advance(self, seconds):
+        """Free-run for seconds"""
+        self.beat += seconds * self.bpm / 60.0
+
+
+class SyncEngine:
+    """Keeps synced decks on the master clock's tempo and beat phase
+    
+    Runs once per block on the render thread. Each synced deck's speed is
+    the tempo ratio to the master plus a small proportional nudge that
+    pulls its phase error to zero over CORRECTION_SECONDS. Positions are
+    tracked in fractional source frames, so the correction is sub-block
+    and sub-sample; because the loop is closed, drift cannot accumulate.
+    """
+    
+    CORRECTION_SECONDS = 0.5
+    MAX_NUDGE = 0.1
+    
+    def __init__(self, decks, sample_rate):
+        self.decks = decks
+        self.sample_rate = sample_rate
+        self.clock = MasterClock()
+        self.master = None
+        self.synced = [False] * len(decks)
+        self._grids = [None] * len(decks)
+        self._analyses = [None] * len(decks)
+    
+    def set_master(self, deck):
+        """Make a deck the tempo master (None for the free-running clock)"""
+        self.master = deck
+        if deck is not None:
+            self.synced[deck] = False
+        logger.info(f"Tempo master: {'clock' if deck is None else f'deck {deck + 1}'}")
+    
+    def set_sync(self, deck, enabled):
+        """Lock a deck to the master clock"""
+        self.synced[deck] = enabled
+        if not enabled:
+            return
+        if self.master == deck:
+            self.master = None
+        if self.master is None:
+            # Like the hardware: the first other playing deck becomes master
+            for other in self.decks:
+                if other.index != deck and other.is_playing and self.grid(other) is not None:
+                    self.set_master(other.index)
+                    break
+    
+    def grid(self, deck):
+        """Beat grid for a deck's current analysis (refitted when it changes)"""
+        i = deck.index
+        if deck.analysis is not self._analyses[i]:
+            self._analyses[i] = deck.analysis
+            self._grids[i] = BeatGrid.from_analysis(deck.analysis) if deck.analysis else None
+        return self._grids[i]
+    
+    def phase_error(self, deck):
+        """Beats the deck trails the master clock by, wrapped to [-0.5, 0.5)"""
+        grid = self.grid(deck)
+        if grid is None:
+            return None
+        error = self.clock.beat - grid.beat_at(deck.position / self.sample_rate)
+        return (error + 0.5) % 1.0 - 0.5
+    
+    def update(self, frames):
+        """Advance the clock and set every synced deck's speed for the next block"""
+        clock = self.clock
+        master = self.decks[self.master] if self.master is not None else None
+        master_grid = self.grid(master) if master is not None else None
+        if master is not None and master.is_playing and master_grid is not None:
+            clock.bpm = master_grid.bpm * master.stretch.ratio
+            clock.beat = master_grid.beat_at(master.position / self.sample_rate)
+        else:
+            clock.advance(frames / self.sample_rate)
+        
+        for deck in self.decks:
+            if not self.synced[deck.index] or deck is master or not deck.is_playing:
+                continue
+            grid = self.grid(deck)
+            if grid is None:
+                continue
+            error = self.phase_error(deck)
+            # Source frames to gain, spread over the correction window
+            error_frames = error * grid.period * self.sample_rate
+            nudge = error_frames / (self.CORRECTION_SECONDS * self.sample_rate)
+            nudge = min(self.MAX_NUDGE, max(-self.MAX_NUDGE, nudge))
+            deck.stretch.set_ratio(clock.bpm / grid.bpm + nudge)
@@ -0,0 +1,280 @@
+"""
+Streaming time-stretch for the tempo fader: key-locked WSOLA and varispeed
+"""
+
+import functools
+
+import numpy as np
+
+from src.audio.effects.base import MAX_BLOCK
+
+# scipy.fft once loaded. numpy.fft rebuilds its twiddle factors on every
+# call; scipy's pocketfft keeps plans cached by size and can transform in
+# place of its input. Importing it takes about a third of a second, so it
+# happens on first use or in preload(), not when the engine is imported
+_fft = None
+
+
+def _load_fft():
+    global _fft
+    import scipy.fft
+    _fft = scipy.fft
+    return _fft
+
+
+def preload():
+    """Import scipy.fft now (from a background thread) so the first key-locked hop doesn't"""
+    if _fft is None:
+        _load_fft()
+
+
+@functools.lru_cache(maxsize=None)
+def hann_window(size):
+    """Periodic Hann window of size frames (sums to one at 50% overlap), shared read-only"""
+    window = (0.5 - 0.5 * np.cos(2.0 * np.pi * np.arange(size) / size)).astype(np.float32)
+    window.flags.writeable = False
+    return window
+
+
+def fft_size(frames):
+    """Smallest power of two holding frames"""
+    return 1 << max(0, int(frames - 1).bit_length())
+
+
+class TimeStretcher:
+    """Block-by-block tempo change for one deck
+    
+    With key lock on, WSOLA: Hann-windowed frames are taken every
+    ratio * hop input frames and overlap-added every hop output frames, each
+    shifted by up to TOLERANCE frames so it lines up with the natural
+    continuation of the previous frame; pitch is preserved. With key lock
+    off, linear-interpolation varispeed, so pitch follows tempo like a
+    turntable.
+    
+    Frame, hop, search and FFT sizes never depend on the ratio, so moving
+    the tempo fader only changes read positions: the window and work
+    buffers are allocated once, and scipy.fft reuses its cached plan for
+    the one transform size. Until the tempo first leaves 1.0 the deck
+    bypasses the stretcher and only feeds it recent history, so engaging it
+    mid-track is seamless.
+    """
+    
+    FRAME = 1024
+    TOLERANCE = 256
+    INPUT_CAPACITY = 4 * MAX_BLOCK
+    MIN_RATIO, MAX_RATIO = 0.5, 2.0
+    HOLD_SPEED = 0.1
+    
+    def __init__(self, channels=2):
+        self.channels = channels
+        self.ratio = 1.0
+        self.bend = 1.0
+        self.scratch = None
+        self.key_lock = True
+        self.engaged = False
+        
+        n, t = self.FRAME, self.TOLERANCE
+        self.hop = n // 2
+        self.window = hann_window(n)[:, None]
+        self._template_window = hann_window(n).astype(np.float64)
+        self.nfft = fft_size(n + 2 * t)
+        
+        self.input = np.zeros((self.INPUT_CAPACITY, channels), dtype=np.float32)
+        self.out = np.zeros((MAX_BLOCK + n, channels), dtype=np.float32)
+        self._rates = np.zeros(MAX_BLOCK + n)
+        self.ola = np.zeros((n, channels), dtype=np.float32)
+        self._frame = np.zeros((n, channels), dtype=np.float32)
+        # Search region and windowed template, zero-padded to nfft and
+        # transformed together
+        self._pair = np.zeros((2, self.nfft))
+        self._ramp = np.arange(MAX_BLOCK, dtype=np.float64)
+        self._pos = np.zeros(MAX_BLOCK)
+        self._index = np.zeros(MAX_BLOCK, dtype=np.intp)
+        self._next = np.zeros((MAX_BLOCK, channels), dtype=np.float32)
+        self.reset()
+    
+    def reset(self):
+        """Forget all state (new track); history before the start is silence"""
+        self.input[:self.TOLERANCE] = 0.0
+        self.filled = self.TOLERANCE
+        self.end = None
+        self.cont = float(self.TOLERANCE)
+        self.nominal = self.cont
+        self.ready = 0
+        self.advance = 0.0
+        self._primed = False
+        self.engaged = self.ratio != 1.0
+    
+    def set_ratio(self, ratio):
+        """Playback speed relative to the track (1.0 = original tempo)"""
+        self.ratio = min(self.MAX_RATIO, max(self.MIN_RATIO, float(ratio)))
+        if self.ratio != 1.0:
+            self.engaged = True
+    
+    @property
+    def rate(self):
+        """Source frames per output frame right now (tempo, jog bend or scratch speed)"""
+        if self.scratch is not None:
+            return self.scratch
+        return self.ratio * self.bend
+    
+    def set_jog(self, bend=1.0, scratch=None):
+        """Jog wheel: bend multiplies the tempo; scratch sets an absolute forward speed"""
+        if (scratch is None) != (self.scratch is None):
+            # Leaving or entering varispeed: WSOLA restarts from the next unplayed frame
+            self._primed = False
+            self.nominal = self.cont
+        self.bend = bend
+        self.scratch = None if scratch is None else min(self.MAX_RATIO, scratch)
+        if bend != 1.0 or scratch is not None:
+            self.engaged = True
+    
+    def set_key_lock(self, enabled):
+        """Keep the original pitch when the tempo changes"""
+        if enabled != self.key_lock:
+            # The other mode picks up from the next unplayed input frame
+            self._primed = False
+            self.nominal = self.cont
+            self.key_lock = enabled
+    
+    def observe(self, frames):
+        """Keep the tail of bypassed audio as history for a later engage"""
+        t, n = self.TOLERANCE, len(frames)
+        if n >= t:
+            self.input[:t] = frames[n - t:]
+        elif n:
+            self.input[:t - n] = self.input[n:t]
+            self.input[t - n:t] = frames
+    
+    def at_end(self, source):
+        """True once the source has ended and every input frame has been played"""
+        return self.end is not None and source.at_end and self.cont >= self.end
+    
+    def read_into(self, source, block):
+        """Fill block with stretched audio from source; returns frames written
+        
+        advance is then the number of source frames those frames cover.
+        """
+        n = len(block)
+        while self.ready < n:
+            # Scratching always varispeeds: pitch should follow the platter
+            if self.key_lock and self.scratch is None:
+                if not self._hop(source):
+                    break
+            else:
+                if not self._resample(source, self.out[self.ready:n]):
+                    break
+                self._rates[self.ready:n] = self.rate
+                self.ready = n
+        
+        frames = min(n, self.ready)
+        block[:frames] = self.out[:frames]
+        if self.scratch is not None and self.scratch < self.HOLD_SPEED:
+            # A held platter is silent, not a frozen sample
+            block[:frames] *= self.scratch / self.HOLD_SPEED
+        # Source frames behind the emitted output, at the ratio each was made with
+        self.advance = float(self._rates[:frames].sum())
+        remaining = self.ready - frames
+        if remaining:
+            self.out[:remaining] = self.out[frames:self.ready]
+            self._rates[:remaining] = self._rates[frames:self.ready]
+        self.ready = remaining
+        if self.end is not None and self.cont >= self.end:
+            # Drop the zero padding past the end of the track
+            frames = min(frames, max(0, n - int(self.cont - self.end)))
+        return frames
+    
+    def _fill(self, source, need):
+        """Read until input holds need frames; pads with silence after the end"""
+        while self.filled < need:
+            got = source.read_into(self.input[self.filled:need])
+            self.filled += got
+            if self.filled >= need:
+                break
+            if not source.at_end:
+                # Feeder behind: output what we have and retry next block
+                return False
+            if self.end is None:
+                self.end = self.filled
+            self.input[self.filled:need] = 0.0
+            self.filled = need
+        return True
+    
+    def _hop(self, source):
+        """Overlap-add one WSOLA frame, appending hop frames to out"""
+        n, t, hop = self.FRAME, self.TOLERANCE, self.hop
+        start = int(round(self.nominal)) - t
+        cont = int(round(self.cont))
+        if not self._fill(source, max(start + n + 2 * t, cont + n)):
+            return False
+        
+        if self._primed:
+            # Best match to the natural continuation within +/-TOLERANCE
+            fft = _fft or _load_fft()
+            region, template = self._pair
+            np.sum(self.input[start:start + n + 2 * t], axis=1, out=region[:n + 2 * t])
+            np.sum(self.input[cont:cont + n], axis=1, out=template[:n])
+            template[:n] *= self._template_window
+            # Both spectra from one call; the correlation is then formed in
+            # them and inverted in place
+            spectrum, reference = fft.rfft(self._pair, axis=1)
+            np.conjugate(reference, out=reference)
+            spectrum *= reference
+            corr = fft.irfft(spectrum, self.nfft, overwrite_x=True)
+            chosen = start + int(np.argmax(corr[:2 * t + 1]))
+        else:
+            # Treat the previous frame as ending exactly at cont so the first
+            # output continues the bypassed (or other-mode) audio
+            chosen = cont
+            np.multiply(self.input[cont:cont + hop], self.window[hop:], out=self.ola[:hop])
+            self.ola[hop:] = 0.0
+            self.nominal = float(cont)
+            self._primed = True
+        
+        np.multiply(self.input[chosen:chosen + n], self.window, out=self._frame)
+        self.ola += self._frame
+        self.out[self.ready:self.ready + hop] = self.ola[:hop]
+        self._rates[self.ready:self.ready + hop] = self.rate
+        self.ready += hop
+        self.ola[:hop] = self.ola[hop:]
+        self.ola[hop:] = 0.0
+        
+        self.cont = float(chosen + hop)
+        self.nominal += hop * self.rate
+        self._compact()
+        return True
+    
+    def _resample(self, source, out):
+        """Varispeed: linear interpolation at ratio input frames per output frame"""
+        n, rate = len(out), self.rate
+        if not self._fill(source, int(self.cont + (n - 1) * rate) + 2):
+            return False
+        pos, index, nxt = self._pos[:n], self._index[:n], self._next[:n]
+        np.multiply(self._ramp[:n], rate, out=pos)
+        pos += self.cont
+        np.copyto(index, pos, casting='unsafe')
+        np.subtract(pos, index, out=pos)
+        np.take(self.input, index, axis=0, out=out)
+        index += 1
+        np.take(self.input, index, axis=0, out=nxt)
+        nxt -= out
+        nxt *= pos[:, None]
+        out += nxt
+        
+        self.cont += n * rate
+        self.nominal = self.cont
+        self._compact()
+        return True
+    
+    def _compact(self):
+        """Drop input no longer reachable by the next frame or search region"""
+        keep_from = int(min(self.nominal - self.TOLERANCE, self.cont)) - self.TOLERANCE
+        if keep_from < self.FRAME:
+            return
+        remaining = self.filled - keep_from
+        self.input[:remaining] = self.input[keep_from:self.filled]
+        self.filled = remaining
+        self.nominal -= keep_from
+        self.cont -= keep_from
+        if self.end is not None:
+            self.end -= keep_from
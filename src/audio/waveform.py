@@ -0,0 +1,162 @@
+"""
+Multi-resolution waveform peaks (min/max/RMS pyramids) for deck display
+"""
+
+import numpy as np
+
+# Bump when the peak layout changes so stored pyramids are rebuilt
+WAVEFORM_VERSION = 1
+
+# Source frames per finest bin, the reduction between levels, and the size
+# at which the pyramid stops (coarser than any overview needs)
+BASE_FRAMES = 256
+LEVEL_FACTOR = 2
+MIN_BINS = 512
+
+READ_FRAMES = 1 << 16
+
+
+def _quantize(mins, maxs, mean_squares):
+    """Float bins to int8 min/max and uint8 RMS"""
+    q_min = np.round(np.clip(mins, -1.0, 1.0) * 127.0).astype(np.int8)
+    q_max = np.round(np.clip(maxs, -1.0, 1.0) * 127.0).astype(np.int8)
+    q_rms = np.round(np.clip(np.sqrt(mean_squares), 0.0, 1.0) * 255.0).astype(np.uint8)
+    return q_min, q_max, q_rms
+
+
+class WaveformPeaks:
+    """Min/max/RMS pyramid of a track
+    
+    levels[i] is a (mins, maxs, rms) triple of int8/int8/uint8 arrays with
+    one entry per base_frames * factor ** i source frames. A 10-minute
+    track costs well under a megabyte across all levels.
+    """
+    
+    def __init__(self, sample_rate, levels, base_frames=BASE_FRAMES, factor=LEVEL_FACTOR):
+        self.sample_rate = sample_rate
+        self.levels = levels
+        self.base_frames = base_frames
+        self.factor = factor
+    
+    @property
+    def duration(self):
+        """Track length in seconds (to bin resolution)"""
+        return len(self.levels[0][0]) * self.base_frames / self.sample_rate
+    
+    def frames_per_bin(self, level):
+        """Source frames covered by one bin at a level"""
+        return self.base_frames * self.factor ** level
+    
+    def level_for(self, seconds_per_pixel):
+        """Coarsest level that still has at least one bin per pixel"""
+        frames = seconds_per_pixel * self.sample_rate
+        level = 0
+        while level + 1 < len(self.levels) and self.frames_per_bin(level + 1) <= frames:
+            level += 1
+        return level
+    
+    def window(self, start, stop, width):
+        """(mins, maxs, rms) per pixel column for [start, stop) seconds, scaled to -1..1
+        
+        Columns outside the track are zero. Only the bins under the visible
+        window are touched, so the cost depends on width, not track length.
+        """
+        mins = np.zeros(width, dtype=np.float32)
+        maxs = np.zeros(width, dtype=np.float32)
+        rms = np.zeros(width, dtype=np.float32)
+        if width <= 0 or stop <= start:
+            return mins, maxs, rms
+        
+        level = self.level_for((stop - start) / width)
+        lo, hi, level_rms = self.levels[level]
+        bins_per_second = self.sample_rate / self.frames_per_bin(level)
+        edges = np.floor(np.linspace(start, stop, width + 1) * bins_per_second).astype(np.intp)
+        first = edges[:-1]
+        visible = (first >= 0) & (first < len(lo))
+        if not visible.any():
+            return mins, maxs, rms
+        
+        # reduceat over the visible columns, cut at the window's right edge so
+        # the last column does not run on to the end of the track; a column
+        # narrower than a bin repeats the bin it falls in
+        columns = np.flatnonzero(visible)
+        starts = first[columns]
+        end = min(len(lo), max(edges[columns[-1] + 1], starts[-1] + 1))
+        mins[columns] = np.minimum.reduceat(lo[:end], starts) / 127.0
+        maxs[columns] = np.maximum.reduceat(hi[:end], starts) / 127.0
+        rms[columns] = np.maximum.reduceat(level_rms[:end], starts) / 255.0
+        return mins, maxs, rms
+    
+    def to_blobs(self):
+        """Concatenated (mins, maxs, rms) bytes of every level"""
+        return tuple(np.concatenate([level[i] for level in self.levels]).tobytes()
+                     for i in range(3))
+    
+    @classmethod
+    def from_blobs(cls, sample_rate, bins, mins, maxs, rms,
+                   base_frames=BASE_FRAMES, factor=LEVEL_FACTOR):
+        """Rebuild a pyramid stored by to_blobs(); bins is the level-0 length"""
+        arrays = (np.frombuffer(mins, dtype=np.int8), np.frombuffer(maxs, dtype=np.int8),
+                  np.frombuffer(rms, dtype=np.uint8))
+        levels, offset = [], 0
+        while True:
+            levels.append(tuple(a[offset:offset + bins] for a in arrays))
+            offset += bins
+            if offset >= len(arrays[0]):
+                break
+            bins = -(-bins // factor)
+        return cls(sample_rate, levels, base_frames, factor)
+
+
+def build_pyramid(mins, maxs, mean_squares, factor=LEVEL_FACTOR, min_bins=MIN_BINS):
+    """Quantized levels from float level-0 bins, halving until min_bins"""
+    levels = [_quantize(mins, maxs, mean_squares)]
+    while len(mins) > min_bins:
+        pad = -len(mins) % factor
+        if pad:
+            # Pad with neutral values so the last partial group reduces cleanly
+            mins = np.concatenate([mins, np.full(pad, mins[-1])])
+            maxs = np.concatenate([maxs, np.full(pad, maxs[-1])])
+            mean_squares = np.concatenate([mean_squares, np.full(pad, mean_squares[-1])])
+        mins = mins.reshape(-1, factor).min(axis=1)
+        maxs = maxs.reshape(-1, factor).max(axis=1)
+        mean_squares = mean_squares.reshape(-1, factor).mean(axis=1)
+        levels.append(_quantize(mins, maxs, mean_squares))
+    return levels
+
+
+def compute_peaks(source, sample_rate, channels=2, base_frames=BASE_FRAMES):
+    """Build a WaveformPeaks from any source with read_into(out) (decoder or ArraySource)
+    
+    Reads in large chunks; each chunk is reduced to bins across all channels
+    so no mono copy of the track is ever held.
+    """
+    buffer = np.zeros((READ_FRAMES, channels), dtype=np.float32)
+    chunks_min, chunks_max, chunks_ms = [], [], []
+    carry = 0
+    
+    while True:
+        frames = source.read_into(buffer[carry:])
+        total = carry + frames
+        if frames == 0 or source.at_end:
+            whole = -(-total // base_frames) * base_frames
+            buffer[total:whole] = 0.0
+            total = whole
+        bins = total // base_frames
+        if bins:
+            grouped = buffer[:bins * base_frames].reshape(bins, base_frames * channels)
+            chunks_min.append(grouped.min(axis=1))
+            chunks_max.append(grouped.max(axis=1))
+            chunks_ms.append(np.einsum('ij,ij->i', grouped, grouped) / grouped.shape[1])
+        carry = total - bins * base_frames
+        if carry:
+            buffer[:carry] = buffer[bins * base_frames:total]
+        if frames == 0 or source.at_end:
+            break
+    
+    if not chunks_min:
+        empty = np.zeros(1, dtype=np.float32)
+        return WaveformPeaks(sample_rate, build_pyramid(empty, empty, empty), base_frames)
+    levels = build_pyramid(np.concatenate(chunks_min), np.concatenate(chunks_max),
+                           np.concatenate(chunks_ms))
+    return WaveformPeaks(sample_rate, levels, base_frames)
@@ -0,0 +1,327 @@
+"""
+Low-latency MIDI input dispatch into the audio engine
+"""
+
+import logging
+import time
+
+from src import instrumentation
+from src.audio.cues import HOT_CUES
+from src.audio.loop import LOOP_BEATS
+
+logger = logging.getLogger(__name__)
+
+# MIDI status nibbles by message kind
+MESSAGE_TYPES = {
+    'note_off': 0x80,
+    'note': 0x90,
+    'cc': 0xB0,
+    'pitchbend': 0xE0,
+}
+
+
+# Relative encoder formats: signed tick count from a 7-bit value
+RELATIVE_ENCODINGS = {
+    'offset': lambda value: value - 64,                               # 64 = no motion
+    'twos': lambda value: value - 128 if value > 64 else value,        # 127 = -1
+    'sign_magnitude': lambda value: -(value & 0x3F) if value & 0x40 else value,
+}
+
+# Actions fed signed deltas rather than positions, and their default encoding
+RELATIVE_ACTIONS = {'jog': 'offset'}
+
+
+def table_index(status, number):
+    """Flat table slot for a status byte (type + channel) and data byte"""
+    return ((status & 0x7F) << 7) | (number & 0x7F)
+
+
+class LatencyStats:
+    """Running latency counter in nanoseconds (count, mean, max, histogram)"""
+    
+    # Histogram bucket upper bounds in microseconds; the last bucket is open
+    BUCKETS_US = (50, 100, 250, 500, 1000, 2000, 5000, 10000)
+    
+    def __init__(self):
+        self.reset()
+    
+    def reset(self):
+        """Clear all counters"""
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * (len(self.BUCKETS_US) + 1)
+    
+    def record(self, elapsed_ns):
+        """Add one measurement"""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        us = elapsed_ns // 1000
+        for i, bound in enumerate(self.BUCKETS_US):
+            if us < bound:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+    
+    def as_dict(self):
+        """Snapshot for logging and the UI"""
+        return {
+            'count': self.count,
+            'mean_us': self.total_ns / self.count / 1000.0 if self.count else 0.0,
+            'max_us': self.max_ns / 1000.0,
+            'histogram_us': dict(zip([f"<{b}" for b in self.BUCKETS_US] + ['more'],
+                                     self.histogram)),
+        }
+
+
+def _scaled(setter, lo=0.0, hi=100.0):
+    """7-bit value onto lo..hi"""
+    span = (hi - lo) / 127.0
+    return lambda number, value: setter(lo + value * span)
+
+
+def _pressed(action):
+    """Run action on button press (note-on or CC with a non-zero value)"""
+    def handler(number, value):
+        if value:
+            action()
+    return handler
+
+
+def _held(setter):
+    """Pass button state (pressed / released) to setter"""
+    return lambda number, value: setter(value > 0)
+
+
+def resolve_action(engine, action):
+    """Handler(number, value) for an action name such as 'channel1.fader'
+    
+    Actions are resolved to bound engine methods once, at compile time, so
+    dispatch is a table load and one call. The mixer is the exception: a
+    block size change replaces engine.mixer, so its handlers look it up
+    when they run.
+    """
+    target, _, control = action.partition('.')
+    
+    if target == 'mixer':
+        setters = {
+            'crossfader': lambda v: engine.mixer.set_crossfader(v),
+            'master_level': lambda v: engine.mixer.set_master_level(v),
+            'headphone_mix': lambda v: engine.mixer.set_headphone_mix(v),
+            'headphone_level': lambda v: engine.mixer.set_headphone_level(v),
+        }
+        if control in setters:
+            return _scaled(setters[control])
+    
+    elif target.startswith('channel') and target[7:].isdigit():
+        ch = int(target[7:]) - 1
+        if not 0 <= ch < engine.DECK_COUNT:
+            raise ValueError(f"No such channel in action: {action}")
+        eq = engine.channel_eqs[ch]
+        setters = {
+            'trim': lambda v: engine.mixer.set_trim(ch, v),
+            'fader': lambda v: engine.mixer.set_fader(ch, v),
+            'eq_high': eq.set_high,
+            'eq_mid': eq.set_mid,
+            'eq_low': eq.set_low,
+            'color': eq.set_color,
+        }
+        if control in setters:
+            return _scaled(setters[control])
+        if control == 'cue':
+            return _held(lambda on: engine.mixer.set_cue(ch, on))
+    
+    elif target.startswith('deck') and target[4:].isdigit():
+        deck = int(target[4:]) - 1
+        if not 0 <= deck < engine.DECK_COUNT:
+            raise ValueError(f"No such deck in action: {action}")
+        if control == 'play':
+            def toggle():
+                if engine.decks[deck].is_playing:
+                    engine.pause(deck)
+                else:
+                    engine.play(deck)
+            return _pressed(toggle)
+        if control == 'tempo':
+            # Centre detent at 64; +/-10% at full travel like the default UI range
+            return lambda number, value: engine.set_tempo(deck, (value - 64) / 64.0 * 10.0)
+        if control == 'sync':
+            return _pressed(lambda: engine.set_sync(deck, not engine.sync.synced[deck]))
+        if control == 'master':
+            return _pressed(lambda: engine.set_tempo_master(deck))
+        if control == 'key_lock':
+            stretch = engine.decks[deck].stretch
+            return _pressed(lambda: engine.set_key_lock(deck, not stretch.key_lock))
+        if control == 'jog':
+            jog = engine.decks[deck].jog
+            return lambda number, ticks: jog.add(ticks)
+        if control == 'jog_touch':
+            return _held(engine.decks[deck].jog.touch)
+        if control == 'loop':
+            return _pressed(lambda: engine.toggle_loop(deck))
+        if control == 'reloop':
+            return _pressed(lambda: engine.reloop(deck))
+        if control == 'loop_halve':
+            return _pressed(lambda: engine.resize_loop(deck, 0.5))
+        if control == 'loop_double':
+            return _pressed(lambda: engine.resize_loop(deck, 2.0))
+        if control.startswith('hot_cue') and control[7:].isdigit():
+            slot = int(control[7:]) - 1
+            if not 0 <= slot < HOT_CUES:
+                raise ValueError(f"No such hot cue in action: {action}")
+            # Like the on-screen pads: jump to a stored cue, else store one
+            return _pressed(lambda: engine.jump_to_cue(deck, slot) or engine.set_hot_cue(deck, slot))
+        if control.startswith('loop_pad') and control[8:].isdigit():
+            index = int(control[8:]) - 1
+            if not 0 <= index < len(LOOP_BEATS):
+                raise ValueError(f"No such loop pad in action: {action}")
+            loop = engine.decks[deck].loop
+            
+            def loop_pad():
+                region = loop.region
+                if loop.active and region is not None and region.beats == LOOP_BEATS[index]:
+                    engine.exit_loop(deck)
+                else:
+                    engine.set_loop(deck, LOOP_BEATS[index])
+            return _pressed(loop_pad)
+    
+    elif target == 'sampler':
+        sampler = engine.sampler
+        if control == 'volume':
+            return _scaled(sampler.set_volume)
+        if control.startswith('pad') and control[3:].isdigit():
+            pad = int(control[3:]) - 1
+            if not 0 <= pad < sampler.PADS:
+                raise ValueError(f"No such sampler pad in action: {action}")
+            # Velocity-sensitive; note-off (value 0) lets the one-shot ring out
+            return lambda number, value: sampler.trigger(pad, value) if value else None
+    
+    raise ValueError(f"Unknown controller action: {action}")
+
+
+def _fourteen_bit(handler):
+    """(MSB, LSB) handlers for a 14-bit CC pair; the value is applied when the LSB lands
+    
+    Controllers send the MSB first, so applying on the LSB gives one update
+    per movement at full resolution instead of a coarse step then a fine one.
+    The value reaches handler on the usual 0-127 scale, with a fractional part.
+    """
+    msb = [0]
+    
+    def on_msb(number, value):
+        msb[0] = value
+    
+    def on_lsb(number, value):
+        # Same scale as pitch bend, so centre detents land exactly on 64
+        handler(number, min(127.0, ((msb[0] << 7) | value) / 128.0))
+    return on_msb, on_lsb
+
+
+class MidiDispatcher:
+    """rtmidi input callback routing messages straight to engine parameters
+    
+    Mappings are compiled into a flat 16384-slot list indexed by
+    (status & 0x7F) << 7 | number, so each message costs one list load and
+    one call on rtmidi's thread with no Qt event loop in between. Parameter
+    writes are picked up by the next rendered block.
+    
+    Two latencies are counted: dispatch (callback entry to handler return)
+    and apply (callback entry to the start of the next rendered block).
+    """
+    
+    TABLE_SIZE = 128 * 128
+    
+    def __init__(self, engine=None):
+        self.engine = engine
+        self.table = [None] * self.TABLE_SIZE
+        self._compiled = {}
+        self.dispatch_latency = LatencyStats()
+        self.apply_latency = LatencyStats()
+        self.unmapped = 0
+        self.instruments = instrumentation.active()
+        if engine is not None:
+            engine.control_latency = self.apply_latency
+    
+    def attach_engine(self, engine):
+        """Route compiled actions to engine"""
+        self.engine = engine
+        self._compiled.clear()
+        engine.control_latency = self.apply_latency
+    
+    def compile(self, mappings, key=None, version=0):
+        """Build the lookup table from {(message, channel, number): action}
+        
+        message is a MESSAGE_TYPES key and channel is 0-15. action is a name,
+        or a dict with 'action' plus 'resolution': 14 for MSB/LSB pairs (LSB
+        on number + 32) and 'encoding' for relative controls. The new table is
+        swapped in with a single assignment, so the callback never sees a
+        half-built one. The latest table compiled under each key (a
+        controller id) is kept with its mapping version, so switching back to
+        a controller costs nothing and an edited map replaces its old table.
+        """
+        if key is not None and key in self._compiled:
+            compiled_version, table = self._compiled[key]
+            if compiled_version == version:
+                self.table = table
+                return
+        table = [None] * self.TABLE_SIZE
+        for (message, channel, number), action in mappings.items():
+            status = MESSAGE_TYPES[message] | channel
+            options = action if isinstance(action, dict) else {'action': action}
+            handler = resolve_action(self.engine, options['action'])
+            
+            control = options['action'].rpartition('.')[2]
+            encoding = options.get('encoding', RELATIVE_ACTIONS.get(control))
+            if encoding is not None:
+                decode = RELATIVE_ENCODINGS[encoding]
+                handler = (lambda n, v, handler=handler, decode=decode: handler(n, decode(v)))
+            
+            if options.get('resolution') == 14 and message == 'cc' and number < 32:
+                table[table_index(status, number)], table[table_index(status, number + 32)] = (
+                    _fourteen_bit(handler))
+                continue
+            if message == 'pitchbend':
+                # 14-bit value: LSB arrives as the data byte used for indexing
+                def bend(lsb, msb, handler=handler):
+                    handler(0, ((msb << 7) | lsb) / 128.0)
+                for lsb in range(128):
+                    table[table_index(status, lsb)] = bend
+                continue
+            table[table_index(status, number)] = handler
+            if message == 'note':
+                # Note-off releases the same control
+                table[table_index(MESSAGE_TYPES['note_off'] | channel, number)] = (
+                    lambda n, v, handler=handler: handler(n, 0))
+        if key is not None:
+            self._compiled[key] = (version, table)
+        self.table = table
+        logger.info(f"Compiled {len(mappings)} MIDI mappings")
+    
+    def __call__(self, event, data=None):
+        """rtmidi callback: event is (message bytes, delta seconds)"""
+        start = time.perf_counter_ns()
+        message = event[0]
+        if len(message) < 3:
+            return
+        handler = self.table[((message[0] & 0x7F) << 7) | message[1]]
+        if handler is None:
+            self.unmapped += 1
+            return
+        handler(message[1], message[2])
+        elapsed = time.perf_counter_ns() - start
+        self.dispatch_latency.record(elapsed)
+        if self.instruments is not None:
+            self.instruments.midi_dispatch.record(elapsed / 1000.0)
+        engine = self.engine
+        if engine.control_stamp is None:
+            engine.control_stamp = start
+    
+    def stats(self):
+        """Latency snapshot for logging and the UI"""
+        return {
+            'dispatch': self.dispatch_latency.as_dict(),
+            'apply': self.apply_latency.as_dict(),
+            'unmapped': self.unmapped,
+        }
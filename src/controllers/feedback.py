@@ -0,0 +1,276 @@
+"""
+Controller feedback: LEDs, VU meters and pad colours sent back over MIDI output
+"""
+
+import logging
+import threading
+import time
+
+import numpy as np
+
+from src.audio.cues import HOT_CUE_COLORS, HOT_CUES
+from src.audio.loop import LOOP_BEATS
+from src.controllers.dispatch import MESSAGE_TYPES
+
+logger = logging.getLogger(__name__)
+
+# UI pad colour names onto the hue-ordered velocity palette of RGB pads
+PAD_COLOR_VALUES = {
+    'orange_red': 5,
+    'orange': 9,
+    'amber': 13,
+    'yellow': 17,
+    'lime': 25,
+    'green': 33,
+    'mint': 37,
+    'teal': 41,
+    'sky': 45,
+    'blue': 49,
+    'purple': 53,
+    'violet': 57,
+    'fuchsia': 61,
+    'magenta': 65,
+    'pink': 69,
+    'rose': 73,
+}
+
+
+class FeedbackScheduler:
+    """Sends only changed control state, at most rate messages a second per port
+    
+    set() records the wanted value of a control; anything equal to what the
+    controller already shows is dropped, and a control that changes again
+    before it is sent keeps its place in the queue with the newest value.
+    flush() spends a token bucket refilled at rate, so a burst (a profile
+    switch lighting every LED) drains over a few frames instead of flooding
+    the USB MIDI link while input is arriving on it.
+    """
+    
+    DEFAULT_RATE = 1000
+    
+    def __init__(self, send, rate=DEFAULT_RATE, burst=None):
+        self.send = send
+        self.rate = rate
+        self.burst = burst or max(1, rate // 50)
+        self.tokens = float(self.burst)
+        self.sent = {}
+        self.pending = {}
+        self.messages = 0
+        self._last = None
+        self._reset = False
+    
+    def set(self, status, number, value):
+        """Want control (status, number) to show value (0-127)"""
+        key = (status, number)
+        if self.sent.get(key) == value:
+            self.pending.pop(key, None)
+        else:
+            self.pending[key] = value
+    
+    def invalidate(self):
+        """Forget what the controller shows (new port or map); every control is resent
+        
+        Only flags the reset: the queues belong to the thread calling flush().
+        """
+        self._reset = True
+    
+    def flush(self, now=None):
+        """Send queued changes the budget allows; returns the number sent"""
+        now = time.monotonic() if now is None else now
+        if self._last is not None:
+            self.tokens = min(self.burst, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._reset:
+            self._reset = False
+            self.sent.clear()
+        
+        count = 0
+        pending = self.pending
+        while pending and self.tokens >= 1.0:
+            key = next(iter(pending))
+            value = pending.pop(key)
+            try:
+                self.send([key[0], key[1], value])
+            except Exception as e:
+                logger.warning(f"MIDI feedback send failed: {e}")
+                pending[key] = value
+                break
+            self.sent[key] = value
+            self.tokens -= 1.0
+            count += 1
+        self.messages += count
+        return count
+
+
+class ControllerFeedback:
+    """Polls engine state for a controller's feedback map and feeds a scheduler
+    
+    Feedback sources are resolved to getters once, when a map is bound, like
+    input actions in dispatch. Polling runs on its own thread at POLL_HZ, so
+    output never runs on rtmidi's input thread or the render thread.
+    """
+    
+    POLL_HZ = 60
+    METER_FLOOR_DB = -48.0
+    METER_FALL_DB_PER_SECOND = 24.0
+    
+    def __init__(self, engine, scheduler):
+        self.engine = engine
+        self.scheduler = scheduler
+        self.bindings = []
+        self.pushed = {}
+        self._peaks = None
+        self._meter_db = None
+        self._last_poll = None
+        self._thread = None
+        self._stop = threading.Event()
+    
+    def push(self, source, value):
+        """Override a pad such as 'deck1.pad3' (a colour name, number or bool)
+        
+        None drops the override, so the pad shows its hot cue again.
+        """
+        if value is None:
+            self.pushed.pop(source, None)
+            return
+        if isinstance(value, str):
+            value = PAD_COLOR_VALUES.get(value, 127)
+        elif isinstance(value, bool):
+            value = 127 if value else 0
+        self.pushed[source] = int(value)
+    
+    def bind(self, feedback):
+        """Resolve {(message, channel, number): source} against the engine"""
+        bindings = []
+        if self.engine is not None:
+            channels = self.engine.mixer.channels
+            self._peaks = np.zeros(channels + 1, dtype=np.float32)
+            self._meter_db = np.full(channels + 1, self.METER_FLOOR_DB)
+            for (message, channel, number), source in feedback.items():
+                status = MESSAGE_TYPES[message] | channel
+                bindings.append((status, number, self._resolve(source)))
+        # Swapped in whole so the poll thread never sees a half-built list
+        self.bindings = bindings
+        self.scheduler.invalidate()
+    
+    def _resolve(self, source):
+        """Getter returning the 0-127 value a source should show"""
+        engine = self.engine
+        target, _, control = source.partition('.')
+        
+        if target == 'mixer' and control == 'vu':
+            return self._meter(engine.mixer.channels)
+        
+        if target.startswith('channel') and target[7:].isdigit():
+            ch = int(target[7:]) - 1
+            if not 0 <= ch < engine.DECK_COUNT:
+                raise ValueError(f"No such channel in feedback source: {source}")
+            if control == 'cue':
+                return lambda: 127 if engine.mixer.cue_on[ch] else 0
+            if control == 'vu':
+                return self._meter(ch)
+        
+        elif target.startswith('deck') and target[4:].isdigit():
+            deck = int(target[4:]) - 1
+            if not 0 <= deck < engine.DECK_COUNT:
+                raise ValueError(f"No such deck in feedback source: {source}")
+            sync = engine.sync
+            if control == 'play':
+                return lambda: 127 if engine.decks[deck].is_playing else 0
+            if control == 'sync':
+                return lambda: 127 if sync.synced[deck] else 0
+            if control == 'master':
+                return lambda: 127 if sync.master == deck else 0
+            if control == 'key_lock':
+                stretch = engine.decks[deck].stretch
+                return lambda: 127 if stretch.key_lock else 0
+            if control == 'loop':
+                loop = engine.decks[deck].loop
+                return lambda: 127 if loop.active else 0
+            if control.startswith('pad') and control[3:].isdigit():
+                return self._hot_cue_pad(source, engine.decks[deck], int(control[3:]) - 1)
+            if control.startswith('loop_pad') and control[8:].isdigit():
+                return self._loop_pad(source, engine.decks[deck].loop, int(control[8:]) - 1)
+        
+        raise ValueError(f"Unknown feedback source: {source}")
+    
+    def _hot_cue_pad(self, source, deck, slot):
+        """Hot cue pad: its slot's colour when set, full brightness inside an engaged loop"""
+        if not 0 <= slot < HOT_CUES:
+            raise ValueError(f"No such hot cue pad in feedback source: {source}")
+        pushed, loop = self.pushed, deck.loop
+        color = PAD_COLOR_VALUES[HOT_CUE_COLORS[slot]]
+        rate = loop.sample_rate
+        
+        def value():
+            if source in pushed:
+                return pushed[source]
+            cues = deck.cues
+            position = cues.hot_cues[slot] if cues is not None else None
+            if position is None:
+                return 0
+            region = loop.region
+            if loop.active and region is not None and \
+                    region.start <= int(round(position * rate)) < region.end:
+                return 127
+            return color
+        return value
+    
+    def _loop_pad(self, source, loop, index):
+        """Beat loop pad: lit while a loop or roll of its length is engaged"""
+        if not 0 <= index < len(LOOP_BEATS):
+            raise ValueError(f"No such loop pad in feedback source: {source}")
+        beats = LOOP_BEATS[index]
+        
+        def value():
+            region = loop.region
+            return 127 if loop.active and region is not None and region.beats == beats else 0
+        return value
+    
+    def _meter(self, index):
+        meter_db, floor = self._meter_db, self.METER_FLOOR_DB
+        return lambda: int(round(127.0 * (1.0 - meter_db[index] / floor)))
+    
+    def poll(self, now=None):
+        """Read every bound source once, queue what changed and flush"""
+        now = time.monotonic() if now is None else now
+        bindings = self.bindings
+        if bindings and self._peaks is not None:
+            self._update_meters(now)
+            scheduler = self.scheduler
+            for status, number, getter in bindings:
+                scheduler.set(status, number, getter())
+        self._last_poll = now
+        return self.scheduler.flush(now)
+    
+    def _update_meters(self, now):
+        """Peak meters with a constant-rate fall, in dB"""
+        self.engine.mixer.take_peaks(self._peaks)
+        elapsed = 0.0 if self._last_poll is None else now - self._last_poll
+        fallen = self._meter_db - self.METER_FALL_DB_PER_SECOND * elapsed
+        peaks_db = 20.0 * np.log10(np.maximum(self._peaks, 1e-6))
+        np.maximum(fallen, peaks_db, out=self._meter_db)
+        np.clip(self._meter_db, self.METER_FLOOR_DB, 0.0, out=self._meter_db)
+    
+    def start(self):
+        """Run poll() on a background thread until stop()"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='midi-feedback', daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Stop the poll thread"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _run(self):
+        interval = 1.0 / self.POLL_HZ
+        while not self._stop.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"MIDI feedback error: {e}")
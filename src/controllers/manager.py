@@ -5,6 +5,11 @@ MIDI and hardware controller support
 import logging
 import rtmidi
 
+from src.controllers.dispatch import MidiDispatcher
+from src.controllers.feedback import ControllerFeedback, FeedbackScheduler
+from src.controllers.profiles import (MappingProfile, ProfileCache, bundled_profile_path,
+                                      write_profile)
+
 logger = logging.getLogger(__name__)
 
 class ControllerManager:
@@ -30,12 +35,68 @@ class ControllerManager:
         'native_instruments': 'Native Instruments',
     }
     
-    def __init__(self):
+    # MIDI port names carry the model rather than the brand ('DDJ-400 MIDI 1')
+    PORT_KEYWORDS = {
+        'pioneer_ddj': ('ddj-',),
+        'pioneer_cdj': ('cdj-', 'xdj-'),
+        'pioneer_djm': ('djm-',),
+        'numark': ('mixtrack', 'party mix'),
+        'traktor': ('traktor kontrol',),
+        'denon': ('denon dj',),
+        'xone': ('xone',),
+    }
+    
+    def __init__(self, engine=None):
         logger.info("Initializing Controller Manager")
         self.midi_in = rtmidi.MidiIn()
         self.midi_out = rtmidi.MidiOut()
         self.controllers = {}
         self.mappings = {}
+        self.active_controller = None
+        self.dispatcher = MidiDispatcher(engine)
+        self.profiles = ProfileCache()
+        self._mapping_versions = {}
+        self.feedback_maps = {}
+        self.feedback = ControllerFeedback(engine, FeedbackScheduler(self.midi_out.send_message))
+        # Clock and active-sensing bytes would otherwise wake the callback
+        # hundreds of times a second for nothing
+        self.midi_in.ignore_types(sysex=True, timing=True, active_sense=True)
+    
+    def attach_engine(self, engine):
+        """Send mapped controller input to an AudioEngine"""
+        self.dispatcher.attach_engine(engine)
+        self.feedback.engine = engine
+        self._activate(self.active_controller)
+    
+    def _activate(self, controller_id):
+        """Point the dispatcher at a controller's (cached) compiled table"""
+        if controller_id is None or self.dispatcher.engine is None:
+            return
+        version = self._mapping_versions.get(controller_id, 0)
+        self.dispatcher.compile(self.mappings.get(controller_id, {}),
+                                key=controller_id, version=version)
+        self.feedback.bind(self.feedback_maps.get(controller_id, {}))
+    
+    def _set_mappings(self, controller_id, mappings):
+        self.mappings[controller_id] = mappings
+        self._mapping_versions[controller_id] = self._mapping_versions.get(controller_id, 0) + 1
+        if controller_id == self.active_controller:
+            self._activate(controller_id)
+    
+    def _ensure_default_profile(self, controller_type):
+        """Load the bundled profile for a family the first time it is seen"""
+        if controller_type in self.mappings or controller_type not in self.SUPPORTED_CONTROLLERS:
+            return
+        try:
+            self.load_mapping_profile(bundled_profile_path(controller_type), controller_type)
+        except (OSError, ValueError) as e:
+            logger.warning(f"No default mapping for {controller_type}: {e}")
+    
+    def _keywords(self, controller_type):
+        """Lower-case substrings identifying a family's MIDI ports"""
+        return [controller_type.replace('_', ' '),
+                self.SUPPORTED_CONTROLLERS[controller_type].lower(),
+                *self.PORT_KEYWORDS.get(controller_type, ())]
     
     def list_available_controllers(self):
         """List all detected MIDI controllers"""
@@ -44,17 +105,55 @@ class ControllerManager:
     
     def connect_controller(self, controller_name):
         """Connect to a MIDI controller"""
+        keywords = [controller_name.lower()]
+        if controller_name in self.SUPPORTED_CONTROLLERS:
+            keywords = self._keywords(controller_name)
+            self._ensure_default_profile(controller_name)
         try:
             ports = self.midi_in.get_ports()
             for i, port in enumerate(ports):
-                if controller_name.lower() in port.lower():
+                if any(keyword in port.lower() for keyword in keywords):
+                    if self.midi_in.is_port_open():
+                        self.midi_in.close_port()
                     self.midi_in.open_port(i)
+                    self.active_controller = controller_name
+                    self._activate(controller_name)
+                    # Messages go straight from rtmidi's thread to the engine
+                    self.midi_in.set_callback(self.dispatcher)
+                    self._open_output(keywords)
                     logger.info(f"Connected to controller: {controller_name}")
                     return True
         except Exception as e:
             logger.error(f"Failed to connect controller: {e}")
         return False
     
+    def _open_output(self, keywords):
+        """Open the controller's MIDI output and start sending feedback to it"""
+        try:
+            for i, port in enumerate(self.midi_out.get_ports()):
+                if any(keyword in port.lower() for keyword in keywords):
+                    if self.midi_out.is_port_open():
+                        self.midi_out.close_port()
+                    self.midi_out.open_port(i)
+                    # A different device: resend every LED and meter
+                    self.feedback.scheduler.invalidate()
+                    self.feedback.start()
+                    return True
+        except Exception as e:
+            logger.warning(f"No feedback output for controller: {e}")
+        return False
+    
+    def close(self):
+        """Stop feedback and close the MIDI ports"""
+        self.feedback.stop()
+        for port in (self.midi_in, self.midi_out):
+            if port.is_port_open():
+                port.close_port()
+    
+    def set_pad_color(self, deck, pad, color):
+        """Override a hot cue pad (colour name or palette value; None shows the cue again)"""
+        self.feedback.push(f"deck{deck + 1}.pad{pad}", color)
+    
     def detect_controllers(self):
         """Auto-detect connected controllers"""
         detected = []
@@ -62,13 +161,13 @@ class ControllerManager:
             ports = self.midi_in.get_ports()
             for port in ports:
                 for controller_type, friendly_name in self.SUPPORTED_CONTROLLERS.items():
-                    if any(keyword in port.lower() for keyword in 
-                           [controller_type.replace('_', ' '), friendly_name.lower()]):
+                    if any(keyword in port.lower() for keyword in self._keywords(controller_type)):
                         detected.append({
                             'type': controller_type,
                             'name': friendly_name,
                             'port': port
                         })
+                        self._ensure_default_profile(controller_type)
             
             logger.info(f"Detected {len(detected)} controllers")
         except Exception as e:
@@ -76,18 +175,36 @@ class ControllerManager:
         
         return detected
     
-    def map_control(self, controller_id, midi_cc, action):
-        """Map a MIDI control to an action"""
+    def map_control(self, controller_id, midi_cc, action, channel=0, message='cc'):
+        """Map a MIDI control (CC, note or pitch bend number) to an action"""
         if controller_id not in self.mappings:
             self.mappings[controller_id] = {}
         
-        self.mappings[controller_id][midi_cc] = action
-        logger.info(f"Mapped MIDI CC {midi_cc} to {action}")
+        mappings = dict(self.mappings[controller_id])
+        mappings[(message, channel, midi_cc)] = action
+        self._set_mappings(controller_id, mappings)
+        logger.info(f"Mapped MIDI {message} {midi_cc} (channel {channel + 1}) to {action}")
+    
+    def get_latency_stats(self):
+        """Controller input latency counters (dispatch and input-to-apply)"""
+        return self.dispatcher.stats()
     
-    def load_mapping_profile(self, profile_path):
-        """Load a controller mapping profile"""
+    def load_mapping_profile(self, profile_path, controller_id=None):
+        """Load a controller mapping profile (YAML), using the parse cache when unchanged"""
         logger.info(f"Loading mapping profile: {profile_path}")
+        profile = self.profiles.load(profile_path)
+        controller_id = controller_id or profile.controller or self.active_controller
+        if controller_id is None:
+            raise ValueError(f"{profile_path}: no controller to apply the profile to")
+        self.feedback_maps[controller_id] = dict(profile.feedback)
+        self._set_mappings(controller_id, dict(profile.mappings))
+        return profile
     
-    def save_mapping_profile(self, profile_path):
-        """Save current mapping profile"""
+    def save_mapping_profile(self, profile_path, controller_id=None):
+        """Save a controller's current mappings as a YAML profile"""
+        controller_id = controller_id or self.active_controller
         logger.info(f"Saving mapping profile: {profile_path}")
+        name = self.SUPPORTED_CONTROLLERS.get(controller_id, controller_id)
+        profile = MappingProfile(name, controller_id, self.mappings.get(controller_id, {}),
+                                 self.feedback_maps.get(controller_id, {}))
+        write_profile(profile, profile_path)
@@ -0,0 +1,196 @@
+"""
+Controller mapping profiles: YAML sources, a compiled on-disk cache and bundled defaults
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+
+from src.controllers.dispatch import MESSAGE_TYPES, RELATIVE_ENCODINGS
+
+logger = logging.getLogger(__name__)
+
+BUNDLED_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mappings')
+GENERIC_PROFILE = 'generic'
+
+# Bump when MappingProfile's pickled layout changes
+CACHE_FORMAT = 2
+
+
+class MappingProfile:
+    """A named set of {(message, channel, number): action} mappings
+    
+    Channels are 0-15 here and 1-16 in the YAML files, as printed on
+    controllers and in their MIDI charts. Entries with a 'resolution' (14
+    for MSB/LSB pairs) or relative 'encoding' map to an options dict
+    instead of a bare action name. feedback maps controller outputs (LEDs,
+    meters, pads) to engine state sources the same way.
+    """
+    
+    def __init__(self, name, controller=None, mappings=None, feedback=None):
+        self.name = name
+        self.controller = controller
+        self.mappings = dict(mappings or {})
+        self.feedback = dict(feedback or {})
+    
+    @classmethod
+    def from_dict(cls, data, source='<profile>'):
+        """Validate and convert a parsed YAML document"""
+        if not isinstance(data, dict) or not isinstance(data.get('mappings'), list):
+            raise ValueError(f"{source}: expected a 'mappings' list")
+        mappings = {}
+        for i, entry in enumerate(data['mappings']):
+            try:
+                address = _address(entry)
+                action = str(entry['action'])
+                resolution = int(entry.get('resolution', 7))
+                encoding = entry.get('encoding')
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{source}: bad mapping #{i + 1}: {e}")
+            number = address[2]
+            if resolution not in (7, 14) or (resolution == 14 and number >= 32):
+                raise ValueError(f"{source}: mapping #{i + 1}: bad resolution {resolution}")
+            if encoding is not None and encoding not in RELATIVE_ENCODINGS:
+                raise ValueError(f"{source}: mapping #{i + 1}: unknown encoding '{encoding}'")
+            if resolution == 14 or encoding is not None:
+                action = {'action': action}
+                if resolution == 14:
+                    action['resolution'] = 14
+                if encoding is not None:
+                    action['encoding'] = encoding
+            mappings[address] = action
+        
+        feedback = {}
+        for i, entry in enumerate(data.get('feedback') or ()):
+            try:
+                feedback[_address(entry)] = str(entry['source'])
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"{source}: bad feedback #{i + 1}: {e}")
+        return cls(data.get('name', os.path.basename(source)), data.get('controller'),
+                   mappings, feedback)
+    
+    def to_dict(self):
+        """YAML-ready document, sorted so saved files diff cleanly"""
+        entries = []
+        for (message, channel, number), action in sorted(self.mappings.items()):
+            entry = {'message': message, 'channel': channel + 1, 'number': number}
+            if isinstance(action, dict):
+                entry.update(action)
+            else:
+                entry['action'] = action
+            entries.append(entry)
+        data = {'name': self.name}
+        if self.controller:
+            data['controller'] = self.controller
+        data['mappings'] = entries
+        if self.feedback:
+            data['feedback'] = [{'message': message, 'channel': channel + 1, 'number': number,
+                                 'source': source}
+                                for (message, channel, number), source
+                                in sorted(self.feedback.items())]
+        return data
+
+
+def _address(entry):
+    """(message, channel, number) of a profile entry, channel converted to 0-15"""
+    message = entry.get('message', 'cc')
+    channel = int(entry.get('channel', 1)) - 1
+    number = int(entry.get('number', 0))
+    if message not in MESSAGE_TYPES:
+        raise ValueError(f"unknown message '{message}'")
+    if not 0 <= channel < 16 or not 0 <= number < 128:
+        raise ValueError("channel or number out of range")
+    return message, channel, number
+
+
+def _yaml():
+    import yaml
+    return yaml
+
+
+def read_profile(path):
+    """Parse a YAML profile (libyaml's loader when available)"""
+    yaml = _yaml()
+    loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    with open(path, 'r', encoding='utf-8') as f:
+        return MappingProfile.from_dict(yaml.load(f, Loader=loader), path)
+
+
+def write_profile(profile, path):
+    """Write a profile as YAML, replacing the file atomically"""
+    yaml = _yaml()
+    dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        yaml.dump(profile.to_dict(), f, Dumper=dumper, sort_keys=False,
+                  default_flow_style=None)
+    os.replace(tmp, path)
+
+
+def bundled_profile_path(controller_type):
+    """Bundled default profile for a controller family (generic when none is specific)"""
+    path = os.path.join(BUNDLED_DIR, f"{controller_type}.yaml")
+    if os.path.exists(path):
+        return path
+    return os.path.join(BUNDLED_DIR, f"{GENERIC_PROFILE}.yaml")
+
+
+class ProfileCache:
+    """Parsed profiles keyed by path and (mtime, size)
+    
+    Parsing YAML is by far the slowest part of loading a profile, so each
+    parse is pickled under ~/.violet_dj and reused until the source file
+    changes; profiles already loaded this session come straight from memory.
+    """
+    
+    DEFAULT_DIR = os.path.expanduser('~/.violet_dj/mapping_cache')
+    
+    def __init__(self, cache_dir=DEFAULT_DIR):
+        self.cache_dir = cache_dir
+        self._memory = {}
+    
+    def _cache_path(self, path):
+        key = hashlib.sha1(path.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.pickle")
+    
+    def load(self, profile_path):
+        """MappingProfile for a YAML file, parsing it only if it changed"""
+        path = os.path.abspath(profile_path)
+        st = os.stat(path)
+        stamp = (st.st_mtime_ns, st.st_size)
+        
+        cached = self._memory.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        
+        cache_path = self._cache_path(path)
+        profile = None
+        try:
+            with open(cache_path, 'rb') as f:
+                entry = pickle.load(f)
+            if entry.get('format') == CACHE_FORMAT and entry.get('stamp') == stamp:
+                profile = entry['profile']
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, KeyError,
+                ImportError):
+            # Unreadable, or pickled from classes that have since moved; reparse
+            pass
+        
+        if profile is None:
+            profile = read_profile(path)
+            self._store(cache_path, stamp, profile)
+            logger.info(f"Parsed mapping profile {path}")
+        self._memory[path] = (stamp, profile)
+        return profile
+    
+    def _store(self, cache_path, stamp, profile):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = f"{cache_path}.tmp"
+            with open(tmp, 'wb') as f:
+                pickle.dump({'format': CACHE_FORMAT, 'stamp': stamp, 'profile': profile}, f,
+                            protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_path)
+        except OSError as e:
+            logger.warning(f"Could not cache mapping profile: {e}")
@@ -3,115 +3,273 @@ Device detection and auto-discovery for USB, Bluetooth, and Wi-Fi devices
 """
 
 import os
+import re
 import subprocess
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from PyQt6.QtCore import QThread, pyqtSignal
 import json
 
+from src.devices.monitor import read_sound_cards
+
 logger = logging.getLogger(__name__)
 
+# 'Bus 001 Device 005: ID 2b73:0001 Pioneer DJ Corporation DDJ-400'
+LSUSB_LINE = re.compile(r'^Bus (\d+) Device (\d+): ID ([0-9a-fA-F]{4}):([0-9a-fA-F]{4})\s*(.*)$')
+# 'card 1: DDJ400 [DDJ-400], device 0: USB Audio [USB Audio]'
+APLAY_LINE = re.compile(r'^card (\d+): (\S+) \[(.*?)\], device (\d+): (.*?) \[(.*?)\]')
+# 'Device 00:1B:66:AA:BB:CC Headphones'
+BLUETOOTH_LINE = re.compile(r'^Device ((?:[0-9A-Fa-f]{2}:){5}[0-9A-Fa-f]{2})\s*(.*)$')
+
+# Root hubs and other host-controller plumbing
+IGNORED_USB_VENDORS = {'1d6b'}
+
+
+def parse_lsusb(text):
+    """USB device records (vendor/product IDs, bus address) from lsusb output"""
+    devices = []
+    for line in text.splitlines():
+        match = LSUSB_LINE.match(line.strip())
+        if not match or match.group(3).lower() in IGNORED_USB_VENDORS:
+            continue
+        bus, address, vendor, product, name = match.groups()
+        devices.append({
+            'type': 'usb',
+            'backend': 'usb',
+            'name': name or f"{vendor}:{product}",
+            'vendor_id': vendor.lower(),
+            'product_id': product.lower(),
+            'bus': int(bus),
+            'address': int(address),
+        })
+    return devices
+
+
+def parse_aplay(text):
+    """ALSA playback device records (card and device numbers) from aplay -l output"""
+    devices = []
+    for line in text.splitlines():
+        match = APLAY_LINE.match(line.strip())
+        if not match:
+            continue
+        card, card_id, card_name, device, _, device_name = match.groups()
+        devices.append({
+            'type': 'audio',
+            'backend': 'alsa',
+            'name': card_name,
+            'card': int(card),
+            'card_id': card_id,
+            'device': int(device),
+            'device_name': device_name,
+        })
+    return devices
+
+
+def parse_pactl_sources(text):
+    """PulseAudio source records from pactl list short sources output"""
+    devices = []
+    for line in text.splitlines():
+        fields = line.split('\t')
+        if len(fields) < 2 or not fields[0].isdigit():
+            continue
+        devices.append({
+            'type': 'audio',
+            'backend': 'pulseaudio',
+            'name': fields[1],
+            'index': int(fields[0]),
+            'driver': fields[2] if len(fields) > 2 else '',
+            'format': fields[3] if len(fields) > 3 else '',
+            'state': fields[4] if len(fields) > 4 else '',
+            'monitor': fields[1].endswith('.monitor'),
+        })
+    return devices
+
+
+def parse_bluetoothctl(text):
+    """Paired/known Bluetooth device records from bluetoothctl devices output"""
+    devices = []
+    for line in text.splitlines():
+        match = BLUETOOTH_LINE.match(line.strip())
+        if match:
+            devices.append({
+                'type': 'bluetooth',
+                'name': match.group(2) or match.group(1),
+                'address': match.group(1),
+                'multi_device': True,
+            })
+    return devices
+
+
 class DeviceDetector(QThread):
-    """Detects and manages audio devices"""
+    """Detects and manages audio devices
+    
+    Each probe runs on its own worker thread with a PROBE_TIMEOUT deadline,
+    so a hung bluetoothctl costs at most that long and never blocks the
+    other probes. Results are cached per probe for CACHE_TTL seconds and
+    persisted, so the last known devices are emitted at once on startup and
+    replaced when fresh probes finish.
+    """
     
     devices_found = pyqtSignal(list)
     
+    PROBE_TIMEOUT = 2.0
+    CACHE_TTL = 30.0
+    CACHE_PATH = os.path.expanduser('~/.violet_dj/device_cache.json')
+    
+    # Shared by every detector in the process; guarded by _cache_lock
+    _cache = None
+    _cache_lock = threading.Lock()
+    
     def __init__(self):
         super().__init__()
         self.devices = []
+        self.probes = {
+            'usb': self.detect_usb_devices,
+            'alsa': self.detect_alsa_devices,
+            'pulseaudio': self.detect_pulse_devices,
+            'midi': self.detect_midi_devices,
+            'bluetooth': self.detect_bluetooth_devices,
+            'wifi': self.detect_wifi_devices,
+        }
     
     def run(self):
         """Run device detection"""
         try:
-            self.detect_usb_devices()
-            self.detect_audio_devices()
-            self.detect_midi_devices()
-            self.detect_bluetooth_devices()
-            self.detect_wifi_devices()
+            cached, stale = self._cached_results()
+            if cached:
+                self.devices = [d for name in self.probes for d in cached.get(name, ())]
+                self.devices_found.emit(list(self.devices))
+            if not stale:
+                return
+            
+            results = dict(cached)
+            executor = ThreadPoolExecutor(max_workers=len(stale), thread_name_prefix='probe')
+            futures = {executor.submit(self.probes[name]): name for name in stale}
+            done, pending = wait(futures, timeout=self.PROBE_TIMEOUT + 0.5)
+            # Never wait on a stuck probe; its thread finishes in the background
+            executor.shutdown(wait=False)
+            fresh = {}
+            for future in done:
+                name = futures[future]
+                try:
+                    fresh[name] = future.result()
+                except Exception as e:
+                    logger.warning(f"{name} detection failed: {e}")
+            for future in pending:
+                logger.warning(f"{futures[future]} detection timed out")
             
-            self.devices_found.emit(self.devices)
+            results.update(fresh)
+            self._store_results(fresh)
+            self.devices = [d for name in self.probes for d in results.get(name, ())]
+            logger.info(f"Device probes: {len(fresh)} of {len(stale)} completed, "
+                        f"{len(self.devices)} devices")
+            self.devices_found.emit(list(self.devices))
         except Exception as e:
             logger.error(f"Device detection error: {e}")
     
+    # ── Probe cache ─────────────────────────────────────────────────────────
+    @classmethod
+    def _load_cache(cls):
+        if cls._cache is None:
+            try:
+                with open(cls.CACHE_PATH, 'r', encoding='utf-8') as f:
+                    cls._cache = json.load(f).get('probes', {})
+            except (OSError, ValueError, AttributeError):
+                cls._cache = {}
+        return cls._cache
+    
+    def _cached_results(self):
+        """({probe: devices} for every cached probe, [probes due to run again])"""
+        now = time.time()
+        with self._cache_lock:
+            cache = self._load_cache()
+            results = {name: entry['devices'] for name, entry in cache.items()
+                       if name in self.probes}
+            stale = [name for name in self.probes
+                     if name not in cache or now - cache[name]['time'] > self.CACHE_TTL]
+        return results, stale
+    
+    def _store_results(self, fresh):
+        now = time.time()
+        with self._cache_lock:
+            cache = self._load_cache()
+            for name, devices in fresh.items():
+                cache[name] = {'time': now, 'devices': devices}
+            try:
+                os.makedirs(os.path.dirname(self.CACHE_PATH), exist_ok=True)
+                tmp = f"{self.CACHE_PATH}.tmp"
+                with open(tmp, 'w', encoding='utf-8') as f:
+                    json.dump({'probes': cache}, f)
+                os.replace(tmp, self.CACHE_PATH)
+            except OSError as e:
+                logger.warning(f"Could not save device cache: {e}")
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Make the next run() probe everything again"""
+        with cls._cache_lock:
+            cls._cache = {}
+    
+    def _command(self, args):
+        """stdout of a probe command, or None if it is missing, fails or overruns"""
+        try:
+            result = subprocess.run(args, capture_output=True, text=True,
+                                    timeout=self.PROBE_TIMEOUT, stdin=subprocess.DEVNULL)
+        except FileNotFoundError:
+            return None
+        except subprocess.TimeoutExpired:
+            logger.warning(f"{args[0]} did not answer within {self.PROBE_TIMEOUT}s")
+            return None
+        return result.stdout if result.returncode == 0 else None
+    
+    # ── Probes ──────────────────────────────────────────────────────────────
     def detect_usb_devices(self):
         """Detect USB audio/MIDI devices"""
-        try:
-            result = subprocess.run(['lsusb'], capture_output=True, text=True)
-            # Parse USB devices
-            logger.info("USB devices detected")
-        except Exception as e:
-            logger.warning(f"USB detection failed: {e}")
+        output = self._command(['lsusb'])
+        devices = parse_lsusb(output) if output else []
+        logger.info(f"USB devices detected: {len(devices)}")
+        return devices
     
-    def detect_audio_devices(self):
-        """Detect audio devices via PulseAudio/ALSA"""
-        try:
-            # Check for PulseAudio devices
-            result = subprocess.run(['pactl', 'list', 'sources'], 
-                                   capture_output=True, text=True)
-            if result.returncode == 0:
-                self.devices.append({
-                    'type': 'audio',
-                    'backend': 'pulseaudio',
-                    'name': 'PulseAudio'
-                })
-            
-            # Check for ALSA devices
-            result = subprocess.run(['aplay', '-l'], capture_output=True, text=True)
-            if result.returncode == 0:
-                self.devices.append({
-                    'type': 'audio',
-                    'backend': 'alsa',
-                    'name': 'ALSA'
-                })
-            
-            logger.info(f"Audio devices detected: {len([d for d in self.devices if d['type'] == 'audio'])}")
-        except Exception as e:
-            logger.warning(f"Audio device detection failed: {e}")
+    def detect_alsa_devices(self):
+        """Detect ALSA playback devices"""
+        output = self._command(['aplay', '-l'])
+        devices = parse_aplay(output) if output else []
+        logger.info(f"ALSA devices detected: {len(devices)}")
+        return devices
+    
+    def detect_pulse_devices(self):
+        """Detect PulseAudio (or PipeWire-Pulse) sources"""
+        output = self._command(['pactl', 'list', 'short', 'sources'])
+        devices = parse_pactl_sources(output) if output else []
+        logger.info(f"PulseAudio sources detected: {len(devices)}")
+        return devices
     
     def detect_midi_devices(self):
-        """Detect MIDI devices"""
-        try:
-            # Check ALSA MIDI devices
-            midi_dir = "/proc/asound"
-            if os.path.exists(midi_dir):
-                self.devices.append({
-                    'type': 'midi',
-                    'name': 'ALSA MIDI'
-                })
-            
-            logger.info("MIDI devices detected")
-        except Exception as e:
-            logger.warning(f"MIDI device detection failed: {e}")
+        """Detect MIDI devices (ALSA cards with rawmidi ports)"""
+        devices = [{'type': 'midi', 'backend': 'alsa', 'name': card['name'],
+                    'card': card['card'], 'card_id': card['id'], 'usb': card['usb']}
+                   for card in read_sound_cards().values() if card['midi']]
+        logger.info(f"MIDI devices detected: {len(devices)}")
+        return devices
     
     def detect_bluetooth_devices(self):
         """Detect Bluetooth audio devices"""
-        try:
-            # Use bluetoothctl to list devices
-            result = subprocess.run(['bluetoothctl', 'devices'], 
-                                   capture_output=True, text=True)
-            if result.returncode == 0:
-                self.devices.append({
-                    'type': 'bluetooth',
-                    'name': 'Bluetooth Audio',
-                    'multi_device': True
-                })
-            
-            logger.info("Bluetooth devices detected")
-        except Exception as e:
-            logger.warning(f"Bluetooth detection failed: {e}")
+        output = self._command(['bluetoothctl', 'devices'])
+        devices = parse_bluetoothctl(output) if output else []
+        logger.info(f"Bluetooth devices detected: {len(devices)}")
+        return devices
     
     def detect_wifi_devices(self):
         """Detect Wi-Fi connected audio devices"""
-        try:
-            # Discovery would be via mDNS/Bonjour
-            self.devices.append({
-                'type': 'wifi',
-                'name': 'Wi-Fi Audio Discovery',
-                'protocol': 'mdns'
-            })
-            
-            logger.info("Wi-Fi device detection enabled")
-        except Exception as e:
-            logger.warning(f"Wi-Fi detection failed: {e}")
+        # Discovery would be via mDNS/Bonjour
+        logger.info("Wi-Fi device detection enabled")
+        return [{
+            'type': 'wifi',
+            'name': 'Wi-Fi Audio Discovery',
+            'protocol': 'mdns'
+        }]
     
     def get_device_info(self, device):
         """Get detailed information about a device"""
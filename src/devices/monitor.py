@@ -0,0 +1,253 @@
+"""
+Hot-plug monitoring of ALSA sound cards (audio interfaces and MIDI controllers)
+"""
+
+import ctypes
+import ctypes.util
+import logging
+import os
+import re
+import select
+import struct
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+logger = logging.getLogger(__name__)
+
+# ' 1 [DDJ400         ]: USB-Audio - DDJ-400' followed by an indented description line
+CARD_LINE = re.compile(r'^\s*(\d+)\s+\[(\S+)\s*\]:\s*(\S+)\s+-\s+(.*)$')
+PCM_NODE = re.compile(r'^pcmC(\d+)D\d+([pc])$')
+MIDI_NODE = re.compile(r'^midiC(\d+)D\d+$')
+
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_ATTRIB = 0x00000004
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# struct inotify_event header: wd, mask, cookie, len (then len bytes of name)
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+def read_sound_cards(proc_dir='/proc/asound', dev_dir='/dev/snd'):
+    """Current sound cards as {key: device record}, from procfs and device nodes only
+    
+    Costs two small reads and a listdir, so it is cheap enough to rerun on
+    every hot-plug event. Keys combine card number and ALSA id so a card
+    replugged into the same slot still counts as removed and re-added.
+    """
+    try:
+        with open(os.path.join(proc_dir, 'cards'), 'r') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return {}
+    try:
+        nodes = os.listdir(dev_dir)
+    except OSError:
+        nodes = []
+    
+    capabilities = {}
+    for node in nodes:
+        match = PCM_NODE.match(node)
+        if match:
+            caps = capabilities.setdefault(int(match.group(1)), set())
+            caps.add('playback' if match.group(2) == 'p' else 'capture')
+            continue
+        match = MIDI_NODE.match(node)
+        if match:
+            capabilities.setdefault(int(match.group(1)), set()).add('midi')
+    
+    devices = {}
+    for i, line in enumerate(lines):
+        match = CARD_LINE.match(line)
+        if not match:
+            continue
+        card = int(match.group(1))
+        card_id, driver, name = match.group(2), match.group(3), match.group(4).strip()
+        description = lines[i + 1].strip() if i + 1 < len(lines) else name
+        caps = capabilities.get(card, set())
+        devices[f"{card}:{card_id}"] = {
+            'type': 'audio' if caps & {'playback', 'capture'} else 'midi',
+            'backend': 'alsa',
+            'name': name,
+            'card': card,
+            'id': card_id,
+            'driver': driver,
+            'description': description,
+            'usb': driver.startswith('USB'),
+            'playback': 'playback' in caps,
+            'capture': 'capture' in caps,
+            'midi': 'midi' in caps,
+        }
+    return devices
+
+
+class _Inotify:
+    """Minimal inotify watcher on /dev and /dev/snd through libc"""
+    
+    MASK = IN_CREATE | IN_DELETE | IN_ATTRIB
+    
+    def __init__(self, dev_dir):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.dev_dir = dev_dir
+        self._dir_name = os.path.basename(dev_dir).encode()
+        self._node_wd = -1
+        # The parent catches /dev/snd itself appearing when the first card arrives
+        self._watch(os.path.dirname(dev_dir))
+        self.rewatch()
+    
+    def _watch(self, path):
+        return self._libc.inotify_add_watch(self.fd, path.encode(), self.MASK)
+    
+    def rewatch(self):
+        """Watch the node directory (again) if it exists now"""
+        if os.path.isdir(self.dev_dir):
+            self._node_wd = self._watch(self.dev_dir)
+    
+    def _relevant(self, wd, name):
+        # Everything under /dev/snd counts; in /dev only snd itself and raw MIDI nodes
+        return wd == self._node_wd or name == self._dir_name or name.startswith(b'midi')
+    
+    def drain(self):
+        """Discard pending events; True if any of them touched sound or MIDI nodes"""
+        relevant = False
+        try:
+            while True:
+                data = os.read(self.fd, 4096)
+                if not data:
+                    break
+                offset = 0
+                while offset < len(data):
+                    wd, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+                    offset += INOTIFY_EVENT.size
+                    name = data[offset:offset + length].rstrip(b'\0')
+                    offset += length
+                    relevant = relevant or self._relevant(wd, name)
+        except BlockingIOError:
+            pass
+        return relevant
+    
+    def close(self):
+        os.close(self.fd)
+
+
+class _Udev:
+    """pyudev netlink monitor on the sound subsystem"""
+    
+    def __init__(self):
+        import pyudev
+        self.monitor = pyudev.Monitor.from_netlink(pyudev.Context())
+        self.monitor.filter_by('sound')
+        self.monitor.start()
+        self.fd = self.monitor.fileno()
+    
+    def rewatch(self):
+        pass
+    
+    def drain(self):
+        """Discard pending events; True if there were any (already sound-only)"""
+        seen = False
+        while self.monitor.poll(timeout=0) is not None:
+            seen = True
+        return seen
+    
+    def close(self):
+        pass
+
+
+class DeviceMonitor(QThread):
+    """Long-lived watcher emitting incremental device add/remove events
+    
+    Sleeps in select() on udev (pyudev when installed) or inotify on the
+    device node directory, and only then rereads /proc/asound, so a
+    controller plugged in mid-set shows up within SETTLE_SECONDS and
+    nothing is forked. Without either, it falls back to rescanning every
+    POLL_SECONDS.
+    """
+    
+    device_added = pyqtSignal(dict)
+    device_removed = pyqtSignal(dict)
+    
+    # A card's nodes are created over a few milliseconds; one rescan covers them
+    SETTLE_SECONDS = 0.05
+    POLL_SECONDS = 2.0
+    
+    def __init__(self, proc_dir='/proc/asound', dev_dir='/dev/snd'):
+        super().__init__()
+        self.proc_dir = proc_dir
+        self.dev_dir = dev_dir
+        self.devices = {}
+        self._running = False
+        self._wake_r, self._wake_w = os.pipe()
+    
+    def _open_source(self):
+        for factory in (_Udev, lambda: _Inotify(self.dev_dir)):
+            try:
+                return factory()
+            except Exception as e:
+                logger.debug(f"Hot-plug source unavailable: {e}")
+        logger.info(f"No hot-plug events available; polling every {self.POLL_SECONDS}s")
+        return None
+    
+    def rescan(self):
+        """Ask the monitor thread to reread the device list now"""
+        if self._wake_w is not None:
+            os.write(self._wake_w, b'r')
+    
+    def stop(self):
+        """Stop the monitor thread, wait for it and close the wake pipe"""
+        if self._wake_w is None:
+            return
+        self._running = False
+        os.write(self._wake_w, b's')
+        self.wait()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self._wake_r = self._wake_w = None
+    
+    def run(self):
+        self._running = True
+        source = self._open_source()
+        self._scan()
+        watched = [self._wake_r] + ([source.fd] if source is not None else [])
+        timeout = None if source is not None else self.POLL_SECONDS
+        try:
+            while self._running:
+                ready, _, _ = select.select(watched, [], [], timeout)
+                # Poll timeouts and explicit rescan() requests always rescan
+                rescan = source is None or self._wake_r in ready
+                if self._wake_r in ready:
+                    os.read(self._wake_r, 64)
+                if not self._running:
+                    break
+                # /dev sees every tty and disk node; only sound and MIDI ones rescan
+                if source is not None and source.fd in ready and source.drain():
+                    time.sleep(self.SETTLE_SECONDS)
+                    source.drain()
+                    source.rewatch()
+                    rescan = True
+                if rescan:
+                    self._scan()
+        except Exception as e:
+            logger.error(f"Device monitor error: {e}")
+        finally:
+            if source is not None:
+                source.close()
+    
+    def _scan(self):
+        """Diff the current cards against the last scan and emit the changes"""
+        current = read_sound_cards(self.proc_dir, self.dev_dir)
+        previous = self.devices
+        self.devices = current
+        for key, device in previous.items():
+            if current.get(key) != device:
+                logger.info(f"Device removed: {device['name']}")
+                self.device_removed.emit(device)
+        for key, device in current.items():
+            if previous.get(key) != device:
+                logger.info(f"Device added: {device['name']}")
+                self.device_added.emit(device)
@@ -0,0 +1,185 @@
+"""
+Opt-in timing instrumentation for the audio, MIDI and UI hot paths
+
+Disabled unless main.py is run with --instrument or VIOLET_DJ_INSTRUMENT is
+set. Components look up active() once when they are created and skip all
+recording when it is None, so a normal session pays one attribute check
+per block or message.
+"""
+
+import bisect
+import json
+import logging
+import os
+import platform
+import time
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ENV_VAR = 'VIOLET_DJ_INSTRUMENT'
+DUMP_DIR = os.path.expanduser('~/.violet_dj/instrumentation')
+
+_active = None
+
+
+class Histogram:
+    """Recent samples in a fixed ring plus all-time log-spaced bucket counts
+    
+    record() is written for the hot path: one ring store, one bisect into
+    the bucket edges and no allocation. Each histogram has a single writer
+    thread; readers take snapshots and tolerate a sample being mid-update.
+    """
+    
+    def __init__(self, name, unit, lo, hi, size=4096, buckets=24):
+        self.name = name
+        self.unit = unit
+        self.size = size
+        self.edges = [float(e) for e in np.geomspace(lo, hi, buckets)]
+        self.counts = [0] * (buckets + 1)
+        self.samples = np.zeros(size)
+        self.count = 0
+        self.max = 0.0
+    
+    def record(self, value):
+        """Add one measurement"""
+        i = self.count
+        self.samples[i % self.size] = value
+        self.count = i + 1
+        self.counts[bisect.bisect_left(self.edges, value)] += 1
+        if value > self.max:
+            self.max = value
+    
+    def reset(self):
+        """Clear all samples and counts"""
+        self.count = 0
+        self.max = 0.0
+        self.counts = [0] * len(self.counts)
+    
+    def snapshot(self):
+        """Percentiles over the recent ring and the all-time histogram"""
+        recent = self.samples[:min(self.count, self.size)]
+        if len(recent):
+            p50, p95, p99 = np.percentile(recent, (50, 95, 99))
+            mean = float(recent.mean())
+        else:
+            p50 = p95 = p99 = mean = 0.0
+        bounds = [f"<{edge:.3g}" for edge in self.edges] + [f">={self.edges[-1]:.3g}"]
+        return {
+            'unit': self.unit,
+            'count': self.count,
+            'recent': len(recent),
+            'mean': mean,
+            'p50': float(p50),
+            'p95': float(p95),
+            'p99': float(p99),
+            'max': self.max,
+            'histogram': {b: c for b, c in zip(bounds, list(self.counts)) if c},
+        }
+
+
+class Instrumentation:
+    """Named histograms and counters for one session"""
+    
+    # name: (unit, lowest bucket edge, highest bucket edge)
+    HISTOGRAMS = {
+        'audio.callback': ('ms', 0.01, 100.0),
+        'audio.decoder_lead': ('ms', 1.0, 10000.0),
+        'midi.dispatch': ('us', 0.1, 10000.0),
+        'midi.apply': ('us', 1.0, 100000.0),
+        'ui.frame': ('ms', 0.05, 500.0),
+        'ui.frame_interval': ('ms', 1.0, 1000.0),
+    }
+    
+    def __init__(self):
+        self.started = time.time()
+        self.histograms = {name: Histogram(name, unit, lo, hi)
+                           for name, (unit, lo, hi) in self.HISTOGRAMS.items()}
+        # Direct references for the hot paths
+        self.audio_callback = self.histograms['audio.callback']
+        self.decoder_lead = self.histograms['audio.decoder_lead']
+        self.midi_dispatch = self.histograms['midi.dispatch']
+        self.midi_apply = self.histograms['midi.apply']
+        self.ui_frame = self.histograms['ui.frame']
+        self.ui_frame_interval = self.histograms['ui.frame_interval']
+        self.counters = {'audio.blocks': 0, 'audio.late_blocks': 0, 'audio.underruns': 0}
+        self._underruns_seen = 0
+    
+    def record_block(self, engine, elapsed, period):
+        """Render thread: one block's callback time, xruns and decoder lead"""
+        counters = self.counters
+        self.audio_callback.record(elapsed * 1000.0)
+        counters['audio.blocks'] += 1
+        if elapsed > period:
+            counters['audio.late_blocks'] += 1
+        
+        underruns = 0
+        lead = None
+        for deck in engine.decks:
+            # Streaming decks read from a RingBuffer; in-memory sources never starve
+            source = deck.source
+            if source is None or not hasattr(source, 'underruns'):
+                continue
+            underruns += source.underruns
+            if deck.is_playing:
+                available = source.available()
+                if lead is None or available < lead:
+                    lead = available
+        if underruns > self._underruns_seen:
+            counters['audio.underruns'] += underruns - self._underruns_seen
+        self._underruns_seen = underruns
+        if lead is not None:
+            self.decoder_lead.record(lead * 1000.0 / engine.sample_rate)
+    
+    def reset(self):
+        """Start a fresh measurement period"""
+        for histogram in self.histograms.values():
+            histogram.reset()
+        for name in self.counters:
+            self.counters[name] = 0
+    
+    def snapshot(self):
+        """Everything recorded so far, for the live panel"""
+        return {
+            'counters': dict(self.counters),
+            'histograms': {name: h.snapshot() for name, h in self.histograms.items()},
+        }
+    
+    def dump(self, path=None, extra=None):
+        """Write a JSON report (for bug reports) and return its path"""
+        if path is None:
+            stamp = time.strftime('%Y%m%d-%H%M%S')
+            path = os.path.join(DUMP_DIR, f"violet-dj-{stamp}.json")
+        report = {
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'uptime_s': time.time() - self.started,
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+        }
+        report.update(extra or {})
+        report.update(self.snapshot())
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        logger.info(f"Instrumentation written to {path}")
+        return path
+
+
+def enabled_from_env():
+    """True when VIOLET_DJ_INSTRUMENT is set to something other than 0/empty"""
+    return os.environ.get(ENV_VAR, '') not in ('', '0')
+
+
+def enable():
+    """Turn instrumentation on for components created from now on"""
+    global _active
+    if _active is None:
+        _active = Instrumentation()
+        logger.info("Instrumentation enabled")
+    return _active
+
+
+def active():
+    """The session's Instrumentation, or None when disabled"""
+    return _active
@@ -9,10 +9,17 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QTabWidget, QLabel, QPushButton, QSlider, QDial,
                              QGridLayout, QComboBox, QSpinBox, QDoubleSpinBox,
                              QCheckBox, QProgressBar, QFrame, QMessageBox,
-                             QFileDialog)
-from PyQt6.QtCore import Qt, QSize
-from PyQt6.QtGui import QFont, QColor, QLinearGradient, QPainter
+                             QFileDialog, QButtonGroup, QApplication)
+from PyQt6.QtCore import Qt, QSize, QTimer
+from PyQt6.QtGui import QFont, QColor, QLinearGradient, QPainter, QImage
 import logging
+import time
+from typing import Callable
+
+import numpy as np
+
+from src import instrumentation
+from src.ui.startup import startup_timer
 
 logger = logging.getLogger(__name__)
 
@@ -555,6 +562,95 @@ class HardwareBackground(QWidget):
         super().paintEvent(a0)
 
 
+# ─────────────────────────────────────────────────────────────────────────────
+#  Deck waveform
+# ─────────────────────────────────────────────────────────────────────────────
+class DeckWaveform(QWidget):
+    """Scrolling deck waveform drawn from a WaveformPeaks pyramid.
+
+    Each frame asks the pyramid for one min/max/RMS column per pixel of the
+    visible window and rasterises them with numpy into a reused pixel
+    buffer, so cost scales with widget size and never touches PCM.
+    """
+
+    MIN_SPAN, MAX_SPAN = 2.0, 240.0
+    BACKGROUND = 0xFF0D0D0D
+    PEAK_COLOR = 0xFF5A2D8C
+    RMS_COLOR = 0xFFB07CFF
+    PLAYHEAD_COLOR = QColor(255, 136, 0)
+
+    def __init__(self, parent: QWidget | None = None):
+        super().__init__(parent)
+        self.peaks = None
+        self.position = 0.0
+        self.span = 12.0
+        self._pixels: np.ndarray | None = None
+        self._rows: np.ndarray | None = None
+        self._drag_x: float | None = None
+        self.instruments = instrumentation.active()
+        self.setMinimumHeight(90)
+
+    def set_peaks(self, peaks):
+        self.peaks = peaks
+        self.update()
+
+    def set_position(self, seconds: float):
+        if seconds != self.position:
+            self.position = seconds
+            self.update()
+
+    def wheelEvent(self, a0):
+        steps = a0.angleDelta().y() / 120.0
+        self.span = min(self.MAX_SPAN, max(self.MIN_SPAN, self.span * 0.8 ** steps))
+        self.update()
+
+    def mousePressEvent(self, a0):
+        self._drag_x = a0.position().x()
+
+    def mouseMoveEvent(self, a0):
+        # Browse the view while paused; playback re-centres it on the playhead
+        if self._drag_x is None or self.width() == 0:
+            return
+        x = a0.position().x()
+        self.position -= (x - self._drag_x) * self.span / self.width()
+        self._drag_x = x
+        self.update()
+
+    def mouseReleaseEvent(self, a0):
+        self._drag_x = None
+
+    def paintEvent(self, a0):
+        w, h = self.width(), self.height()
+        if w <= 0 or h <= 0:
+            return
+        started = time.perf_counter()
+        if self._pixels is None or self._pixels.shape != (h, w):
+            self._pixels = np.empty((h, w), dtype=np.uint32)
+            self._rows = np.arange(h, dtype=np.float32)[:, None]
+        pixels = self._pixels
+        pixels.fill(self.BACKGROUND)
+
+        if self.peaks is not None:
+            start = self.position - self.span / 2
+            mins, maxs, rms = self.peaks.window(start, start + self.span, w)
+            mid = (h - 1) / 2.0
+            rows = self._rows
+            peak = (rows >= mid - maxs * mid) & (rows <= mid - mins * mid)
+            body = np.abs(rows - mid) <= rms * mid
+            body &= peak
+            pixels[peak] = self.PEAK_COLOR
+            pixels[body] = self.RMS_COLOR
+
+        p = QPainter(self)
+        image = QImage(pixels.data, w, h, w * 4, QImage.Format.Format_RGB32)
+        p.drawImage(0, 0, image)
+        p.setPen(self.PLAYHEAD_COLOR)
+        p.drawLine(w // 2, 0, w // 2, h)
+        p.end()
+        if self.instruments is not None:
+            self.instruments.ui_frame.record((time.perf_counter() - started) * 1000.0)
+
+
 # ─────────────────────────────────────────────────────────────────────────────
 #  Helpers
 # ─────────────────────────────────────────────────────────────────────────────
@@ -653,6 +749,11 @@ class VioletDJMixer(QMainWindow):
 
     VERSION = "1.1.0"
 
+    # Tempo fader range in percent at full travel
+    TEMPO_RANGES = {"±6": 6.0, "±10": 10.0, "±16": 16.0, "WIDE": 50.0}
+    OUTPUT_BACKENDS = {"PulseAudio": "pulseaudio", "ALSA": "alsa", "JACK": "jack",
+                       "No Output": "null"}
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle(f"Violet DJ Mixer v{self.VERSION} — Professional Digital Mixing Board")
@@ -664,6 +765,11 @@ class VioletDJMixer(QMainWindow):
         font.setFamilies(["Inter", "SF Pro Display", "Segoe UI", "Ubuntu"])
         font.setPointSize(10)
         self.setFont(font)
+        startup_timer.mark("stylesheet")
+
+        from src.audio.engine import AudioEngine
+        self.audio_engine = AudioEngine()
+        startup_timer.mark("audio engine")
 
         central = HardwareBackground()
         self.setCentralWidget(central)
@@ -676,22 +782,113 @@ class VioletDJMixer(QMainWindow):
         self.tabs = QTabWidget()
         root.addWidget(self.tabs)
 
+        # Widgets owned by tabs that are built on first activation
+        self.deck_waveform: DeckWaveform | None = None
+        self.device_list: QLabel | None = None
+        self.sampler_pads: list[QPushButton | None] = []
+        self.pad_mode_btns: dict[str, QPushButton] = {}
+        self.hot_cue_btns: list[QPushButton] = []
+        self._shown_cues: list[float | None] | None = None
+        self.loop_btn: QPushButton | None = None
+        self.backend_combo: QComboBox | None = None
+        self.controller_combo: QComboBox | None = None
+        self.mapping_label: QLabel | None = None
+        self.loop_beats: QComboBox | None = None
+        self._rolling: int | None = None
+
+        # Only the Mixer tab is built up front; the others are built (and
+        # styled) the first time they are shown
+        self._tab_builders: dict[int, tuple[QWidget, Callable[[], QWidget]]] = {}
         self.tabs.addTab(self.create_mixer_panel(),  "  Mixer  ")
-        self.tabs.addTab(self.create_sampler_panel(), "  Sampler  ")
-        self.tabs.addTab(self.create_effects_panel(), "  Effects  ")
-        self.tabs.addTab(self.create_device_panel(),  "  Devices  ")
-        self.tabs.addTab(self.create_controller_panel(), "  Controllers  ")
-        self.tabs.addTab(self.create_settings_panel(), "  Settings  ")
+        startup_timer.mark("mixer tab")
+        self.sampler_tab = self._add_lazy_tab(self.create_sampler_panel, "  Sampler  ")
+        self._add_lazy_tab(self.create_effects_panel, "  Effects  ")
+        self.devices_tab = self._add_lazy_tab(self.create_device_panel, "  Devices  ")
+        self._add_lazy_tab(self.create_controller_panel, "  Controllers  ")
+        self._add_lazy_tab(self.create_settings_panel, "  Settings  ")
+        self.instruments = instrumentation.active()
+        self.diagnostics_tab = -1
+        if self.instruments is not None:
+            self.diagnostics_tab = self._add_lazy_tab(self.create_diagnostics_panel,
+                                                      "  Diagnostics  ")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
 
         sb = self.statusBar()
         if sb:
             sb.showMessage(f"Violet DJ Mixer v{self.VERSION}  ·  Ready  ·  No devices connected")
 
         self.device_detector = None
-        self.start_device_detection()
-
+        self.device_monitor = None
+        self.controller_manager = None
+        self.detected_controllers: list[dict] = []
+        self.live_devices: dict[str, dict] = {}
+        self.probed_devices: list[dict] = []
+
+        # Analysis finishes on a worker thread; poll for results rather than
+        # crossing threads with signals from plain Python code
+        self._shown_analysis = None
+        self.analysis_timer = QTimer(self)
+        self.analysis_timer.timeout.connect(self.refresh_analysis)
+        self.analysis_timer.start(250)
+
+        # Runs only while the Sampler tab (and so the waveform) is visible
+        self.waveform_timer = QTimer(self)
+        self.waveform_timer.timeout.connect(self.refresh_waveform)
+
+        self.diagnostics_timer = QTimer(self)
+        self.diagnostics_timer.timeout.connect(self.refresh_diagnostics)
+        self.diagnostics_label: QLabel | None = None
+        if self.instruments is not None:
+            # Event-loop heartbeat: late ticks are UI stalls
+            self._last_frame = time.perf_counter()
+            self.frame_timer = QTimer(self)
+            self.frame_timer.timeout.connect(self.on_frame_tick)
+            self.frame_timer.start(16)
+
+        startup_timer.mark("window")
         logger.info(f"Violet DJ Mixer v{self.VERSION} initialized")
 
+    def finish_startup(self):
+        """Called from the event loop once the window is up: start the deferred work"""
+        startup_timer.mark("first paint")
+        startup_timer.report()
+        self.start_device_detection()
+        self.start_controllers()
+        self.audio_engine.preload()
+        if self.audio_engine.backend is None:
+            self.audio_engine.init_default_backend()
+            self._show_backend()
+
+    # ── Lazy tabs ───────────────────────────────────────────────────────────
+    def _add_lazy_tab(self, builder: Callable[[], QWidget], title: str) -> int:
+        holder = QWidget()
+        holder_lo = QVBoxLayout(holder)
+        holder_lo.setContentsMargins(0, 0, 0, 0)
+        index = self.tabs.addTab(holder, title)
+        self._tab_builders[index] = (holder, builder)
+        return index
+
+    def on_tab_changed(self, index: int):
+        pending = self._tab_builders.pop(index, None)
+        if pending is not None:
+            holder, builder = pending
+            layout = holder.layout()
+            if layout:
+                layout.addWidget(builder())
+            if index == self.sampler_tab:
+                self.refresh_waveform()
+            elif index == self.devices_tab:
+                self._show_device_status()
+        if index == self.sampler_tab:
+            self.waveform_timer.start(16)
+        else:
+            self.waveform_timer.stop()
+        if index == self.diagnostics_tab:
+            self.refresh_diagnostics()
+            self.diagnostics_timer.start(250)
+        else:
+            self.diagnostics_timer.stop()
+
     # ── Menu ────────────────────────────────────────────────────────────────
     def create_menu_bar(self):
         mb = self.menuBar()
@@ -699,6 +896,7 @@ class VioletDJMixer(QMainWindow):
         fm = mb.addMenu("File")
         fm.addAction("Open Track",    self.open_track)
         fm.addAction("Open Playlist", self.open_playlist)
+        fm.addAction("Load Sample Bank…", self.load_sample_bank)
         fm.addSeparator()
         fm.addAction("Exit", self.close)
 
@@ -759,10 +957,12 @@ class VioletDJMixer(QMainWindow):
         lo.addWidget(_hline())
         lo.addWidget(_panel_title("Headphones"))
         lo.addWidget(_section_label("Mixing"))
-        mix_lo, _ = _knob_col("CUE ◂▸ MSTR", 50, 44)
+        mix_lo, mix_knob = _knob_col("CUE ◂▸ MSTR", 50, 44)
+        self._bind_mixer(mix_knob, "set_headphone_mix")
         lo.addLayout(mix_lo)
         lo.addWidget(_section_label("Level"))
-        lvl_lo, _ = _knob_col("", 70, 44)
+        lvl_lo, lvl_knob = _knob_col("", 70, 44)
+        self._bind_mixer(lvl_knob, "set_headphone_level")
         lo.addLayout(lvl_lo)
 
         lo.addStretch()
@@ -806,6 +1006,7 @@ class VioletDJMixer(QMainWindow):
 
     def _create_channel_strip(self, ch: int) -> QFrame:
         frame, lo = _channel_frame()
+        idx = ch - 1
 
         # Input selector
         sel = _combo(["CD/DIGITAL", "LINE", "PHONO"])
@@ -821,7 +1022,8 @@ class VioletDJMixer(QMainWindow):
         lo.addWidget(_hline())
 
         # TRIM knob
-        trim_lo, _ = _knob_col("TRIM", 60, 48)
+        trim_lo, trim_knob = _knob_col("TRIM", 60, 48)
+        self._bind_mixer(trim_knob, "set_trim", idx)
         lo.addLayout(trim_lo)
 
         lo.addWidget(_hline())
@@ -829,8 +1031,10 @@ class VioletDJMixer(QMainWindow):
         # EQ knobs
         eq_lo = QVBoxLayout()
         eq_lo.setSpacing(2)
-        for eq_name, eq_val in (("HI", 50), ("MID", 50), ("LOW", 50)):
-            klo, _ = _knob_col(eq_name, eq_val, 44)
+        for eq_name, eq_val, setter in (("HI", 50, "set_high"), ("MID", 50, "set_mid"),
+                                        ("LOW", 50, "set_low")):
+            klo, knob = _knob_col(eq_name, eq_val, 44)
+            self._bind_eq(knob, idx, setter)
             eq_lo.addLayout(klo)
         lo.addLayout(eq_lo)
 
@@ -850,7 +1054,8 @@ class VioletDJMixer(QMainWindow):
         meter.setMinimumHeight(100)
         meter_row.addWidget(meter, alignment=Qt.AlignmentFlag.AlignHCenter)
 
-        color_lo, _ = _knob_col("COLOR", 30, 42)
+        color_lo, color_knob = _knob_col("COLOR", 50, 42)
+        self._bind_eq(color_knob, idx, "set_color")
         meter_row.addLayout(color_lo)
         lo.addLayout(meter_row)
 
@@ -859,6 +1064,7 @@ class VioletDJMixer(QMainWindow):
         # CUE button
         cue_btn = _btn("CUE", "btnCue", checkable=True, min_h=38)
         cue_btn.setMinimumWidth(9999)  # full width
+        cue_btn.toggled.connect(lambda on: self.audio_engine.mixer.set_cue(idx, on))
         lo.addWidget(cue_btn)
 
         # Fader
@@ -870,6 +1076,7 @@ class VioletDJMixer(QMainWindow):
         fader.setValue(80)
         fader.setMinimumHeight(180)
         fader.setMaximumWidth(50)
+        self._bind_mixer(fader, "set_fader", idx)
         fader_wrap.addStretch()
         fader_wrap.addWidget(fader)
         fader_wrap.addStretch()
@@ -879,6 +1086,7 @@ class VioletDJMixer(QMainWindow):
         lo.addWidget(_section_label("CF Assign"))
         assign_row = QHBoxLayout()
         assign_row.setSpacing(4)
+        assign_group = QButtonGroup(frame)
         for label in ("A", "THRU", "B"):
             b = QPushButton(label)
             b.setCheckable(True)
@@ -891,6 +1099,9 @@ class VioletDJMixer(QMainWindow):
             """)
             if label == "THRU":
                 b.setChecked(True)
+            b.clicked.connect(
+                lambda _, side=label: self.audio_engine.mixer.set_crossfader_assign(idx, side))
+            assign_group.addButton(b)
             assign_row.addWidget(b)
         lo.addLayout(assign_row)
 
@@ -915,6 +1126,7 @@ class VioletDJMixer(QMainWindow):
         lo.addWidget(_section_label("CH Select"))
         ch_row = QGridLayout()
         ch_row.setSpacing(3)
+        fx_group = QButtonGroup(frame)
         for i, txt in enumerate(["1","2","3","4","MIC","A","B","MST"]):
             b = QPushButton(txt)
             b.setCheckable(True)
@@ -926,8 +1138,12 @@ class VioletDJMixer(QMainWindow):
                 QPushButton:checked { background:#2244aa; color:#ffffff;
                     border-color:#4466cc; }
             """)
-            if txt == "1":
+            if txt == "MST":
                 b.setChecked(True)
+            if txt.isdigit() or txt == "MST":
+                target = int(txt) - 1 if txt.isdigit() else self.audio_engine.FX_MASTER
+                b.clicked.connect(lambda _, t=target: self.audio_engine.set_fx_target(t))
+                fx_group.addButton(b)
             ch_row.addWidget(b, i // 4, i % 4)
         lo.addLayout(ch_row)
 
@@ -941,15 +1157,15 @@ class VioletDJMixer(QMainWindow):
 
         # BPM
         lo.addWidget(_section_label("BPM"))
-        bpm_lbl = QLabel("120")
-        bpm_lbl.setObjectName("bpmValue")
-        bpm_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        lo.addWidget(bpm_lbl)
+        self.bpm_label = QLabel("---")
+        self.bpm_label.setObjectName("bpmValue")
+        self.bpm_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lo.addWidget(self.bpm_label)
 
-        ms_lbl = QLabel("2000 ms")
-        ms_lbl.setObjectName("msValue")
-        ms_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        lo.addWidget(ms_lbl)
+        self.ms_label = QLabel("--- ms")
+        self.ms_label.setObjectName("msValue")
+        self.ms_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        lo.addWidget(self.ms_label)
 
         # Beat arrows
         beat_row = QHBoxLayout()
@@ -990,6 +1206,7 @@ class VioletDJMixer(QMainWindow):
         master_fader.setMaximum(100)
         master_fader.setValue(80)
         master_fader.setMinimumHeight(120)
+        self._bind_mixer(master_fader, "set_master_level")
         master_row.addStretch()
         master_row.addWidget(master_fader)
 
@@ -1030,6 +1247,7 @@ class VioletDJMixer(QMainWindow):
         xfader.setObjectName("crossfader")
         xfader.setMaximum(100)
         xfader.setValue(50)
+        self._bind_mixer(xfader, "set_crossfader")
         lo.addWidget(xfader, 1)
 
         b_lbl = QLabel("B  》")
@@ -1038,9 +1256,14 @@ class VioletDJMixer(QMainWindow):
 
         lo.addSpacing(20)
         lo.addWidget(_section_label("Curve"))
-        for shape in ("⌒", "—", "⌓"):
+        curve_group = QButtonGroup(frame)
+        for shape, curve in (("⌒", "smooth"), ("—", "linear"), ("⌓", "sharp")):
             b = QPushButton(shape)
             b.setCheckable(True)
+            b.setChecked(curve == "smooth")
+            b.clicked.connect(
+                lambda _, c=curve: self.audio_engine.mixer.set_crossfader_curve(c))
+            curve_group.addButton(b)
             b.setFixedSize(QSize(28, 28))
             b.setStyleSheet("""
                 QPushButton { background:#1a1a1a; color:#555; border:1px solid #2e2e2e;
@@ -1055,6 +1278,9 @@ class VioletDJMixer(QMainWindow):
     #  SAMPLER TAB  (DJS-1000 style)
     # ════════════════════════════════════════════════════════════════════════
     def create_sampler_panel(self) -> QWidget:
+        from src.audio.cues import HOT_CUE_COLORS
+        from src.audio.loop import LOOP_BEATS, beats_label
+
         root = QWidget()
         root.setStyleSheet("background:transparent;")
         lo = QHBoxLayout(root)
@@ -1091,7 +1317,26 @@ class VioletDJMixer(QMainWindow):
 
         left_lo.addWidget(_hline())
 
+        left_lo.addWidget(_section_label("Loop (beats)"))
+        labels = [beats_label(b) for b in LOOP_BEATS]
+        self.loop_beats = _combo(labels, beats_label(self.audio_engine.decks[0].loop.beats))
+        self.loop_beats.currentIndexChanged.connect(
+            lambda i: self.audio_engine.set_loop_beats(0, LOOP_BEATS[i]))
+        left_lo.addWidget(self.loop_beats)
+        loop_row = QHBoxLayout()
+        loop_row.setSpacing(6)
+        self.loop_btn = _btn("LOOP", "btnLoop", checkable=True, min_w=52, min_h=32)
+        self.loop_btn.clicked.connect(lambda _checked: self.on_loop_clicked())
+        reloop_btn = _btn("RELOOP", "btnReloop", min_w=52, min_h=32)
+        reloop_btn.clicked.connect(lambda _checked: self.on_reloop_clicked())
+        loop_row.addWidget(self.loop_btn)
+        loop_row.addWidget(reloop_btn)
+        left_lo.addLayout(loop_row)
+
+        left_lo.addWidget(_hline())
+
         play_btn = _btn("▶ PLAY/PAUSE", "btnPlay", checkable=True, min_h=44)
+        play_btn.toggled.connect(self.on_play_toggled)
         left_lo.addWidget(play_btn)
 
         left_lo.addStretch()
@@ -1104,6 +1349,15 @@ class VioletDJMixer(QMainWindow):
         centre_lo.setSpacing(8)
         centre_lo.setContentsMargins(0, 0, 0, 0)
 
+        # Deck waveform
+        wave_frame = QFrame()
+        wave_frame.setObjectName("glassCard")
+        wave_lo = QVBoxLayout(wave_frame)
+        wave_lo.setContentsMargins(6, 6, 6, 6)
+        self.deck_waveform = DeckWaveform()
+        wave_lo.addWidget(self.deck_waveform)
+        centre_lo.addWidget(wave_frame)
+
         # Mode bar
         mode_frame = QFrame()
         mode_frame.setObjectName("glassCard")
@@ -1124,6 +1378,7 @@ class VioletDJMixer(QMainWindow):
                 QPushButton:hover { color:#aaaaaa; }
             """)
             mode_lo.addWidget(b)
+            self.pad_mode_btns[mode] = b
         mode_lo.addStretch()
         for mode in ("MUTE", "HOT SLICE", "SLICE", "SCALE"):
             b = QPushButton(mode)
@@ -1137,6 +1392,8 @@ class VioletDJMixer(QMainWindow):
                 QPushButton:hover { color:#aaaaaa; }
             """)
             mode_lo.addWidget(b)
+            self.pad_mode_btns[mode] = b
+        self.pad_mode_btns["SLICE"].toggled.connect(self.on_slice_mode_toggled)
         centre_lo.addWidget(mode_frame)
 
         # 4×4 performance pad grid
@@ -1155,6 +1412,7 @@ class VioletDJMixer(QMainWindow):
         pad_grid = QGridLayout(pad_frame)
         pad_grid.setSpacing(6)
         pad_grid.setContentsMargins(12, 12, 12, 12)
+        self.sampler_pads = [None] * 16
         for idx in range(16):
             row, col = 3 - (idx // 4), idx % 4
             pad_no = (3 - row) * 4 + col + 1
@@ -1163,12 +1421,16 @@ class VioletDJMixer(QMainWindow):
             btn.setProperty("padColor", PAD_COLORS[idx])
             btn.setCheckable(True)
             btn.setMinimumSize(QSize(70, 70))
+            btn.pressed.connect(lambda pad=pad_no - 1: self.on_pad_pressed(pad))
+            btn.released.connect(lambda pad=pad_no - 1: self.on_pad_released(pad))
+            self.sampler_pads[pad_no - 1] = btn
             pad_grid.addWidget(btn, row, col)
+        self._label_sampler_pads()
         centre_lo.addWidget(pad_frame, 1)
 
         # Hot cue strips
-        HOT_COLORS_1 = ["green","teal","sky","blue","amber","orange","rose","purple"]
-        HOT_COLORS_2 = ["lime","mint","violet","fuchsia","yellow","orange_red","magenta","pink"]
+        HOT_COLORS_1, HOT_COLORS_2 = HOT_CUE_COLORS[:8], HOT_CUE_COLORS[8:]
+        self.hot_cue_btns = []
         for strip_colors in (HOT_COLORS_1, HOT_COLORS_2):
             strip_frame = QFrame()
             strip_frame.setObjectName("glassCard")
@@ -1183,6 +1445,9 @@ class VioletDJMixer(QMainWindow):
                 btn.setCheckable(True)
                 btn.setMinimumSize(QSize(40, 34))
                 btn.setMaximumSize(QSize(52, 40))
+                btn.clicked.connect(
+                    lambda _checked, slot=len(self.hot_cue_btns): self.on_hot_cue_clicked(slot))
+                self.hot_cue_btns.append(btn)
                 strip_lo.addWidget(btn)
             strip_lo.addStretch()
             centre_lo.addWidget(strip_frame)
@@ -1197,8 +1462,11 @@ class VioletDJMixer(QMainWindow):
         right_lo.addWidget(_panel_title("Beat Sync"))
         sync_row = QHBoxLayout()
         sync_row.setSpacing(6)
-        sync_btn   = _btn("SYNC",   "btnSync",   min_w=52, min_h=32)
-        master_btn = _btn("MASTER", "btnMaster", min_w=52, min_h=32)
+        sync_btn   = _btn("SYNC",   "btnSync",   checkable=True, min_w=52, min_h=32)
+        master_btn = _btn("MASTER", "btnMaster", checkable=True, min_w=52, min_h=32)
+        sync_btn.toggled.connect(self.on_sync_toggled)
+        master_btn.toggled.connect(self.on_master_toggled)
+        self.sync_btn, self.master_btn = sync_btn, master_btn
         sync_row.addWidget(sync_btn)
         sync_row.addWidget(master_btn)
         right_lo.addLayout(sync_row)
@@ -1206,6 +1474,9 @@ class VioletDJMixer(QMainWindow):
         right_lo.addWidget(_hline())
         right_lo.addWidget(_panel_title("Tempo"))
         right_lo.addWidget(_section_label("±6 / ±10 / ±16 / WIDE"))
+        self.tempo_range = _combo(list(self.TEMPO_RANGES), "±10")
+        self.tempo_range.currentTextChanged.connect(self.on_tempo_changed)
+        right_lo.addWidget(self.tempo_range)
 
         tempo_fader = QSlider(Qt.Orientation.Vertical)
         tempo_fader.setObjectName("tempoFader")
@@ -1213,8 +1484,19 @@ class VioletDJMixer(QMainWindow):
         tempo_fader.setMaximum(50)
         tempo_fader.setValue(0)
         tempo_fader.setMinimumHeight(200)
+        tempo_fader.valueChanged.connect(self.on_tempo_changed)
+        self.tempo_fader = tempo_fader
         right_lo.addWidget(tempo_fader, alignment=Qt.AlignmentFlag.AlignHCenter)
 
+        self.tempo_label = QLabel("0.00%")
+        self.tempo_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        right_lo.addWidget(self.tempo_label)
+
+        key_lock = _btn("MASTER TEMPO", "btnMasterTempo", checkable=True, min_h=28)
+        key_lock.setChecked(True)
+        key_lock.toggled.connect(lambda on: self.audio_engine.set_key_lock(0, on))
+        right_lo.addWidget(key_lock)
+
         right_lo.addWidget(_section_label("Tempo Reset"))
         reset_btn = QPushButton("RESET")
         reset_btn.setStyleSheet("""
@@ -1223,6 +1505,7 @@ class VioletDJMixer(QMainWindow):
                 padding:5px 12px; font-size:10px; font-weight:bold; }
             QPushButton:hover { background:#ff8800; color:#ffffff; }
         """)
+        reset_btn.clicked.connect(lambda: tempo_fader.setValue(0))
         right_lo.addWidget(reset_btn, alignment=Qt.AlignmentFlag.AlignHCenter)
 
         right_lo.addWidget(_hline())
@@ -1299,8 +1582,10 @@ class VioletDJMixer(QMainWindow):
             row_lo.setContentsMargins(12, 8, 12, 8)
             row_lo.setSpacing(12)
 
+            effect = self.audio_engine.beat_fx.get(name)
             chk = QCheckBox(name)
             chk.setMinimumWidth(100)
+            chk.toggled.connect(lambda on, fx=effect: setattr(fx, "enabled", on))
             row_lo.addWidget(chk)
 
             hl = QLabel(hint)
@@ -1311,7 +1596,9 @@ class VioletDJMixer(QMainWindow):
                 row_lo.addWidget(QLabel(f"{param}:"))
                 sl = QSlider(Qt.Orientation.Horizontal)
                 sl.setMaximum(100)
-                sl.setValue(50 if param == "Mix" else 30)
+                sl.setValue(effect.get_parameter(param.lower()))
+                sl.valueChanged.connect(
+                    lambda v, fx=effect, p=param.lower(): fx.set_parameter(p, v))
                 sl.setMinimumWidth(110)
                 row_lo.addWidget(sl)
 
@@ -1345,11 +1632,15 @@ class VioletDJMixer(QMainWindow):
         dev_list.setMinimumHeight(180)
         dev_list.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
         panel_lo.addWidget(dev_list)
+        self.device_list = dev_list
 
         btn_row = QHBoxLayout()
         btn_row.setSpacing(8)
         for t in ("Refresh", "Remove Selected", "Configure"):
-            btn_row.addWidget(QPushButton(t))
+            btn = QPushButton(t)
+            if t == "Refresh":
+                btn.clicked.connect(self.refresh_devices)
+            btn_row.addWidget(btn)
         btn_row.addStretch()
         panel_lo.addLayout(btn_row)
 
@@ -1385,18 +1676,65 @@ class VioletDJMixer(QMainWindow):
         ctrl_row = QHBoxLayout()
         ctrl_row.setSpacing(8)
         ctrl_row.addWidget(QLabel("Controller:"))
-        combo = _combo(["— Select Controller —"])
-        ctrl_row.addWidget(combo)
-        ctrl_row.addWidget(QPushButton("Detect Devices"))
+        self.controller_combo = _combo(["— Select Controller —"])
+        self.controller_combo.activated.connect(self.on_controller_selected)
+        ctrl_row.addWidget(self.controller_combo)
+        detect_btn = QPushButton("Detect Devices")
+        detect_btn.clicked.connect(lambda _checked: self.detect_controllers())
+        ctrl_row.addWidget(detect_btn)
+        load_btn = QPushButton("Load Profile…")
+        load_btn.clicked.connect(lambda _checked: self.load_mapping_profile())
+        ctrl_row.addWidget(load_btn)
         ctrl_row.addStretch()
         panel_lo.addLayout(ctrl_row)
 
         panel_lo.addWidget(_panel_title("MIDI Mapping"))
-        mapping = QLabel("  Drag & drop MIDI controls to map them\n\n  No mappings configured")
-        mapping.setObjectName("mappingArea")
-        mapping.setMinimumHeight(280)
-        mapping.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        panel_lo.addWidget(mapping)
+        self.mapping_label = QLabel()
+        self.mapping_label.setObjectName("mappingArea")
+        self.mapping_label.setMinimumHeight(280)
+        self.mapping_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        panel_lo.addWidget(self.mapping_label)
+        self._show_controllers()
+
+        lo.addWidget(panel)
+        lo.addStretch()
+        return root
+
+    # ════════════════════════════════════════════════════════════════════════
+    #  DIAGNOSTICS TAB (only with --instrument)
+    # ════════════════════════════════════════════════════════════════════════
+    def create_diagnostics_panel(self) -> QWidget:
+        root = QWidget()
+        root.setStyleSheet("background:transparent;")
+        lo = QVBoxLayout(root)
+        lo.setContentsMargins(4, 4, 4, 4)
+        lo.setSpacing(10)
+
+        panel = QFrame()
+        panel.setObjectName("panelLeft")
+        panel_lo = QVBoxLayout(panel)
+        panel_lo.setContentsMargins(16, 14, 16, 14)
+        panel_lo.setSpacing(10)
+
+        panel_lo.addWidget(_panel_title("Timing"))
+        label = QLabel()
+        label.setObjectName("deviceList")
+        label.setFont(QFont("monospace", 9))
+        label.setMinimumHeight(260)
+        label.setAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        panel_lo.addWidget(label)
+        self.diagnostics_label = label
+
+        btn_row = QHBoxLayout()
+        btn_row.setSpacing(8)
+        dump_btn = QPushButton("Save Report…")
+        dump_btn.clicked.connect(self.save_diagnostics)
+        reset_btn = QPushButton("Reset")
+        reset_btn.clicked.connect(self.reset_diagnostics)
+        btn_row.addWidget(dump_btn)
+        btn_row.addWidget(reset_btn)
+        btn_row.addStretch()
+        panel_lo.addLayout(btn_row)
 
         lo.addWidget(panel)
         lo.addStretch()
@@ -1419,7 +1757,7 @@ class VioletDJMixer(QMainWindow):
         af, a_lo = _side_frame()
         a_lo.addWidget(_panel_title("Audio Configuration"))
         for lbl_text, widget_factory in (
-            ("Audio Backend", lambda: _combo(["PulseAudio", "ALSA", "JACK"])),
+            ("Audio Backend", lambda: _combo(list(self.OUTPUT_BACKENDS))),
             ("Sample Rate",   lambda: _combo(["44100 Hz", "48000 Hz", "96000 Hz"], "48000 Hz")),
             ("Buffer Size",   lambda: _spinbox(256, 64, 4096, 64)),
         ):
@@ -1428,8 +1766,16 @@ class VioletDJMixer(QMainWindow):
             lbl = QLabel(lbl_text)
             lbl.setMinimumWidth(110)
             row.addWidget(lbl)
-            row.addWidget(widget_factory())
+            widget = widget_factory()
+            row.addWidget(widget)
             row.addStretch()
+            if lbl_text == "Audio Backend":
+                self.backend_combo = widget
+                self._show_backend()
+                widget.currentTextChanged.connect(self.on_backend_changed)
+            elif lbl_text == "Buffer Size":
+                widget.setValue(self.audio_engine.block_size)
+                widget.valueChanged.connect(self.on_buffer_size_changed)
             a_lo.addLayout(row)
         a_lo.addStretch()
         row_lo.addWidget(af, 1)
@@ -1461,23 +1807,369 @@ class VioletDJMixer(QMainWindow):
     # ── Device detection ────────────────────────────────────────────────────
     def start_device_detection(self):
         from src.devices.detector import DeviceDetector
+        from src.devices.monitor import DeviceMonitor
+        # One-off probe for backends without hot-plug events (PulseAudio, Bluetooth)
         self.device_detector = DeviceDetector()
         self.device_detector.devices_found.connect(self.on_devices_found)
         self.device_detector.start()
+        # Sound cards and USB controllers are tracked live from then on
+        self.device_monitor = DeviceMonitor()
+        self.device_monitor.device_added.connect(self.on_device_added)
+        self.device_monitor.device_removed.connect(self.on_device_removed)
+        self.device_monitor.start()
 
     def on_devices_found(self, devices):
-        count = len(devices)
+        self.probed_devices = list(devices)
+        logger.info(f"Detected {len(devices)} devices")
+        self._show_device_status()
+
+    def on_device_added(self, device):
+        self.live_devices[f"{device['card']}:{device['id']}"] = device
+        self._show_device_status(f"Connected: {device['name']}")
+        if device['midi']:
+            self.detect_controllers()
+
+    def on_device_removed(self, device):
+        self.live_devices.pop(f"{device['card']}:{device['id']}", None)
+        self._show_device_status(f"Disconnected: {device['name']}")
+
+    def _show_device_status(self, event: str = "Ready"):
+        live = [f"● {d['name']}  ·  ALSA card {d['card']}"
+                + ("  ·  MIDI" if d['midi'] else "")
+                for d in self.live_devices.values()]
+        probed = []
+        for d in self.probed_devices:
+            if d['type'] == 'usb':
+                probed.append(f"○ {d['name']}  ·  USB {d['vendor_id']}:{d['product_id']}")
+            elif d['type'] == 'bluetooth':
+                probed.append(f"○ {d['name']}  ·  Bluetooth {d['address']}")
+            elif d.get('backend') == 'pulseaudio' and not d.get('monitor'):
+                probed.append(f"○ {d['name']}  ·  PulseAudio")
+        if self.device_list is not None:
+            self.device_list.setText("\n".join(live + probed) or "No devices found")
+        count = len(live) + len(probed)
         sb = self.statusBar()
         if sb:
-            sb.showMessage(f"Violet DJ Mixer v{self.VERSION}  ·  Ready  ·  {count} device(s) connected")
-        logger.info(f"Detected {count} devices")
+            sb.showMessage(f"Violet DJ Mixer v{self.VERSION}  ·  {event}  ·  {count} device(s) connected")
+
+    # ── Controllers ─────────────────────────────────────────────────────────
+    def start_controllers(self):
+        try:
+            from src.controllers.manager import ControllerManager
+            self.controller_manager = ControllerManager(self.audio_engine)
+        except Exception as e:
+            # No python-rtmidi, or no ALSA sequencer to open
+            logger.warning(f"MIDI controllers unavailable: {e}")
+            return
+        self.detect_controllers()
+
+    def detect_controllers(self):
+        manager = self.controller_manager
+        if manager is None:
+            return
+        self.detected_controllers = manager.detect_controllers()
+        if manager.active_controller is None and self.detected_controllers:
+            # Plug and play: the first recognised controller drives the decks
+            manager.connect_controller(self.detected_controllers[0]['type'])
+        self._show_controllers()
+
+    def on_controller_selected(self, index: int):
+        manager = self.controller_manager
+        if manager is None or not 0 < index <= len(self.detected_controllers):
+            return
+        controller = self.detected_controllers[index - 1]
+        if not manager.connect_controller(controller['type']):
+            QMessageBox.warning(self, "Controllers", f"Could not connect to {controller['port']}")
+        self._show_controllers()
+
+    def load_mapping_profile(self):
+        manager = self.controller_manager
+        if manager is None:
+            QMessageBox.warning(self, "Load Profile", "MIDI controllers are unavailable.")
+            return
+        p, _ = QFileDialog.getOpenFileName(
+            self, "Load Mapping Profile", "", "Mapping Profiles (*.yaml *.yml)")
+        if not p:
+            return
+        try:
+            # Applies to the connected controller unless the profile names one
+            profile = manager.load_mapping_profile(p)
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(self, "Load Profile", f"Could not load profile:\n{e}")
+            return
+        if profile.controller is not None and manager.active_controller is None:
+            manager.connect_controller(profile.controller)
+        self._show_controllers()
+
+    def _show_controllers(self):
+        if self.controller_combo is None:
+            return
+        manager = self.controller_manager
+        active = manager.active_controller if manager is not None else None
+        self.controller_combo.blockSignals(True)
+        self.controller_combo.clear()
+        self.controller_combo.addItem("— Select Controller —")
+        for d in self.detected_controllers:
+            self.controller_combo.addItem(f"{d['name']}  ·  {d['port']}")
+            if d['type'] == active:
+                self.controller_combo.setCurrentIndex(self.controller_combo.count() - 1)
+        self.controller_combo.blockSignals(False)
+        if manager is None:
+            text = "MIDI unavailable (python-rtmidi not installed or no MIDI system)"
+        elif active is None:
+            text = "No controller connected"
+        else:
+            count = len(manager.mappings.get(active, {}))
+            text = f"{manager.SUPPORTED_CONTROLLERS.get(active, active)}\n\n{count} mappings"
+        self.mapping_label.setText(f"  {text}")
+
+    # ── Audio engine ────────────────────────────────────────────────────────
+    def _bind_mixer(self, control, method: str, *args):
+        """Drive MixerBus.<method>(*args, value) from a dial/slider, starting at its current value"""
+        def apply(value):
+            getattr(self.audio_engine.mixer, method)(*args, value)
+        control.valueChanged.connect(apply)
+        apply(control.value())
+
+    def _bind_eq(self, control, channel: int, method: str):
+        """Drive ChannelEQ.<method>(value) for one channel from a knob"""
+        def apply(value):
+            getattr(self.audio_engine.channel_eqs[channel], method)(value)
+        control.valueChanged.connect(apply)
+        apply(control.value())
+
+    def refresh_analysis(self):
+        deck = self.audio_engine.decks[0]
+        shown = (deck.analysis, deck.stretch.ratio)
+        if shown == self._shown_analysis:
+            return
+        self._shown_analysis = shown
+        analysis = deck.analysis
+        if analysis is None:
+            self.bpm_label.setText("---")
+            self.ms_label.setText("--- ms")
+            self.audio_engine.beat_fx.set_bpm(None)
+            return
+        bpm = analysis.bpm * deck.stretch.ratio
+        self.bpm_label.setText(f"{bpm:.1f}")
+        self.ms_label.setText(f"{60000.0 / bpm:.0f} ms")
+        self.audio_engine.beat_fx.set_bpm(bpm)
+
+    def on_sync_toggled(self, checked: bool):
+        # A deck is either the master or synced to it, never both
+        if checked and self.master_btn.isChecked():
+            self.master_btn.setChecked(False)
+        self.audio_engine.set_sync(0, checked)
+
+    def on_master_toggled(self, checked: bool):
+        if checked and self.sync_btn.isChecked():
+            self.sync_btn.setChecked(False)
+        if checked:
+            self.audio_engine.set_tempo_master(0)
+        elif self.audio_engine.sync.master == 0:
+            self.audio_engine.set_tempo_master(None)
+
+    def on_tempo_changed(self, *_):
+        # Like the hardware, pulling the fader down (towards +) speeds up
+        span = self.TEMPO_RANGES[self.tempo_range.currentText()]
+        percent = -self.tempo_fader.value() / 50.0 * span
+        self.tempo_label.setText(f"{percent:+.2f}%")
+        self.audio_engine.set_tempo(0, percent)
+        self.refresh_analysis()
+
+    def refresh_waveform(self):
+        if self.deck_waveform is None:
+            return
+        deck = self.audio_engine.decks[0]
+        changed = deck.waveform is not self.deck_waveform.peaks
+        if changed:
+            self.deck_waveform.set_peaks(deck.waveform)
+        if changed or deck.is_playing:
+            self.deck_waveform.set_position(deck.position / self.audio_engine.sample_rate)
+        self.refresh_hot_cues()
+        self.refresh_loop()
+
+    def _pad_mode(self, mode: str) -> bool:
+        btn = self.pad_mode_btns.get(mode)
+        return btn is not None and btn.isChecked()
+
+    def on_pad_pressed(self, pad: int):
+        # MUTE mode turns the pads into chokes for whatever they are playing
+        if self._pad_mode("MUTE"):
+            self.audio_engine.sampler.stop(pad)
+        elif self._pad_mode("HOT SLICE") or self._pad_mode("SLICE"):
+            self.audio_engine.jump_to_slice(0, pad)
+        elif self._pad_mode("REPEAT"):
+            # Pads 1-11 roll 1/32 to 32 beats while held
+            from src.audio.loop import LOOP_BEATS
+            if pad < len(LOOP_BEATS) and self.audio_engine.set_loop(0, LOOP_BEATS[pad], roll=True):
+                self._rolling = pad
+        else:
+            self.audio_engine.sampler.trigger(pad)
+
+    def on_pad_released(self, pad: int):
+        if self._rolling == pad:
+            self._rolling = None
+            self.audio_engine.exit_loop(0)
+
+    def on_slice_mode_toggled(self, checked: bool):
+        # SLICE re-slices from the playhead each time it is engaged; HOT SLICE
+        # keeps the stored slices
+        if checked:
+            self.audio_engine.set_slices(0)
+
+    def on_hot_cue_clicked(self, slot: int):
+        engine = self.audio_engine
+        if QApplication.keyboardModifiers() & Qt.KeyboardModifier.ShiftModifier:
+            engine.clear_hot_cue(0, slot)
+        elif not engine.jump_to_cue(0, slot):
+            engine.set_hot_cue(0, slot)
+        self._shown_cues = None
+        self.refresh_hot_cues()
+
+    def on_loop_clicked(self):
+        # Without a beatgrid there is nothing to loop; the next refresh
+        # otherwise catches the button up once the render thread engages it
+        if not self.audio_engine.toggle_loop(0):
+            self.loop_btn.setChecked(False)
+
+    def on_reloop_clicked(self):
+        self.audio_engine.reloop(0)
+
+    def refresh_loop(self):
+        if self.loop_btn is None:
+            return
+        from src.audio.loop import beats_label
+        loop = self.audio_engine.decks[0].loop
+        self.loop_btn.setChecked(loop.active)
+        index = self.loop_beats.findText(beats_label(loop.beats))
+        if index >= 0 and index != self.loop_beats.currentIndex():
+            self.loop_beats.blockSignals(True)
+            self.loop_beats.setCurrentIndex(index)
+            self.loop_beats.blockSignals(False)
+
+    def refresh_hot_cues(self):
+        cues = self.audio_engine.decks[0].cues
+        hot = list(cues.hot_cues) if cues is not None else []
+        if hot == self._shown_cues:
+            return
+        self._shown_cues = hot
+        for slot, btn in enumerate(self.hot_cue_btns):
+            position = hot[slot] if slot < len(hot) else None
+            btn.setChecked(position is not None)
+            btn.setToolTip("" if position is None else
+                           f"{int(position // 60)}:{position % 60:05.2f} — shift-click to clear")
+
+    def _label_sampler_pads(self):
+        names = self.audio_engine.sampler.bank.names
+        for pad, btn in enumerate(self.sampler_pads):
+            if btn is not None:
+                btn.setToolTip(names[pad] if pad < len(names) else "")
+
+    def on_play_toggled(self, checked: bool):
+        if checked:
+            self.audio_engine.play()
+        else:
+            self.audio_engine.pause()
+
+    def _show_backend(self):
+        if self.backend_combo is None:
+            return
+        for label, name in self.OUTPUT_BACKENDS.items():
+            if name == self.audio_engine.backend:
+                self.backend_combo.blockSignals(True)
+                self.backend_combo.setCurrentText(label)
+                self.backend_combo.blockSignals(False)
+
+    def on_backend_changed(self, label: str):
+        try:
+            self.audio_engine.init_backend(self.OUTPUT_BACKENDS[label])
+        except (ImportError, OSError) as e:
+            QMessageBox.warning(self, "Audio Backend", f"Could not open {label} output:\n{e}")
+            # Don't leave the engine silent; fall back to whatever works
+            self.audio_engine.init_default_backend()
+        self._show_backend()
+
+    def on_buffer_size_changed(self, frames: int):
+        # The spinbox steps by 64 but accepts typed values; snap to a block multiple
+        frames = max(self.audio_engine.MIN_BLOCK_SIZE, frames - frames % 64)
+        self.audio_engine.set_block_size(frames)
+
+    # ── Instrumentation ─────────────────────────────────────────────────────
+    def on_frame_tick(self):
+        now = time.perf_counter()
+        self.instruments.ui_frame_interval.record((now - self._last_frame) * 1000.0)
+        self._last_frame = now
+
+    def refresh_diagnostics(self):
+        if self.diagnostics_label is None:
+            return
+        snap = self.instruments.snapshot()
+        lines = [f"{'':<20} {'count':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'max':>9}"]
+        for name, h in snap['histograms'].items():
+            lines.append(f"{name + ' (' + h['unit'] + ')':<20} {h['count']:>9} {h['p50']:>9.3f} "
+                         f"{h['p95']:>9.3f} {h['p99']:>9.3f} {h['max']:>9.3f}")
+        lines.append("")
+        lines.extend(f"{name:<20} {value:>9}" for name, value in snap['counters'].items())
+        self.diagnostics_label.setText("\n".join(lines))
+
+    def _diagnostics_extra(self) -> dict:
+        return {
+            'startup_ms': {phase: seconds * 1000.0 for phase, seconds in startup_timer.phases},
+            'render': self.audio_engine.get_render_stats(),
+            'buffers': self.audio_engine.get_buffer_stats(),
+            'block_size': self.audio_engine.block_size,
+            'sample_rate': self.audio_engine.sample_rate,
+        }
+
+    def save_diagnostics(self):
+        p, _ = QFileDialog.getSaveFileName(self, "Save Diagnostics Report",
+                                           "violet-dj-report.json", "JSON (*.json)")
+        if p:
+            self.instruments.dump(p, self._diagnostics_extra())
+
+    def reset_diagnostics(self):
+        self.instruments.reset()
+        self.refresh_diagnostics()
+
+    def closeEvent(self, a0):
+        if self.device_monitor is not None:
+            self.device_monitor.stop()
+        if self.controller_manager is not None:
+            self.controller_manager.close()
+        if self.instruments is not None:
+            try:
+                self.instruments.dump(extra=self._diagnostics_extra())
+            except OSError as e:
+                logger.warning(f"Could not write instrumentation report: {e}")
+        self.audio_engine.shutdown()
+        super().closeEvent(a0)
 
     # ── File / dialog actions ────────────────────────────────────────────────
     def open_track(self):
+        patterns = " ".join(f"*.{ext}" for ext in self.audio_engine.get_supported_formats())
         p, _ = QFileDialog.getOpenFileName(
-            self, "Open Track", "", "Audio Files (*.mp3 *.wav *.flac *.ogg)")
+            self, "Open Track", "", f"Audio Files ({patterns})")
         if p:
-            logger.info(f"Loading track: {p}")
+            try:
+                self.audio_engine.load_track(p)
+            except Exception as e:
+                logger.error(f"Failed to load track: {e}")
+                QMessageBox.warning(self, "Open Track", f"Could not load track:\n{e}")
+
+    def load_sample_bank(self):
+        d = QFileDialog.getExistingDirectory(self, "Load Sample Bank")
+        if not d:
+            return
+        try:
+            bank = self.audio_engine.load_sample_bank(d)
+        except Exception as e:
+            logger.error(f"Failed to load sample bank: {e}")
+            QMessageBox.warning(self, "Load Sample Bank", f"Could not load samples:\n{e}")
+            return
+        if not any(sample is not None for sample in bank.samples):
+            QMessageBox.information(self, "Load Sample Bank", "No audio files found in that folder.")
+        self._label_sampler_pads()
 
     def open_playlist(self):
         p, _ = QFileDialog.getOpenFileName(
@@ -1512,4 +2204,10 @@ class VioletDJMixer(QMainWindow):
         sb = self.statusBar()
         if sb:
             sb.showMessage("Scanning for devices…")
-        self.start_device_detection()
+        if self.device_monitor is None:
+            self.start_device_detection()
+            return
+        self.device_monitor.rescan()
+        if not self.device_detector.isRunning():
+            self.device_detector.invalidate_cache()
+            self.device_detector.start()
@@ -0,0 +1,41 @@
+"""
+Startup phase timing for Violet DJ Mixer
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Wall-clock time of each named startup phase, reported once the window is up"""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.last = self.start
+        self.phases = []
+        self.reported = False
+
+    def mark(self, phase):
+        """End the current phase under the given name"""
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def total(self):
+        """Seconds since the timer started"""
+        return self.last - self.start
+
+    def report(self):
+        """Log the per-phase breakdown (only the first call logs)"""
+        if self.reported:
+            return
+        self.reported = True
+        lines = [f"  {phase:<24} {seconds * 1000.0:8.1f} ms" for phase, seconds in self.phases]
+        logger.info(f"Startup in {self.total() * 1000.0:.0f} ms:\n" + "\n".join(lines))
+
+
+# Started when this module is first imported, which main.py does before
+# anything else; only interpreter start-up itself is left out
+startup_timer = StartupTimer()
@@ -0,0 +1,48 @@
+"""
+MIDI dispatch against a live AudioEngine
+"""
+
+import pytest
+
+from src.audio.analysis import AnalysisStore
+from src.audio.cache import PCMCache
+from src.audio.engine import AudioEngine
+from src.controllers.dispatch import MidiDispatcher
+from src.controllers.profiles import bundled_profile_path, read_profile
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = AudioEngine(block_size=256, pcm_cache=PCMCache(str(tmp_path / 'pcm')),
+                         analysis_store=AnalysisStore(str(tmp_path / 'analysis.db')))
+    yield engine
+    engine.shutdown()
+
+
+def test_mixer_mappings_follow_block_size_change(engine):
+    dispatcher = MidiDispatcher(engine)
+    dispatcher.compile(read_profile(bundled_profile_path('pioneer_ddj')).mappings,
+                       key='pioneer_ddj')
+    engine.set_block_size(512)
+    
+    # Crossfader: 14-bit CC 31/63 on channel 7
+    dispatcher(([0xB6, 31, 0], 0.0))
+    dispatcher(([0xB6, 63, 0], 0.0))
+    assert engine.mixer.crossfader == 0.0
+    
+    # Channel 1 fader: 14-bit CC 19/51 on channel 1
+    dispatcher(([0xB0, 19, 0], 0.0))
+    dispatcher(([0xB0, 51, 0], 0.0))
+    assert engine.mixer.fader[0] == 0.0
+
+
+def test_recompiling_keeps_one_table_per_controller(engine):
+    dispatcher = MidiDispatcher(engine)
+    mappings = {('cc', 0, 1): 'mixer.crossfader'}
+    for version in range(5):
+        dispatcher.compile(mappings, key='generic', version=version)
+    assert len(dispatcher._compiled) == 1
+    
+    table = dispatcher.table
+    dispatcher.compile(mappings, key='generic', version=4)
+    assert dispatcher.table is table